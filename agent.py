@@ -8,7 +8,9 @@ import platform
 import locale
 import datetime
 import random
-from nlp_engine import analyser_et_repondre, determiner_intention
+from nlp_engine import analyser_et_repondre, determiner_intention, obtenir_meteo_service
+from normalisation import QuestionNormalisee
+from metriques import Etape, demarrer_trace, terminer_trace
 
 # Configurer le logger
 logger = logging.getLogger('assistant_ia.agent')
@@ -45,8 +47,8 @@ def configurer_locale():
     
     return False
 
-# Appeler la fonction de configuration
-configurer_locale()
+# La locale n'est configurée qu'à la création du premier agent (pas à l'import)
+_locale_configuree = False
 
 class Agent:
     """
@@ -61,6 +63,11 @@ class Agent:
         Args:
             nom (str): Le nom de l'agent
         """
+        global _locale_configuree
+        if not _locale_configuree:
+            configurer_locale()
+            _locale_configuree = True
+
         self.nom = nom
         logger.info(f"Agent {self.nom} initialisé")
         
@@ -100,6 +107,9 @@ class Agent:
             dict: Le résultat contenant la réponse et les suggestions
         """
         try:
+            # Mesurer la durée de chaque étape (voir metriques.py)
+            demarrer_trace()
+            
             # Incrémenter le compteur d'interactions
             self.nb_interactions += 1
             
@@ -107,21 +117,22 @@ class Agent:
             self.historique.append({"type": "question", "contenu": question, "timestamp": datetime.datetime.now()})
             
             # Utiliser le moteur NLP pour analyser et répondre
-            logger.info(f"Agent {self.nom} analyse la question: {question}")
+            logger.debug(f"Agent {self.nom} analyse la question: {question}")
             
             # Vérifier si cette question est une réponse à une question que l'agent a posée
             relance = self._generer_relance() if self.contexte_conversation['attente_reponse'] else None
             self.contexte_conversation['attente_reponse'] = False  # Réinitialiser
             
-            # Analyser la question et obtenir une réponse
-            resultat = analyser_et_repondre(question)
-            logger.info(f"Résultat obtenu de analyser_et_repondre: {resultat}")
-            
-            # Mettre à jour le contexte de conversation
-            self._mettre_a_jour_contexte(question, resultat)
+            # Analyser la question (normalisée une seule fois) et obtenir une réponse
+            resultat = analyser_et_repondre(QuestionNormalisee(question))
+            logger.debug(f"Intention obtenue de analyser_et_repondre: {resultat.get('intention')}")
             
-            # Ajouter une relance ou un suivi si approprié
-            resultat = self._enrichir_reponse(resultat, relance)
+            with Etape("contexte"):
+                # Mettre à jour le contexte de conversation
+                self._mettre_a_jour_contexte(question, resultat)
+                
+                # Ajouter une relance ou un suivi si approprié
+                resultat = self._enrichir_reponse(resultat, relance)
             
             # Ajouter la réponse à l'historique
             self.historique.append({"type": "reponse", "contenu": resultat["reponse"], "timestamp": datetime.datetime.now()})
@@ -133,9 +144,13 @@ class Agent:
                     self.preferences_utilisateur['villes_favorites'].append(ville)
                     logger.info(f"Ville ajoutée aux favoris: {ville}")
                 self.contexte_conversation['derniere_ville_meteo'] = ville
+                # La météo des villes favorites est tenue à jour en arrière-plan
+                obtenir_meteo_service().planificateur.suivre(self.preferences_utilisateur['villes_favorites'])
             
+            terminer_trace(resultat["intention"])
             return resultat
         except Exception as e:
+            terminer_trace("erreur")
             logger.error(f"Erreur dans Agent.generer_reponse: {str(e)}")
             return {
                 "reponse": "Désolé, une erreur est survenue dans l'agent. Veuillez réessayer.",
@@ -259,6 +274,9 @@ class Agent:
 
 # Test simple si le fichier est exécuté directement
 if __name__ == "__main__":
+    from journalisation import configurer_journalisation
+    configurer_journalisation(format_journal="texte")
+    
     agent = Agent("Cindy")
     print(agent.generer_reponse("Bonjour comment vas-tu?"))
     print(agent.generer_reponse("Quelle heure est-il?"))
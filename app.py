@@ -5,20 +5,24 @@ Ce module est le point d'entrée de l'application web.
 
 import os
 import logging
-from flask import Flask, render_template, request, jsonify
-from agent import Agent
+from flask import Flask, Response, render_template, request, jsonify
+from journalisation import configurer_journalisation
 
-# Configuration du logger
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("assistant.log"),
-        logging.StreamHandler()
-    ]
-)
+# Configuration de la journalisation (une seule fois, avant l'import des autres modules)
+configurer_journalisation()
 logger = logging.getLogger('assistant_ia.app')
 
+from agent import Agent
+from nlp_engine import initialiser, obtenir_meteo_service
+from metriques import exposer
+
+# Préchargement optionnel des ressources (utile avec gunicorn --preload)
+if os.environ.get("CINDY_PRECHARGEMENT", "0") == "1":
+    initialiser()
+
+# Nombre maximal de villes par appel à /meteo/batch
+VILLES_PAR_LOT_MAX = int(os.environ.get("CINDY_VILLES_PAR_LOT_MAX", 200))
+
 # Initialisation de l'application Flask
 app = Flask(__name__)
 
@@ -67,7 +71,7 @@ def question():
             "suggestions": resultat.get("suggestions", [])
         }
         
-        logger.info(f"Réponse envoyée: {resultat['reponse']}")
+        logger.debug(f"Réponse envoyée: {resultat['reponse']}")
         return jsonify(reponse)
         
     except Exception as e:
@@ -80,6 +84,40 @@ def poser_question():
     """Redirection vers la route principale question()"""
     return question()
 
+@app.route('/meteo/batch', methods=['GET', 'POST'])
+def meteo_batch():
+    """
+    API qui retourne la météo de plusieurs villes (tableaux de bord, préchauffage du cache)
+    Reçoit {"villes": ["Paris", "Lyon"]} ou ["Paris", "Lyon"] en POST, ou ?villes=Paris,Lyon en GET
+    """
+    try:
+        if request.method == 'POST':
+            corps = request.get_json(silent=True)
+            if isinstance(corps, dict):
+                villes = corps.get('villes', [])
+            elif isinstance(corps, list):
+                villes = corps
+            else:
+                return jsonify({"erreur": 'Corps JSON attendu : {"villes": [...]} ou une liste de villes'}), 400
+        else:
+            villes = [ville.strip() for ville in request.args.get('villes', '').split(',') if ville.strip()]
+        
+        if not villes or not isinstance(villes, list) or not all(isinstance(ville, str) for ville in villes):
+            return jsonify({"erreur": "Aucune ville fournie"}), 400
+        if len(villes) > VILLES_PAR_LOT_MAX:
+            return jsonify({"erreur": f"Au plus {VILLES_PAR_LOT_MAX} villes par requête"}), 400
+        
+        return jsonify({"resultats": obtenir_meteo_service().obtenir_meteo_villes(villes)})
+        
+    except Exception as e:
+        logger.error(f"Erreur lors de la récupération groupée de la météo: {str(e)}", exc_info=True)
+        return jsonify({"erreur": "Une erreur est survenue lors de la récupération de la météo."}), 500
+
+@app.route('/metrics')
+def metriques():
+    """Route qui expose les métriques de l'agent au format texte de Prometheus"""
+    return Response(exposer(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 5000))
     app.run(host='0.0.0.0', port=port, debug=False)  # debug=False pour la production
\ No newline at end of file
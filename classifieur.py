@@ -0,0 +1,235 @@
+"""
+Classifieur de secours pour l'agent Cindy.
+Ce module entraîne et charge un modèle linéaire sur des n-grammes de caractères hachés.
+Il n'est consulté que lorsque les motifs de nlp_engine ne reconnaissent aucune intention.
+"""
+
+import os
+import json
+import zlib
+import logging
+import argparse
+import threading
+
+import numpy as np
+
+# Configuration du logger
+logger = logging.getLogger('assistant_ia.classifieur')
+
+# Emplacements par défaut des données et du modèle
+DOSSIER = os.path.dirname(os.path.abspath(__file__))
+CHEMIN_MODELE = os.environ.get("CINDY_MODELE_INTENTIONS", os.path.join(DOSSIER, "modeles", "classifieur_intentions.npz"))
+CHEMIN_INTERACTIONS = os.path.join(DOSSIER, "archives", "data", "interactions.json")
+CHEMIN_MOTIFS = os.path.join(DOSSIER, "archives", "data", "motifs_questions.json")
+
+# Paramètres de l'extraction des caractéristiques
+NOMBRE_CARACTERISTIQUES = 2 ** 14
+TAILLES_NGRAMMES = (2, 3, 4)
+
+
+def extraire_caracteristiques(texte, nombre=NOMBRE_CARACTERISTIQUES):
+    """
+    Transforme un texte en vecteur creux de n-grammes de caractères hachés.
+    Les n-grammes sont calculés mot par mot (avec un espace autour de chaque mot).
+
+    Args:
+        texte (str): Le texte à transformer
+        nombre (int): Taille de l'espace de hachage
+
+    Returns:
+        tuple: (indices, valeurs) du vecteur normalisé (norme L2)
+    """
+    comptes = {}
+    for mot in texte.lower().split():
+        mot = f" {mot} "
+        for taille in TAILLES_NGRAMMES:
+            for i in range(len(mot) - taille + 1):
+                indice = zlib.crc32(mot[i:i + taille].encode("utf-8")) % nombre
+                comptes[indice] = comptes.get(indice, 0) + 1
+
+    if not comptes:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+    indices = np.fromiter(comptes.keys(), dtype=np.int64, count=len(comptes))
+    valeurs = np.fromiter(comptes.values(), dtype=np.float32, count=len(comptes))
+    valeurs /= np.sqrt(np.dot(valeurs, valeurs))
+    return indices, valeurs
+
+
+class ClassifieurIntentions:
+    """
+    Modèle linéaire (régression logistique multinomiale) chargé depuis un fichier .npz.
+    L'inférence n'utilise que numpy : quelques dizaines de microsecondes par question.
+    """
+
+    def __init__(self, classes, poids, biais):
+        """
+        Initialise le classifieur.
+
+        Args:
+            classes (array): Noms des intentions
+            poids (array): Matrice (caractéristiques x classes)
+            biais (array): Biais par classe
+        """
+        self.classes = [str(classe) for classe in classes]
+        self.poids = np.ascontiguousarray(poids, dtype=np.float32)
+        self.biais = np.asarray(biais, dtype=np.float32)
+
+    @classmethod
+    def charger(cls, chemin=CHEMIN_MODELE):
+        """Charge un classifieur sauvegardé par sauvegarder()."""
+        with np.load(chemin, allow_pickle=False) as donnees:
+            return cls(donnees["classes"], donnees["poids"], donnees["biais"])
+
+    def sauvegarder(self, chemin=CHEMIN_MODELE):
+        """Sauvegarde le classifieur au format .npz compressé."""
+        os.makedirs(os.path.dirname(chemin) or ".", exist_ok=True)
+        np.savez_compressed(chemin, classes=np.array(self.classes), poids=self.poids, biais=self.biais)
+
+    def predire(self, texte):
+        """
+        Prédit l'intention la plus probable d'un texte.
+
+        Args:
+            texte (str): La question à classer
+
+        Returns:
+            tuple: (intention, probabilité)
+        """
+        indices, valeurs = extraire_caracteristiques(texte, self.poids.shape[0])
+        scores = valeurs @ self.poids[indices] + self.biais
+        scores = np.exp(scores - scores.max())
+        meilleur = int(scores.argmax())
+        return self.classes[meilleur], float(scores[meilleur] / scores.sum())
+
+
+# Classifieur partagé, chargé à la première utilisation
+_classifieur = None
+_classifieur_charge = False
+_verrou_chargement = threading.Lock()
+
+
+def obtenir_classifieur():
+    """
+    Retourne le classifieur partagé, en le chargeant une seule fois.
+    Retourne None si aucun modèle n'a été entraîné.
+    """
+    global _classifieur, _classifieur_charge
+    if _classifieur_charge:
+        return _classifieur
+    with _verrou_chargement:
+        if not _classifieur_charge:
+            try:
+                _classifieur = ClassifieurIntentions.charger()
+                logger.info(f"Classifieur d'intentions chargé depuis {CHEMIN_MODELE}")
+            except FileNotFoundError:
+                logger.warning(f"Aucun classifieur d'intentions trouvé ({CHEMIN_MODELE}), repli désactivé")
+            except Exception as e:
+                logger.error(f"Erreur lors du chargement du classifieur d'intentions: {str(e)}")
+            _classifieur_charge = True
+    return _classifieur
+
+
+def lire_questions(chemin):
+    """
+    Lit un fichier JSON de questions : liste de chaînes ou d'objets {"question", "intention"}.
+
+    Returns:
+        list: Liste de tuples (question, intention archivée ou None)
+    """
+    with open(chemin, encoding="utf-8") as f:
+        donnees = json.load(f)
+
+    exemples = []
+    for element in donnees:
+        if isinstance(element, str):
+            exemples.append((element, None))
+        elif isinstance(element, dict) and element.get("question"):
+            exemples.append((element["question"], element.get("intention")))
+    return exemples
+
+
+def construire_corpus(fichiers_supplementaires=()):
+    """
+    Construit le corpus d'entraînement étiqueté.
+    L'étiquette des motifs de nlp_engine est prioritaire ; l'étiquette archivée
+    n'est utilisée que pour les questions que les motifs ne reconnaissent pas.
+
+    Args:
+        fichiers_supplementaires (iterable): Autres fichiers JSON de questions (journaux, etc.)
+
+    Returns:
+        tuple: (liste de textes, liste d'intentions)
+    """
+    from nlp_engine import classer_intention
+    import reponses
+
+    exemples = lire_questions(CHEMIN_INTERACTIONS)
+
+    with open(CHEMIN_MOTIFS, encoding="utf-8") as f:
+        for intention, motifs in json.load(f).items():
+            exemples.extend((motif, intention) for motif in motifs)
+
+    # Les suggestions proposées à l'utilisateur sont des questions représentatives
+    for intention in reponses.obtenir_reponses().keys():
+        exemples.extend((suggestion, None) for suggestion in reponses.obtenir_suggestions(intention))
+
+    for chemin in fichiers_supplementaires:
+        exemples.extend(lire_questions(chemin))
+
+    textes, intentions = [], []
+    for question, intention_archivee in exemples:
+        intention = classer_intention(question)[0]
+        if intention == "inconnu" and intention_archivee:
+            intention = intention_archivee
+        textes.append(question)
+        intentions.append(intention)
+    return textes, intentions
+
+
+def entrainer(textes, intentions, nombre=NOMBRE_CARACTERISTIQUES, regularisation=10.0):
+    """
+    Entraîne un classifieur sur un corpus étiqueté (nécessite scikit-learn).
+
+    Returns:
+        ClassifieurIntentions: Le classifieur entraîné
+    """
+    from scipy.sparse import csr_matrix
+    from sklearn.linear_model import LogisticRegression
+
+    lignes, colonnes, valeurs = [], [], []
+    for ligne, texte in enumerate(textes):
+        indices, poids = extraire_caracteristiques(texte, nombre)
+        lignes.extend([ligne] * len(indices))
+        colonnes.extend(indices.tolist())
+        valeurs.extend(poids.tolist())
+    matrice = csr_matrix((valeurs, (lignes, colonnes)), shape=(len(textes), nombre), dtype=np.float32)
+
+    modele = LogisticRegression(C=regularisation, max_iter=2000)
+    modele.fit(matrice, intentions)
+    return ClassifieurIntentions(modele.classes_, modele.coef_.T, modele.intercept_)
+
+
+def main():
+    """Point d'entrée en ligne de commande : reconstruit le modèle sur disque."""
+    parser = argparse.ArgumentParser(description="Entraîne le classifieur d'intentions de secours.")
+    parser.add_argument("--sortie", default=CHEMIN_MODELE, help="Chemin du fichier .npz produit")
+    parser.add_argument("--corpus", nargs="*", default=[], help="Fichiers JSON de questions supplémentaires")
+    parser.add_argument("-C", "--regularisation", type=float, default=10.0, help="Inverse de la régularisation")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    textes, intentions = construire_corpus(args.corpus)
+    logger.info(f"Corpus construit: {len(textes)} exemples, {len(set(intentions))} intentions")
+
+    classifieur = entrainer(textes, intentions, regularisation=args.regularisation)
+    justes = sum(classifieur.predire(texte)[0] == intention for texte, intention in zip(textes, intentions))
+    logger.info(f"Précision sur le corpus d'entraînement: {justes / len(textes):.1%}")
+
+    classifieur.sauvegarder(args.sortie)
+    logger.info(f"Classifieur sauvegardé dans {args.sortie}")
+
+
+if __name__ == "__main__":
+    main()
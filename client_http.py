@@ -0,0 +1,618 @@
+"""
+Client HTTP partagé des services externes de l'agent Cindy.
+Une seule session requests par processus (connexions persistantes), des délais de connexion
+et de lecture, et quelques nouvelles tentatives espacées aléatoirement, limitées par un budget.
+Un client asynchrone (ClientHTTPAsync) applique les mêmes règles pour les serveurs asyncio.
+Une cassette (Cassette) peut enregistrer les réponses reçues, ou les rejouer sans réseau.
+"""
+
+import os
+import json
+import time
+import asyncio
+import weakref
+import random
+import logging
+import tempfile
+import threading
+from collections import deque
+from urllib.parse import urlsplit, urlencode
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metriques import Compteur, Jauge
+
+# Configuration du logger
+logger = logging.getLogger('assistant_ia.client_http')
+
+# Délais (secondes), nouvelles tentatives et taille du pool de connexions
+DELAI_CONNEXION = float(os.environ.get("CINDY_HTTP_DELAI_CONNEXION", 3.05))
+DELAI_LECTURE = float(os.environ.get("CINDY_HTTP_DELAI_LECTURE", 5))
+TENTATIVES = int(os.environ.get("CINDY_HTTP_TENTATIVES", 2))
+ATTENTE = float(os.environ.get("CINDY_HTTP_ATTENTE", 0.1))
+ATTENTE_MAX = float(os.environ.get("CINDY_HTTP_ATTENTE_MAX", 1.0))
+BUDGET_REESSAIS = float(os.environ.get("CINDY_HTTP_BUDGET_REESSAIS", 0.2))
+CONNEXIONS = int(os.environ.get("CINDY_HTTP_CONNEXIONS", 10))
+CONNEXIONS_ASYNC = int(os.environ.get("CINDY_HTTP_CONNEXIONS_ASYNC", 100))
+
+# Cassette : fichier des réponses enregistrées, mode ("relecture" ou "enregistrement") et latence
+# simulée en relecture (en millisecondes, ou "enregistree" pour rejouer la durée de chaque appel)
+CASSETTE = os.environ.get("CINDY_HTTP_CASSETTE")
+CASSETTE_MODE = os.environ.get("CINDY_HTTP_CASSETTE_MODE", "relecture")
+CASSETTE_LATENCE = os.environ.get("CINDY_HTTP_CASSETTE_LATENCE_MS", "0")
+RELECTURE, ENREGISTREMENT = "relecture", "enregistrement"
+
+# Disjoncteur : fenêtre des derniers appels observés, nombre minimal d'appels avant de juger,
+# part d'erreurs ou d'appels lents (au-delà de DISJONCTEUR_LENTEUR secondes) qui ouvre le circuit,
+# et durée d'ouverture avant un appel d'essai
+DISJONCTEUR_FENETRE = int(os.environ.get("CINDY_DISJONCTEUR_FENETRE", 20))
+DISJONCTEUR_MINIMUM = int(os.environ.get("CINDY_DISJONCTEUR_MINIMUM", 10))
+DISJONCTEUR_SEUIL_ERREURS = float(os.environ.get("CINDY_DISJONCTEUR_SEUIL_ERREURS", 0.5))
+DISJONCTEUR_LENTEUR = float(os.environ.get("CINDY_DISJONCTEUR_LENTEUR", 2.0))
+DISJONCTEUR_SEUIL_LENTEUR = float(os.environ.get("CINDY_DISJONCTEUR_SEUIL_LENTEUR", 0.5))
+DISJONCTEUR_DUREE = float(os.environ.get("CINDY_DISJONCTEUR_DUREE", 30))
+# Un appel d'essai sans résultat après ce délai (secondes) est abandonné : un autre appel peut essayer
+DISJONCTEUR_DELAI_ESSAI = float(os.environ.get("CINDY_DISJONCTEUR_DELAI_ESSAI", 15))
+
+# Réponses qui justifient une nouvelle tentative
+STATUTS_REESSAYABLES = frozenset({429, 500, 502, 503, 504})
+
+REESSAIS = Compteur(
+    "cindy_reessais_amont_total", "Nouvelles tentatives vers les services externes, par service",
+    ("service",)
+)
+REESSAIS_REFUSES = Compteur(
+    "cindy_reessais_refuses_total", "Nouvelles tentatives abandonnées faute de budget, par service",
+    ("service",)
+)
+
+ETAT_DISJONCTEUR = Jauge(
+    "cindy_disjoncteur_etat", "État du disjoncteur d'un service (0 fermé, 1 ouvert, 2 semi-ouvert)",
+    ("service",)
+)
+OUVERTURES_DISJONCTEUR = Compteur(
+    "cindy_disjoncteur_ouvertures_total", "Ouvertures du disjoncteur d'un service", ("service",)
+)
+APPELS_REFUSES = Compteur(
+    "cindy_disjoncteur_refus_total", "Appels refusés sans contacter le service (disjoncteur ouvert)", ("service",)
+)
+
+FERME, OUVERT, SEMI_OUVERT = "ferme", "ouvert", "semi_ouvert"
+CODES_ETATS = {FERME: 0, OUVERT: 1, SEMI_OUVERT: 2}
+
+
+# Jeton des appels autorisés circuit fermé (voir Disjoncteur.autoriser)
+APPEL_ORDINAIRE = object()
+
+
+class Disjoncteur:
+    """
+    Disjoncteur d'un service externe.
+    Fermé : les appels passent et leur résultat est observé sur une fenêtre glissante.
+    Ouvert : les appels sont refusés immédiatement pendant `duree_ouverture` secondes.
+    Semi-ouvert : un seul appel d'essai passe ; son succès referme le circuit, son échec le rouvre.
+
+    autoriser() remet un jeton à chaque appel autorisé, à rendre à enregistrer() : seul le jeton
+    de l'appel d'essai peut refermer ou rouvrir le circuit semi-ouvert. Les résultats des autres
+    appels (commencés avant l'ouverture, par exemple) ne font qu'alimenter la fenêtre.
+    """
+
+    def __init__(self, service, fenetre=DISJONCTEUR_FENETRE, minimum=DISJONCTEUR_MINIMUM,
+                 seuil_erreurs=DISJONCTEUR_SEUIL_ERREURS, lenteur=DISJONCTEUR_LENTEUR,
+                 seuil_lenteur=DISJONCTEUR_SEUIL_LENTEUR, duree_ouverture=DISJONCTEUR_DUREE,
+                 delai_essai=DISJONCTEUR_DELAI_ESSAI):
+        """
+        Args:
+            service (str): Nom du service (pour les métriques et les journaux)
+            fenetre (int): Nombre des derniers appels observés
+            minimum (int): Nombre minimal d'appels observés avant de pouvoir ouvrir le circuit
+            seuil_erreurs (float): Part d'erreurs qui ouvre le circuit
+            lenteur (float): Durée (secondes) au-delà de laquelle un appel réussi est compté comme lent
+            seuil_lenteur (float): Part d'appels lents qui ouvre le circuit
+            duree_ouverture (float): Durée d'ouverture avant l'appel d'essai, en secondes
+            delai_essai (float): Délai au-delà duquel un appel d'essai sans résultat est remplacé, en secondes
+        """
+        self.service = service
+        self.minimum = minimum
+        self.seuil_erreurs = seuil_erreurs
+        self.lenteur = lenteur
+        self.seuil_lenteur = seuil_lenteur
+        self.duree_ouverture = duree_ouverture
+        self.delai_essai = delai_essai
+        # Derniers appels : tuples (erreur, lent)
+        self.observations = deque(maxlen=fenetre)
+        self.etat = FERME
+        self.ouverture = 0.0
+        # Jeton de l'appel d'essai en cours (None : aucun)
+        self.essai = None
+        self.debut_essai = 0.0
+        self.verrou = threading.Lock()
+        ETAT_DISJONCTEUR.definir(0, service)
+
+    def _changer_etat(self, etat):
+        self.etat = etat
+        ETAT_DISJONCTEUR.definir(CODES_ETATS[etat], self.service)
+
+    def autoriser(self):
+        """
+        Indique si un appel peut être tenté maintenant.
+
+        Returns:
+            object: Jeton à passer à enregistrer() avec le résultat de l'appel,
+                ou None si le circuit est ouvert (ou si un appel d'essai est déjà en cours)
+        """
+        with self.verrou:
+            if self.etat == FERME:
+                return APPEL_ORDINAIRE
+            if self.etat == OUVERT and time.monotonic() - self.ouverture >= self.duree_ouverture:
+                self._changer_etat(SEMI_OUVERT)
+                self.essai = None
+            if self.essai is not None and time.monotonic() - self.debut_essai >= self.delai_essai:
+                # Appel d'essai perdu (jamais rendu) : son résultat éventuel ne comptera que dans la fenêtre
+                logger.warning(f"Disjoncteur {self.service}: appel d'essai sans résultat, nouvel essai")
+                self.essai = None
+            if self.etat == SEMI_OUVERT and self.essai is None:
+                self.essai = object()
+                self.debut_essai = time.monotonic()
+                logger.info(f"Disjoncteur {self.service}: appel d'essai")
+                return self.essai
+        APPELS_REFUSES.incrementer(self.service)
+        return None
+
+    def enregistrer(self, succes, duree, jeton=APPEL_ORDINAIRE):
+        """
+        Enregistre le résultat d'un appel autorisé.
+
+        Args:
+            succes (bool): L'appel a abouti (pas d'erreur de connexion ni de réponse 5xx)
+            duree (float): Durée de l'appel, en secondes
+            jeton (object): Jeton remis par autoriser() pour cet appel
+        """
+        with self.verrou:
+            if self.etat == SEMI_OUVERT and jeton is self.essai:
+                self.essai = None
+                if succes and duree < self.lenteur:
+                    self.observations.clear()
+                    self._changer_etat(FERME)
+                    logger.info(f"Disjoncteur {self.service}: circuit refermé")
+                else:
+                    self._ouvrir()
+                return
+
+            self.observations.append((not succes, succes and duree >= self.lenteur))
+            if self.etat == FERME and len(self.observations) >= self.minimum:
+                erreurs = sum(erreur for erreur, _ in self.observations) / len(self.observations)
+                lents = sum(lent for _, lent in self.observations) / len(self.observations)
+                if erreurs >= self.seuil_erreurs or lents >= self.seuil_lenteur:
+                    self._ouvrir()
+
+    def _ouvrir(self):
+        """Ouvre le circuit (le verrou doit être détenu)."""
+        self._changer_etat(OUVERT)
+        self.ouverture = time.monotonic()
+        OUVERTURES_DISJONCTEUR.incrementer(self.service)
+        logger.warning(f"Disjoncteur {self.service}: circuit ouvert pour {self.duree_ouverture:.0f} s")
+
+
+class BudgetReessais:
+    """
+    Limite les nouvelles tentatives à une fraction des requêtes (seau à jetons).
+    Chaque requête ajoute `ratio` jeton, chaque nouvelle tentative en consomme un :
+    quand le service est en panne, les nouvelles tentatives ne multiplient pas la charge.
+    """
+
+    def __init__(self, ratio=BUDGET_REESSAIS, plafond=10):
+        """
+        Args:
+            ratio (float): Jetons ajoutés par requête (0.2 : au plus une nouvelle tentative pour cinq requêtes)
+            plafond (int): Nombre maximal de jetons accumulés
+        """
+        self.ratio = ratio
+        self.plafond = plafond
+        self.jetons = float(plafond)
+        self.verrou = threading.Lock()
+
+    def deposer(self):
+        """Crédite le budget pour une nouvelle requête."""
+        with self.verrou:
+            self.jetons = min(self.plafond, self.jetons + self.ratio)
+
+    def retirer(self):
+        """Consomme un jeton ; retourne False si le budget est épuisé."""
+        with self.verrou:
+            if self.jetons < 1:
+                return False
+            self.jetons -= 1
+            return True
+
+
+class CassetteIncomplete(requests.ConnectionError):
+    """Aucune réponse n'est enregistrée pour la requête à rejouer (traitée comme une erreur réseau)."""
+
+
+class Cassette:
+    """
+    Réponses des services externes enregistrées dans un fichier JSON, pour rejouer les appels
+    sans réseau (essais de charge, banc d'essai) de façon déterministe.
+    Une requête est identifiée par le chemin de l'adresse et ses paramètres triés : l'hôte est
+    ignoré, si bien qu'un enregistrement fait sur le faux service se rejoue avec les vraies adresses.
+    """
+
+    def __init__(self, chemin, mode=RELECTURE, latence=0.0):
+        """
+        Args:
+            chemin (str): Fichier JSON des réponses
+            mode (str): RELECTURE (réponses servies depuis le fichier) ou ENREGISTREMENT
+                (requêtes envoyées et réponses ajoutées au fichier)
+            latence (float): Attente simulée en relecture, en secondes (None : durée enregistrée)
+        """
+        if mode not in (RELECTURE, ENREGISTREMENT):
+            raise ValueError(f"Mode de cassette inconnu: {mode}")
+        self.chemin = chemin
+        self.mode = mode
+        self.latence = latence
+        self.verrou = threading.Lock()
+        self.reponses = self._lire()
+        logger.info(f"Cassette {chemin} en {mode}: {len(self.reponses)} réponses")
+
+    @classmethod
+    def depuis_environnement(cls):
+        """Cassette configurée par CINDY_HTTP_CASSETTE*, ou None."""
+        if not CASSETTE:
+            return None
+        latence = None if CASSETTE_LATENCE == "enregistree" else float(CASSETTE_LATENCE) / 1000
+        return cls(CASSETTE, CASSETTE_MODE, latence)
+
+    @property
+    def relecture(self):
+        return self.mode == RELECTURE
+
+    @staticmethod
+    def cle(url, params=None):
+        """Clé d'une requête : chemin et paramètres triés ("/v1/search?count=5&language=fr&name=Lyon")."""
+        parametres = sorted((str(cle), str(valeur)) for cle, valeur in (params or {}).items())
+        return f"{urlsplit(url).path}?{urlencode(parametres)}"
+
+    def _lire(self):
+        try:
+            with open(self.chemin, encoding="utf-8") as f:
+                return json.load(f)["reponses"]
+        except FileNotFoundError:
+            if self.relecture:
+                logger.warning(f"Cassette introuvable: {self.chemin}")
+            return {}
+
+    def rejouer(self, url, params=None):
+        """
+        Retourne la réponse enregistrée d'une requête.
+
+        Returns:
+            tuple: (ReponseHTTP, attente simulée en secondes)
+
+        Raises:
+            CassetteIncomplete: Si la requête n'a pas été enregistrée
+        """
+        entree = self.reponses.get(self.cle(url, params))
+        if entree is None:
+            raise CassetteIncomplete(f"Aucune réponse enregistrée pour {self.cle(url, params)}")
+        reponse = ReponseHTTP(entree["statut"], entree["entetes"], entree["corps"].encode("utf-8"))
+        return reponse, entree["duree"] if self.latence is None else self.latence
+
+    def enregistrer(self, url, params, reponse, duree):
+        """
+        Ajoute une réponse reçue au fichier. Une réponse 200 déjà enregistrée est conservée :
+        le fichier n'est réécrit que pour une nouvelle requête (ou une requête jusque-là en erreur).
+
+        Args:
+            url (str): Adresse interrogée
+            params (dict): Paramètres de la requête
+            reponse: Réponse reçue (requests.Response ou ReponseHTTP)
+            duree (float): Durée de l'appel, nouvelles tentatives comprises, en secondes
+        """
+        entree = {
+            "statut": reponse.status_code,
+            "entetes": {nom: reponse.headers[nom] for nom in ("Content-Type", "Retry-After") if nom in reponse.headers},
+            "corps": reponse.content.decode("utf-8", errors="replace"),
+            "duree": round(duree, 4)
+        }
+        cle = self.cle(url, params)
+        with self.verrou:
+            if self.reponses.get(cle, {}).get("statut") == 200:
+                return
+            self.reponses[cle] = entree
+            self._ecrire()
+
+    def _ecrire(self):
+        """Écrit le fichier de façon atomique, en gardant les réponses ajoutées par d'autres processus."""
+        try:
+            with open(self.chemin, encoding="utf-8") as f:
+                self.reponses = dict(json.load(f)["reponses"], **self.reponses)
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+        dossier = os.path.dirname(os.path.abspath(self.chemin))
+        os.makedirs(dossier, exist_ok=True)
+        descripteur, temporaire = tempfile.mkstemp(dir=dossier, suffix=".tmp")
+        with os.fdopen(descripteur, "w", encoding="utf-8") as f:
+            json.dump({"reponses": self.reponses}, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(temporaire, self.chemin)
+
+
+class ClientHTTP:
+    """
+    Client HTTP avec connexions persistantes, délais et nouvelles tentatives bornées.
+    La session est recréée dans un processus issu d'un fork (workers gunicorn).
+    """
+
+    def __init__(self, delai_connexion=DELAI_CONNEXION, delai_lecture=DELAI_LECTURE, tentatives=TENTATIVES,
+                 attente=ATTENTE, attente_max=ATTENTE_MAX, budget=None, connexions=CONNEXIONS, cassette=None):
+        """
+        Args:
+            delai_connexion (float): Délai maximal d'établissement de la connexion, en secondes
+            delai_lecture (float): Délai maximal entre deux octets de la réponse, en secondes
+            tentatives (int): Nombre maximal de nouvelles tentatives après la première requête
+            attente (float): Attente de base avant une nouvelle tentative (doublée à chaque fois)
+            attente_max (float): Attente maximale avant une nouvelle tentative
+            budget (BudgetReessais): Budget partagé des nouvelles tentatives
+            connexions (int): Connexions conservées par hôte
+            cassette (Cassette): Enregistrement ou relecture des réponses, ou None
+        """
+        self.delais = (delai_connexion, delai_lecture)
+        self.tentatives = tentatives
+        self.attente = attente
+        self.attente_max = attente_max
+        self.budget = budget or BudgetReessais()
+        self.connexions = connexions
+        self.cassette = cassette
+        self._session = None
+        self._pid = None
+        self._verrou = threading.Lock()
+
+    @property
+    def session(self):
+        """Session du processus courant, créée à la première utilisation."""
+        if self._session is None or self._pid != os.getpid():
+            with self._verrou:
+                if self._session is None or self._pid != os.getpid():
+                    session = requests.Session()
+                    adaptateur = HTTPAdapter(pool_connections=4, pool_maxsize=self.connexions, max_retries=0)
+                    session.mount("https://", adaptateur)
+                    session.mount("http://", adaptateur)
+                    self._session = session
+                    self._pid = os.getpid()
+        return self._session
+
+    def _attente(self, tentative, reponse):
+        """Durée d'attente avant la nouvelle tentative (aléatoire, croissante, bornée)."""
+        if reponse is not None and reponse.headers.get("Retry-After", "").isdigit():
+            return min(self.attente_max, float(reponse.headers["Retry-After"]))
+        return random.uniform(0, min(self.attente_max, self.attente * 2 ** tentative))
+
+    def get(self, url, params=None, service="http"):
+        """
+        Envoie une requête GET, avec de nouvelles tentatives sur les erreurs de connexion,
+        les délais dépassés et les réponses 429/5xx, tant que le budget le permet.
+
+        Args:
+            url (str): Adresse à interroger
+            params (dict): Paramètres de la requête
+            service (str): Nom du service (pour les métriques et les journaux)
+
+        Returns:
+            requests.Response: La dernière réponse obtenue (ReponseHTTP en relecture d'une cassette)
+
+        Raises:
+            requests.RequestException: Si la dernière tentative échoue sans réponse
+        """
+        cassette = self.cassette
+        if cassette is not None and cassette.relecture:
+            reponse, attente = cassette.rejouer(url, params)
+            if attente:
+                time.sleep(attente)
+            return reponse
+
+        debut = time.perf_counter()
+        reponse = self._get(url, params, service)
+        if cassette is not None:
+            cassette.enregistrer(url, params, reponse, time.perf_counter() - debut)
+        return reponse
+
+    def _get(self, url, params, service):
+        """Envoie la requête avec les nouvelles tentatives (voir get())."""
+        self.budget.deposer()
+        for tentative in range(self.tentatives + 1):
+            reponse, erreur = None, None
+            try:
+                reponse = self.session.get(url, params=params, timeout=self.delais)
+                if reponse.status_code not in STATUTS_REESSAYABLES:
+                    return reponse
+            except (requests.ConnectionError, requests.Timeout) as e:
+                erreur = e
+
+            attente = self.nouvelle_tentative(tentative, reponse, erreur, service)
+            if attente is None:
+                break
+            time.sleep(attente)
+
+        if erreur is not None:
+            raise erreur
+        return reponse
+
+    def nouvelle_tentative(self, tentative, reponse, erreur, service):
+        """
+        Décide d'une nouvelle tentative après un échec (erreur réseau ou réponse 429/5xx).
+
+        Args:
+            tentative (int): Numéro de la tentative qui vient d'échouer (0 pour la première requête)
+            reponse: Réponse reçue, ou None
+            erreur (Exception): Erreur réseau, ou None
+            service (str): Nom du service (pour les métriques et les journaux)
+
+        Returns:
+            float: Attente avant la nouvelle tentative, en secondes, ou None pour abandonner
+        """
+        if tentative >= self.tentatives:
+            return None
+        if not self.budget.retirer():
+            REESSAIS_REFUSES.incrementer(service)
+            return None
+        REESSAIS.incrementer(service)
+        attente = self._attente(tentative, reponse)
+        logger.debug(f"Nouvelle tentative {tentative + 1} vers {service} dans {attente:.2f} s "
+                     f"({erreur or reponse.status_code})")
+        return attente
+
+
+class ReponseHTTP:
+    """Réponse lue en entier par le client asynchrone (mêmes attributs que requests.Response)."""
+
+    __slots__ = ("status_code", "headers", "contenu")
+
+    def __init__(self, status_code, headers, contenu):
+        self.status_code = status_code
+        self.headers = headers
+        self.contenu = contenu
+
+    @property
+    def content(self):
+        return self.contenu
+
+    @property
+    def text(self):
+        return self.contenu.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.contenu)
+
+
+class ClientHTTPAsync:
+    """
+    Équivalent asynchrone de ClientHTTP : mêmes délais, nouvelles tentatives et budget,
+    partagés avec le client synchrone. Utilise aiohttp (une session par boucle d'événements)
+    s'il est installé ; sinon, les requêtes du client synchrone sont exécutées dans un pool de threads.
+    """
+
+    def __init__(self, client=None, connexions=CONNEXIONS_ASYNC):
+        """
+        Args:
+            client (ClientHTTP): Client synchrone dont les réglages et le budget sont repris
+            connexions (int): Requêtes simultanées maximales (connexions aiohttp ou threads)
+        """
+        self.client = client or obtenir_client_http()
+        self.connexions = connexions
+        self._sessions = weakref.WeakKeyDictionary()
+        self._executeur = None
+        try:
+            import aiohttp
+        except ImportError:
+            aiohttp = None
+        self.aiohttp = aiohttp
+        if aiohttp is not None:
+            logger.info(f"Transport HTTP asynchrone: aiohttp {aiohttp.__version__} ({connexions} connexions)")
+        else:
+            logger.warning(f"Transport HTTP asynchrone: pool de {connexions} threads (aiohttp n'est pas installé)")
+
+    def _session(self):
+        """Session aiohttp de la boucle d'événements courante, créée à la première utilisation."""
+        boucle = asyncio.get_running_loop()
+        session = self._sessions.get(boucle)
+        if session is None or session.closed:
+            delai_connexion, delai_lecture = self.client.delais
+            session = self.aiohttp.ClientSession(
+                connector=self.aiohttp.TCPConnector(limit=self.connexions),
+                timeout=self.aiohttp.ClientTimeout(sock_connect=delai_connexion, sock_read=delai_lecture)
+            )
+            self._sessions[boucle] = session
+        return session
+
+    async def _envoyer(self, url, params):
+        # aiohttp n'accepte que des chaînes et des nombres dans les paramètres
+        params = {cle: str(valeur) for cle, valeur in (params or {}).items()}
+        async with self._session().get(url, params=params) as reponse:
+            return ReponseHTTP(reponse.status, reponse.headers, await reponse.read())
+
+    async def get(self, url, params=None, service="http"):
+        """
+        Envoie une requête GET sans bloquer la boucle d'événements (voir ClientHTTP.get).
+
+        Args:
+            url (str): Adresse à interroger
+            params (dict): Paramètres de la requête
+            service (str): Nom du service (pour les métriques et les journaux)
+
+        Returns:
+            ReponseHTTP ou requests.Response: La dernière réponse obtenue
+
+        Raises:
+            aiohttp.ClientError, asyncio.TimeoutError ou requests.RequestException:
+                Si la dernière tentative échoue sans réponse
+        """
+        cassette = self.client.cassette
+        if cassette is not None and cassette.relecture:
+            reponse, attente = cassette.rejouer(url, params)
+            if attente:
+                await asyncio.sleep(attente)
+            return reponse
+
+        if self.aiohttp is None:
+            if self._executeur is None:
+                # Plus large que l'exécuteur par défaut d'asyncio : l'attente d'un thread libre
+                # compterait comme de la lenteur du service pour le disjoncteur
+                self._executeur = ThreadPoolExecutor(max_workers=self.connexions, thread_name_prefix="http-async")
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executeur, self.client.get, url, params, service
+            )
+
+        debut = time.perf_counter()
+        reponse = await self._get(url, params, service)
+        if cassette is not None:
+            cassette.enregistrer(url, params, reponse, time.perf_counter() - debut)
+        return reponse
+
+    async def _get(self, url, params, service):
+        """Envoie la requête avec les nouvelles tentatives (voir get())."""
+        self.client.budget.deposer()
+        for tentative in range(self.client.tentatives + 1):
+            reponse, erreur = None, None
+            try:
+                reponse = await self._envoyer(url, params)
+                if reponse.status_code not in STATUTS_REESSAYABLES:
+                    return reponse
+            except (self.aiohttp.ClientError, asyncio.TimeoutError) as e:
+                erreur = e
+
+            attente = self.client.nouvelle_tentative(tentative, reponse, erreur, service)
+            if attente is None:
+                break
+            await asyncio.sleep(attente)
+
+        if erreur is not None:
+            raise erreur
+        return reponse
+
+    async def fermer(self):
+        """Ferme la session aiohttp de la boucle d'événements courante (à l'arrêt du serveur)."""
+        session = self._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+
+# Client partagé par les services externes, créé à la première utilisation
+_client = None
+_verrou_client = threading.Lock()
+
+
+def obtenir_client_http():
+    """
+    Retourne le client HTTP partagé du processus.
+
+    Returns:
+        ClientHTTP: Le client partagé
+    """
+    global _client
+    if _client is None:
+        with _verrou_client:
+            if _client is None:
+                _client = ClientHTTP(cassette=Cassette.depuis_environnement())
+    return _client
@@ -3,14 +3,727 @@ Module de services externes
 Ce module permet d'accéder à des services externes comme la météo.
 """
 
-import requests
+import os
+import json
+import time
+import random
+import asyncio
+import sqlite3
 import logging
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 import re
 
+from villes import EXPRESSIONS_HORS_LIEU, PREPOSITIONS_LIEU, obtenir_index_villes
+from normalisation import QuestionNormalisee, decouper_mots, retirer_accents
+from metriques import Compteur, Etape, ERREURS_AMONT, enregistrer_cache
+from client_http import ClientHTTPAsync, Disjoncteur, OUVERT, STATUTS_REESSAYABLES, obtenir_client_http
+
 # Configuration du logger
 logger = logging.getLogger('assistant_ia.external_services')
 
+# Adresses des services Open-Meteo (remplaçables par un faux service pour les essais de charge)
+METEO_URL = os.environ.get("CINDY_METEO_URL", "https://api.open-meteo.com/v1/forecast")
+GEOCODAGE_URL = os.environ.get("CINDY_GEOCODAGE_URL", "https://geocoding-api.open-meteo.com/v1/search")
+
+# Variables météo actuelles demandées à Open-Meteo
+VARIABLES_ACTUELLES = "temperature_2m,relative_humidity_2m,apparent_temperature,weather_code,wind_speed_10m"
+
+# Prévisions horaires et quotidiennes demandées dans le même appel que les conditions actuelles
+VARIABLES_HORAIRES = "temperature_2m,precipitation_probability,precipitation,weather_code"
+VARIABLES_QUOTIDIENNES = ("weather_code,temperature_2m_max,temperature_2m_min,"
+                          "precipitation_probability_max,precipitation_sum")
+METEO_JOURS_PREVISION = int(os.environ.get("CINDY_METEO_JOURS_PREVISION", 3))
+
+# Périodes des questions sur la météo à venir (utilisées telles quelles dans les réponses)
+PERIODE_SOIR = "ce soir"
+PERIODE_DEMAIN = "demain"
+PERIODE_APRES_DEMAIN = "après-demain"
+PERIODE_PROCHAINES_HEURES = "dans les prochaines heures"
+
+# Cache météo : durée de fraîcheur, durée supplémentaire pendant laquelle une valeur périmée
+# est servie (et rafraîchie en arrière-plan), nombre d'entrées et arrondi des coordonnées
+METEO_TTL = float(os.environ.get("CINDY_METEO_TTL", 600))
+METEO_PERIME = float(os.environ.get("CINDY_METEO_PERIME", 1800))
+METEO_CACHE_TAILLE = int(os.environ.get("CINDY_METEO_CACHE_TAILLE", 256))
+METEO_PRECISION = int(os.environ.get("CINDY_METEO_PRECISION", 2))
+
+# Nombre maximal de coordonnées demandées à Open-Meteo en un seul appel (obtenir_meteo_villes)
+METEO_LOT_TAILLE = int(os.environ.get("CINDY_METEO_LOT_TAILLE", 50))
+# Nombre maximal de villes inconnues géocodées en parallèle par obtenir_meteo_villes
+METEO_GEOCODAGES_PARALLELES = int(os.environ.get("CINDY_METEO_GEOCODAGES_PARALLELES", 8))
+
+# Rafraîchissement planifié des villes les plus demandées : nombre de villes suivies (0 pour
+# désactiver) et nombre maximal d'appels par minute consacrés à ces rafraîchissements, par worker
+# (chaque worker a son planificateur : la charge en amont est ce budget multiplié par le nombre de workers)
+METEO_VILLES_SUIVIES = int(os.environ.get("CINDY_METEO_VILLES_SUIVIES", 20))
+METEO_BUDGET_RAFRAICHISSEMENT_PAR_WORKER = float(os.environ.get("CINDY_METEO_BUDGET_RAFRAICHISSEMENT_PAR_WORKER", 30))
+
+# Cache persistant du géocodage : fichier SQLite partagé par les workers, durées de validité
+# des villes trouvées et des noms inconnus (en secondes)
+GEOCODAGE_CACHE = os.environ.get(
+    "CINDY_GEOCODAGE_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "geocodage.sqlite3")
+)
+GEOCODAGE_TTL = float(os.environ.get("CINDY_GEOCODAGE_TTL", 30 * 24 * 3600))
+GEOCODAGE_TTL_NEGATIF = float(os.environ.get("CINDY_GEOCODAGE_TTL_NEGATIF", 24 * 3600))
+
+APPELS_PARTAGES = Compteur(
+    "cindy_appels_partages_total", "Recherches servies par un appel identique déjà en cours, par service",
+    ("service",)
+)
+
+RAFRAICHISSEMENTS_PLANIFIES = Compteur(
+    "cindy_meteo_rafraichissements_planifies_total",
+    "Rafraîchissements planifiés de la météo des villes populaires (effectués ou hors budget)",
+    ("issue",)
+)
+
+# Ville servie quand même l'index des villes (data/villes.json) est inutilisable
+VILLE_SECOURS = {"nom": "Paris", "pays": "France", "latitude": 48.8566, "longitude": 2.3522}
+
+MESSAGE_ERREUR_METEO = ("Désolé, une erreur s'est produite lors de la récupération des informations météo. "
+                        "Veuillez réessayer plus tard.")
+
+# Mots qui ne sont pas des villes, retirés de la question avant la recherche d'un nom de lieu
+MOTS_A_SUPPRIMER = frozenset([
+    "quelle", "quel", "quelles", "quels", "meteo", "météo",
+    "temps", "température", "temperature", "climat", "est", "fait",
+    "fait-il", "pleut", "pleuvoir", "va-t-il", "humidité", "taux",
+    "actuellement", "connaitre", "connaître", "j'aimerais", "aujourd'hui"
+])
+
+# Mots courants à ne jamais prendre pour une ville
+MOTS_EXCLUS = ("demain", "aujourd'hui", "ce soir", "ce matin",
+               "temps", "pluie", "présent", "futur", "il",
+               "quelle", "quel", "est", "fait", "pleut", "pleuvoir")
+
+# Patterns spécifiques pour les questions de météo (la préposition est un mot entier :
+# le "a" final de "la" n'introduit pas de ville)
+PATTERNS_VILLE = [
+    # Format: "météo à Paris"
+    re.compile(r'\b(?:à|a|au|en|de|pour|sur)\s+([a-zÀ-ÿ\s\-]+)(?:\s|$|\?|\.)'),
+    
+    # Format pour capturer une ville à la fin d'une phrase
+    re.compile(r'\b(?:à|a|au|en|de|pour|sur)\s+([a-zÀ-ÿ\s\-]+)$'),
+    
+    # Format pour questions sur l'humidité, la pluie, etc.
+    re.compile(r'(?:humidit[ée]|pleut|pleuvoir|température|degr[ée]s).*?\b(?:à|a|au|en|de|pour|sur)\s+([a-zÀ-ÿ\s\-]+)(?:\s|$|\?|\.)'),
+]
+
+# Dernier recours : un mot qui pourrait être une ville
+PATTERN_MOT_VILLE = re.compile(r'\b([a-zÀ-ÿ\-]{3,})\b')
+
+class AppelsPartages:
+    """
+    Regroupe les appels simultanés de même clé vers un service externe : le premier appelant
+    fait l'appel, les suivants attendent son résultat (ou son exception) au lieu de le répéter.
+    Fonctionne entre threads comme entre tâches asyncio, et des uns aux autres.
+    """
+    
+    def __init__(self, service):
+        """
+        Args:
+            service (str): Nom du service (pour les métriques)
+        """
+        self.service = service
+        # Clé -> (appel en cours, thread qui le mène)
+        self.en_cours = {}
+        self.verrou = threading.Lock()
+    
+    def _rejoindre(self, cle, bloquant):
+        """
+        Retourne l'appel en cours pour une clé, ou en crée un nouveau à mener.
+        
+        Returns:
+            tuple: (Future de l'appel, True si l'appelant doit mener l'appel)
+        """
+        ident = threading.get_ident()
+        with self.verrou:
+            en_cours = self.en_cours.get(cle)
+            # Un appelant bloquant ne peut pas attendre une tâche asyncio de son propre thread
+            if en_cours is not None and not (bloquant and en_cours[1] == ident):
+                APPELS_PARTAGES.incrementer(self.service)
+                return en_cours[0], False
+            appel = Future()
+            # Déjà « en cours » : un appelant en attente qui abandonne ne l'annule pas pour les autres
+            appel.set_running_or_notify_cancel()
+            if en_cours is None:
+                self.en_cours[cle] = (appel, ident)
+            return appel, True
+    
+    def _terminer(self, cle, appel, resultat=None, erreur=None):
+        """Retire l'appel des appels en cours et transmet son issue aux appelants en attente."""
+        with self.verrou:
+            if self.en_cours.get(cle, (None,))[0] is appel:
+                del self.en_cours[cle]
+        if erreur is None:
+            appel.set_result(resultat)
+        elif isinstance(erreur, Exception):
+            appel.set_exception(erreur)
+        else:
+            # Meneur annulé ou interrompu : les autres appelants reçoivent une erreur ordinaire
+            appel.set_exception(RuntimeError(f"Appel {self.service} interrompu"))
+    
+    def executer(self, cle, fonction, *args):
+        """
+        Exécute fonction(*args), sauf si un appel de même clé est déjà en cours : attend alors son issue.
+        
+        Args:
+            cle: Clé de l'appel (coordonnées arrondies, nom normalisé...)
+            fonction (callable): Appel à partager
+            
+        Returns:
+            Le résultat de l'appel (ou lève son exception)
+        """
+        appel, meneur = self._rejoindre(cle, bloquant=True)
+        if not meneur:
+            return appel.result()
+        try:
+            resultat = fonction(*args)
+        except BaseException as e:
+            self._terminer(cle, appel, erreur=e)
+            raise
+        self._terminer(cle, appel, resultat)
+        return resultat
+    
+    async def executer_async(self, cle, fonction, *args):
+        """Équivalent asynchrone de executer(), pour une fonction coroutine."""
+        appel, meneur = self._rejoindre(cle, bloquant=False)
+        if not meneur:
+            return await asyncio.wrap_future(appel)
+        try:
+            resultat = await fonction(*args)
+        except BaseException as e:
+            self._terminer(cle, appel, erreur=e)
+            raise
+        self._terminer(cle, appel, resultat)
+        return resultat
+
+
+class PrevisionsLieu:
+    """
+    Prévisions d'un lieu en tableaux compacts : une valeur par heure (température, probabilité
+    et hauteur de pluie, code météo) et par jour, avec les horodatages Unix correspondants et
+    le décalage horaire du lieu. Une valeur absente vaut NaN (ou -1 pour les entiers).
+    """
+    
+    __slots__ = ("decalage", "heures", "temperatures", "probabilites_pluie", "pluies", "codes",
+                 "jours", "temperatures_min", "temperatures_max", "probabilites_pluie_jour", "pluies_jour", "codes_jour")
+    
+    def __init__(self, decalage, horaire, quotidien):
+        """
+        Args:
+            decalage (int): Décalage horaire du lieu par rapport à UTC, en secondes
+            horaire (dict): Séries horaires d'Open-Meteo (timeformat=unixtime)
+            quotidien (dict): Séries quotidiennes d'Open-Meteo (timeformat=unixtime)
+        """
+        self.decalage = int(decalage)
+        self.heures = array("q", horaire["time"])
+        self.temperatures = self._serie("f", horaire.get("temperature_2m"), len(self.heures))
+        self.probabilites_pluie = self._serie("b", horaire.get("precipitation_probability"), len(self.heures))
+        self.pluies = self._serie("f", horaire.get("precipitation"), len(self.heures))
+        self.codes = self._serie("b", horaire.get("weather_code"), len(self.heures))
+        self.jours = array("q", quotidien["time"])
+        self.temperatures_min = self._serie("f", quotidien.get("temperature_2m_min"), len(self.jours))
+        self.temperatures_max = self._serie("f", quotidien.get("temperature_2m_max"), len(self.jours))
+        self.probabilites_pluie_jour = self._serie("b", quotidien.get("precipitation_probability_max"), len(self.jours))
+        self.pluies_jour = self._serie("f", quotidien.get("precipitation_sum"), len(self.jours))
+        self.codes_jour = self._serie("b", quotidien.get("weather_code"), len(self.jours))
+    
+    @staticmethod
+    def _serie(type_tableau, valeurs, taille):
+        """Tableau compact d'une série ("f" : flottants, "b" : petits entiers), de la taille des horodatages."""
+        if type_tableau == "f":
+            return array("f", (float("nan") if valeur is None else valeur for valeur in (valeurs or [None] * taille)))
+        return array("b", (-1 if valeur is None else round(valeur) for valeur in (valeurs or [None] * taille)))
+    
+    @classmethod
+    def depuis_reponse(cls, donnees):
+        """
+        Construit les prévisions d'une réponse d'Open-Meteo.
+        
+        Returns:
+            PrevisionsLieu: Les prévisions, ou None si la réponse n'en contient pas
+        """
+        horaire, quotidien = donnees.get("hourly"), donnees.get("daily")
+        if not horaire or not horaire.get("time") or not quotidien or not quotidien.get("time"):
+            return None
+        try:
+            return cls(donnees.get("utc_offset_seconds", 0), horaire, quotidien)
+        except (TypeError, ValueError, OverflowError) as e:
+            logger.warning(f"Prévisions météo illisibles: {str(e)}")
+            return None
+    
+    def resumer(self, periode, maintenant=None):
+        """
+        Résume les prévisions d'une période.
+        
+        Args:
+            periode (str): PERIODE_SOIR, PERIODE_DEMAIN, PERIODE_APRES_DEMAIN ou PERIODE_PROCHAINES_HEURES
+            maintenant (float): Horodatage Unix de référence (par défaut, l'heure actuelle)
+            
+        Returns:
+            dict: temperature_min, temperature_max, probabilite_pluie (maximale, en %), pluie (mm)
+                et code météo ; None si la période sort des prévisions
+        """
+        maintenant = time.time() if maintenant is None else maintenant
+        # Début du jour en cours, à l'heure du lieu
+        minuit = maintenant - (maintenant + self.decalage) % 86400
+        if periode == PERIODE_DEMAIN:
+            return self._resumer_jour(minuit + 86400)
+        if periode == PERIODE_APRES_DEMAIN:
+            return self._resumer_jour(minuit + 2 * 86400)
+        if periode == PERIODE_SOIR:
+            # De 18 h (ou maintenant, si plus tard) à 6 h le lendemain
+            return self._resumer_heures(max(maintenant, minuit + 18 * 3600), minuit + 30 * 3600)
+        return self._resumer_heures(maintenant, maintenant + 12 * 3600)
+    
+    def _resumer_heures(self, debut, fin):
+        """Résume les heures de [debut, fin[, en comptant l'heure en cours à `debut`."""
+        if not self.heures or debut >= self.heures[-1] + 3600:
+            return None
+        i = max(0, bisect_right(self.heures, debut) - 1)
+        j = bisect_left(self.heures, fin)
+        if i >= j:
+            return None
+        return self._resume(
+            [t for t in self.temperatures[i:j] if t == t],
+            [p for p in self.probabilites_pluie[i:j] if p >= 0],
+            [p for p in self.pluies[i:j] if p == p],
+            [c for c in self.codes[i:j] if c >= 0]
+        )
+    
+    def _resumer_jour(self, debut_jour):
+        """Résume le jour qui commence à `debut_jour` (tolérance d'une heure pour les changements d'heure)."""
+        for k, jour in enumerate(self.jours):
+            if abs(jour - debut_jour) <= 3600:
+                return self._resume(
+                    [t for t in (self.temperatures_min[k], self.temperatures_max[k]) if t == t],
+                    [p for p in (self.probabilites_pluie_jour[k],) if p >= 0],
+                    [p for p in (self.pluies_jour[k],) if p == p],
+                    [c for c in (self.codes_jour[k],) if c >= 0]
+                )
+        return None
+    
+    @staticmethod
+    def _resume(temperatures, probabilites, pluies, codes):
+        if not temperatures and not codes:
+            return None
+        return {
+            "temperature_min": round(min(temperatures)) if temperatures else None,
+            "temperature_max": round(max(temperatures)) if temperatures else None,
+            "probabilite_pluie": max(probabilites) if probabilites else None,
+            "pluie": round(sum(pluies), 1),
+            # Les codes WMO croissent à peu près avec la gravité : le plus élevé résume la période
+            "code": max(codes) if codes else None
+        }
+
+
+class CacheMeteo:
+    """
+    Cache LRU borné des conditions météo actuelles, indexé par coordonnées arrondies.
+    Une entrée est fraîche pendant `ttl` secondes, puis périmée pendant `duree_perime` secondes :
+    elle est encore servie, mais l'appelant doit la rafraîchir. Au-delà, elle n'est plus servie
+    que par dernier(), quand le service météo est indisponible.
+    """
+    
+    def __init__(self, capacite=METEO_CACHE_TAILLE, ttl=METEO_TTL, duree_perime=METEO_PERIME):
+        """
+        Initialise le cache.
+        
+        Args:
+            capacite (int): Nombre maximal de coordonnées conservées
+            ttl (float): Durée de fraîcheur d'une entrée, en secondes
+            duree_perime (float): Durée pendant laquelle une entrée périmée est encore servie
+        """
+        self.capacite = capacite
+        self.ttl = ttl
+        self.duree_perime = duree_perime
+        self.entrees = OrderedDict()
+        self.verrou = threading.Lock()
+        self.succes = 0
+        self.perimes = 0
+        self.echecs = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def cle(latitude, longitude, precision=METEO_PRECISION):
+        """Clé du cache : coordonnées arrondies (2 décimales, environ 1 km, par défaut)."""
+        return round(float(latitude), precision), round(float(longitude), precision)
+    
+    def obtenir(self, cle):
+        """
+        Recherche les conditions météo d'une clé.
+        
+        Returns:
+            tuple: (conditions, âge en secondes) ou None si absentes ou trop anciennes
+        """
+        maintenant = time.monotonic()
+        with self.verrou:
+            entree = self.entrees.get(cle)
+            if entree is not None:
+                conditions, horodatage = entree
+                age = maintenant - horodatage
+                if age < self.ttl + self.duree_perime:
+                    self.entrees.move_to_end(cle)
+                    self.succes += 1
+                    if age >= self.ttl:
+                        self.perimes += 1
+                    return conditions, age
+            self.echecs += 1
+            return None
+    
+    def dernier(self, cle):
+        """
+        Retourne la dernière observation connue d'une clé, quel que soit son âge (mode dégradé).
+        
+        Returns:
+            tuple: (conditions, âge en secondes) ou None si la clé n'a jamais été observée
+        """
+        with self.verrou:
+            entree = self.entrees.get(cle)
+        if entree is None:
+            return None
+        conditions, horodatage = entree
+        return conditions, time.monotonic() - horodatage
+    
+    def age(self, cle):
+        """Âge de l'entrée d'une clé en secondes, ou None si elle est absente (sans compter de succès ni d'échec)."""
+        with self.verrou:
+            entree = self.entrees.get(cle)
+        return None if entree is None else time.monotonic() - entree[1]
+    
+    def ajouter(self, cle, conditions):
+        """Enregistre des conditions fraîches, en évinçant la clé la moins récemment utilisée si besoin."""
+        with self.verrou:
+            self.entrees[cle] = (conditions, time.monotonic())
+            self.entrees.move_to_end(cle)
+            while len(self.entrees) > self.capacite:
+                self.entrees.popitem(last=False)
+                self.evictions += 1
+    
+    def vider(self):
+        """Supprime toutes les entrées et remet les compteurs à zéro."""
+        with self.verrou:
+            self.entrees.clear()
+            self.succes = self.perimes = self.echecs = self.evictions = 0
+    
+    def statistiques(self):
+        """
+        Retourne les compteurs du cache.
+        
+        Returns:
+            dict: Succès (dont périmés), échecs, évictions, taille et capacité du cache
+        """
+        with self.verrou:
+            total = self.succes + self.echecs
+            return {
+                "succes": self.succes,
+                "perimes": self.perimes,
+                "echecs": self.echecs,
+                "evictions": self.evictions,
+                "taux_succes": self.succes / total if total else 0.0,
+                "taille": len(self.entrees),
+                "capacite": self.capacite
+            }
+
+
+class PlanificateurMeteo:
+    """
+    Garde à jour, en arrière-plan, la météo des villes les plus demandées : à chaque passage,
+    les villes suivies dont l'entrée en cache approche de la péremption (ou en est absente)
+    sont rafraîchies, à intervalles irréguliers et dans la limite d'un budget d'appels.
+    Les villes suivies sont les coordonnées les plus demandées récemment (fréquence qui décroît
+    à chaque passage) ; une ville favorite compte comme une demande supplémentaire.
+    Une favorite pas encore localisée n'est cherchée qu'un nombre limité de passages, puis oubliée.
+    """
+    
+    def __init__(self, service, nombre=METEO_VILLES_SUIVIES, budget=METEO_BUDGET_RAFRAICHISSEMENT_PAR_WORKER,
+                 decroissance=0.9, essais=30):
+        """
+        Initialise le planificateur (son thread ne démarre qu'à la première demande observée).
+        
+        Args:
+            service (MeteoService): Service dont le cache est tenu à jour
+            nombre (int): Nombre de villes suivies (0 pour désactiver le planificateur)
+            budget (float): Nombre maximal de rafraîchissements par minute (pour ce processus)
+            decroissance (float): Facteur appliqué aux fréquences des demandes à chaque passage
+            essais (int): Nombre de passages pendant lesquels une favorite inconnue est encore cherchée
+        """
+        self.service = service
+        self.nombre = nombre
+        self.budget = budget
+        self.decroissance = decroissance
+        self.essais = essais
+        # Un passage par minute au plus, et au moins quatre par durée de fraîcheur
+        self.periode = min(60.0, service.cache.ttl / 4)
+        # Une entrée est rafraîchie quand elle a vécu les trois quarts de sa durée de fraîcheur
+        self.seuil = service.cache.ttl * 0.75
+        self.frequences = {}
+        # Coordonnées des villes favorites localisées, et passages restants pour celles qui ne le sont pas
+        self._coordonnees = {}
+        self._non_localisees = {}
+        self.verrou = threading.Lock()
+        self._arret = threading.Event()
+        self._thread = None
+        self._pid = None
+    
+    def observer(self, cle):
+        """Compte une demande de conditions pour des coordonnées et démarre le thread si besoin."""
+        if self.nombre <= 0:
+            return
+        with self.verrou:
+            self.frequences[cle] = self.frequences.get(cle, 0.0) + 1
+            if self._thread is None or self._pid != os.getpid():
+                # Démarré à la première demande, donc dans chaque worker après le fork
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._boucle, name="meteo-planificateur", daemon=True)
+                self._thread.start()
+    
+    def suivre(self, villes):
+        """
+        Ajoute des villes (noms) à celles dont la météo est toujours tenue à jour.
+        Au plus `nombre` villes non localisées sont en attente : les suivantes sont ignorées.
+        
+        Args:
+            villes (list): Noms de villes, par exemple les villes favorites de l'agent
+        """
+        with self.verrou:
+            for nom in villes:
+                if nom in self._coordonnees or nom in self._non_localisees:
+                    continue
+                if len(self._non_localisees) >= self.nombre:
+                    logger.debug(f"Trop de villes favorites non localisées, '{nom}' n'est pas suivie")
+                    continue
+                self._non_localisees[nom] = self.essais
+    
+    def arreter(self):
+        """Arrête le thread du planificateur."""
+        self._arret.set()
+    
+    def _localiser_favorites(self):
+        """
+        Cherche, sans appel réseau, les coordonnées (clés du cache) des favorites non localisées.
+        Une ville inconnue est cherchée à nouveau au passage suivant, pour le cas où une demande
+        l'aurait géocodée entre-temps, jusqu'à épuisement de ses essais.
+        
+        Returns:
+            list: Coordonnées de toutes les favorites localisées
+        """
+        with self.verrou:
+            en_attente = list(self._non_localisees)
+        
+        localisees = {}
+        for nom in en_attente:
+            ville = obtenir_index_villes().corriger(nom)
+            if not ville:
+                trouve, ville = self.service.cache_geocodage.obtenir(CacheGeocodage.cle(nom))
+            if ville:
+                localisees[nom] = CacheMeteo.cle(ville["latitude"], ville["longitude"])
+        
+        with self.verrou:
+            for nom in en_attente:
+                if nom in localisees:
+                    self._coordonnees[nom] = localisees[nom]
+                    self._non_localisees.pop(nom, None)
+                elif nom in self._non_localisees:
+                    self._non_localisees[nom] -= 1
+                    if self._non_localisees[nom] <= 0:
+                        del self._non_localisees[nom]
+                        logger.debug(f"Ville favorite '{nom}' introuvable, elle n'est plus suivie")
+            return list(self._coordonnees.values())
+    
+    def selectionner(self):
+        """
+        Fait décroître les fréquences et retourne les coordonnées suivies.
+        
+        Returns:
+            list: Les `nombre` coordonnées les plus demandées (favorites comprises)
+        """
+        with self.verrou:
+            for cle in list(self.frequences):
+                self.frequences[cle] *= self.decroissance
+                if self.frequences[cle] < 0.05:
+                    del self.frequences[cle]
+            scores = dict(self.frequences)
+        
+        for cle in self._localiser_favorites():
+            scores[cle] = scores.get(cle, 0.0) + 1
+        return sorted(scores, key=scores.get, reverse=True)[:self.nombre]
+    
+    def passage(self):
+        """
+        Rafraîchit les villes suivies proches de la péremption, étalées sur une période.
+        
+        Returns:
+            int: Nombre de rafraîchissements effectués
+        """
+        cache = self.service.cache
+        a_rafraichir = []
+        for cle in self.selectionner():
+            age = cache.age(cle)
+            if age is None or age >= self.seuil:
+                a_rafraichir.append(cle)
+        
+        limite = max(1, int(self.budget * self.periode / 60))
+        if len(a_rafraichir) > limite:
+            RAFRAICHISSEMENTS_PLANIFIES.incrementer("hors_budget", quantite=len(a_rafraichir) - limite)
+            a_rafraichir = a_rafraichir[:limite]
+        
+        intervalle = self.periode / max(1, len(a_rafraichir))
+        effectues = 0
+        for cle in a_rafraichir:
+            if self._arret.wait(intervalle * random.uniform(0.5, 1.5)):
+                break
+            if self.service.disjoncteur.etat == OUVERT:
+                break
+            self.service._rafraichir(cle)
+            RAFRAICHISSEMENTS_PLANIFIES.incrementer("effectue")
+            effectues += 1
+        return effectues
+    
+    def _boucle(self):
+        """Passages successifs jusqu'à l'arrêt ; le premier est décalé au hasard pour ne pas synchroniser les workers."""
+        attente = random.uniform(0, self.periode)
+        while not self._arret.wait(attente):
+            try:
+                effectues = self.passage()
+            except Exception as e:
+                logger.warning(f"Échec du rafraîchissement planifié de la météo: {str(e)}")
+                effectues = 0
+            # Un passage qui a rafraîchi des villes a déjà duré environ une période
+            attente = 0 if effectues else self.periode * random.uniform(0.8, 1.2)
+
+
+class CacheGeocodage:
+    """
+    Cache persistant (SQLite) des recherches de géocodage, y compris les noms introuvables.
+    Le fichier est partagé par tous les workers et conservé entre deux démarrages.
+    Chaque thread ouvre sa propre connexion, à la première utilisation dans son processus.
+    """
+    
+    def __init__(self, chemin=GEOCODAGE_CACHE, ttl=GEOCODAGE_TTL, ttl_negatif=GEOCODAGE_TTL_NEGATIF):
+        """
+        Initialise le cache (le fichier n'est ouvert qu'à la première recherche).
+        
+        Args:
+            chemin (str): Fichier SQLite (":memory:" pour un cache propre à chaque thread)
+            ttl (float): Durée de validité d'une ville trouvée, en secondes
+            ttl_negatif (float): Durée de validité d'un nom introuvable, en secondes
+        """
+        self.chemin = chemin
+        self.ttl = ttl
+        self.ttl_negatif = ttl_negatif
+        self._local = threading.local()
+        self.verrou = threading.Lock()
+        self.succes = 0
+        self.negatifs = 0
+        self.echecs = 0
+    
+    @staticmethod
+    def cle(nom):
+        """Clé du cache : le nom sans casse, accents ni ponctuation ("Saint-Étienne" -> "saint etienne")."""
+        return " ".join(decouper_mots(nom or ""))
+    
+    def _connexion(self):
+        """Retourne la connexion du thread courant, ouverte dans le processus courant."""
+        connexion = getattr(self._local, "connexion", None)
+        if connexion is None or self._local.pid != os.getpid():
+            if self.chemin != ":memory:":
+                os.makedirs(os.path.dirname(self.chemin) or ".", exist_ok=True)
+            connexion = sqlite3.connect(self.chemin, timeout=5, isolation_level=None)
+            if self.chemin != ":memory:":
+                # WAL : les lectures des workers ne bloquent pas les écritures
+                connexion.execute("PRAGMA journal_mode=WAL")
+                connexion.execute("PRAGMA synchronous=NORMAL")
+            connexion.execute(
+                "CREATE TABLE IF NOT EXISTS geocodage (cle TEXT PRIMARY KEY, resultat TEXT, expiration REAL NOT NULL)"
+            )
+            self._local.connexion = connexion
+            self._local.pid = os.getpid()
+        return connexion
+    
+    def obtenir(self, cle):
+        """
+        Recherche un nom déjà géocodé.
+        
+        Args:
+            cle (str): Nom normalisé (voir cle())
+            
+        Returns:
+            tuple: (trouvé, ville) : (False, None) si le nom est absent ou expiré,
+                (True, None) si le nom est connu comme introuvable, (True, dict) sinon
+        """
+        try:
+            ligne = self._connexion().execute(
+                "SELECT resultat FROM geocodage WHERE cle = ? AND expiration > ?", (cle, time.time())
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Cache de géocodage indisponible: {str(e)}")
+            ligne = None
+        
+        with self.verrou:
+            if ligne is None:
+                self.echecs += 1
+                return False, None
+            self.succes += 1
+            if ligne[0] is None:
+                self.negatifs += 1
+                return True, None
+        return True, json.loads(ligne[0])
+    
+    def enregistrer(self, cle, ville):
+        """
+        Enregistre le résultat d'un géocodage (None pour un nom introuvable).
+        
+        Args:
+            cle (str): Nom normalisé (voir cle())
+            ville (dict): Informations sur la ville, ou None
+        """
+        duree = self.ttl if ville else self.ttl_negatif
+        resultat = json.dumps(ville, ensure_ascii=False) if ville else None
+        try:
+            self._connexion().execute(
+                "INSERT OR REPLACE INTO geocodage (cle, resultat, expiration) VALUES (?, ?, ?)",
+                (cle, resultat, time.time() + duree)
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Impossible d'enregistrer le géocodage de '{cle}': {str(e)}")
+    
+    def purger(self):
+        """Supprime les entrées expirées et retourne leur nombre."""
+        try:
+            return self._connexion().execute("DELETE FROM geocodage WHERE expiration <= ?", (time.time(),)).rowcount
+        except sqlite3.Error as e:
+            logger.warning(f"Impossible de purger le cache de géocodage: {str(e)}")
+            return 0
+    
+    def statistiques(self):
+        """
+        Retourne les compteurs du cache (propres au processus) et le nombre d'entrées du fichier.
+        
+        Returns:
+            dict: Succès (dont noms introuvables), échecs et taille du cache
+        """
+        try:
+            taille = self._connexion().execute("SELECT COUNT(*) FROM geocodage").fetchone()[0]
+        except sqlite3.Error:
+            taille = 0
+        with self.verrou:
+            total = self.succes + self.echecs
+            return {
+                "succes": self.succes,
+                "negatifs": self.negatifs,
+                "echecs": self.echecs,
+                "taux_succes": self.succes / total if total else 0.0,
+                "taille": taille
+            }
+
+
 class MeteoService:
     """
     Classe pour accéder aux données météo via Open Meteo.
@@ -18,99 +731,93 @@ class MeteoService:
     
     def __init__(self):
         """Initialise le service météo."""
-        self.base_url = "https://api.open-meteo.com/v1/forecast"
-        self.geocoding_url = "https://geocoding-api.open-meteo.com/v1/search"
-        self.default_location = {"latitude": 48.8567, "longitude": 2.3508, "name": "Paris", "country": "France"}
-        
-        # Nous gardons une liste de villes françaises courantes juste pour des performances
-        # mais cette liste ne sera utilisée qu'en dernier recours
-        self.villes = {
-            "paris": {"latitude": 48.8567, "longitude": 2.3508},
-            "marseille": {"latitude": 43.2965, "longitude": 5.3698},
-            "lyon": {"latitude": 45.7578, "longitude": 4.8320},
-            "toulouse": {"latitude": 43.6043, "longitude": 1.4437},
-            "nice": {"latitude": 43.7034, "longitude": 7.2663},
-            "nantes": {"latitude": 47.2184, "longitude": -1.5536},
-            "strasbourg": {"latitude": 48.5734, "longitude": 7.7521},
-            "montpellier": {"latitude": 43.6119, "longitude": 3.8772},
-            "bordeaux": {"latitude": 44.8378, "longitude": -0.5792},
-            "lille": {"latitude": 50.6292, "longitude": 3.0573}
-        }
+        self.base_url = METEO_URL
+        self.geocoding_url = GEOCODAGE_URL
+        
+        # Client HTTP partagé (connexions persistantes, délais, nouvelles tentatives)
+        self.client = obtenir_client_http()
+        
+        # Disjoncteur du service météo : en cas de panne, réponse immédiate depuis le cache
+        self.disjoncteur = Disjoncteur("meteo")
+        
+        # Cache des conditions actuelles, partagé par obtenir_meteo et obtenir_meteo_ville
+        self.cache = CacheMeteo()
+        enregistrer_cache("meteo", self.cache.statistiques)
+        
+        # Cache persistant du géocodage, partagé par les workers
+        self.cache_geocodage = CacheGeocodage()
+        enregistrer_cache("geocodage", self.cache_geocodage.statistiques)
+        
+        # Un seul appel en cours par coordonnées ou par nom de ville, quel que soit le nombre de demandes
+        self.appels_meteo = AppelsPartages("meteo")
+        self.appels_geocodage = AppelsPartages("geocodage")
+        
+        # Rafraîchissement en arrière-plan des entrées périmées (une seule fois par clé à la fois)
+        self._rafraichissements = set()
+        self._verrou_rafraichissement = threading.Lock()
+        self._executeur = None
+        # Géocodage en parallèle des villes inconnues d'une demande groupée
+        self._executeur_geocodage = None
+        
+        # Rafraîchissement planifié des villes les plus demandées
+        self.planificateur = PlanificateurMeteo(self)
     
     def extraire_nom_ville(self, texte):
         """
         Extrait le nom de la ville à partir du texte de la question.
         Si aucune ville n'est détectée, retourne None.
+        
+        Args:
+            texte (str ou QuestionNormalisee): Le texte de la question
         """
         if not texte:
             return None
+        question = QuestionNormalisee.depuis(texte)
+        
+        # Vérifier les mentions directes de villes connues (un seul passage sur le texte)
+        index = obtenir_index_villes()
+        ville_connue = index.extraire(question)
+        if ville_connue:
+            return ville_connue["nom"]
+        
+        # Supprimer les mots qui ne sont pas des villes pour éviter les faux positifs ; une virgule
+        # remplace les expressions de temps et de météo pour qu'elles ne prolongent pas le nom
+        texte = " ".join(mot for mot in question.minuscule.split() if mot not in MOTS_A_SUPPRIMER)
+        texte = EXPRESSIONS_HORS_LIEU.sub(",", texte)
         
-        # Convertir le texte en minuscules pour faciliter la recherche
-        texte = texte.lower()
-        
-        # Supprimer les mots qui ne sont pas des villes pour éviter les faux positifs
-        mots_a_supprimer = ["quelle", "quel", "quelles", "quels", "meteo", "météo", 
-                           "temps", "température", "temperature", "climat", "est", "fait",
-                           "fait-il", "pleut", "pleuvoir", "va-t-il", "humidité", "taux", 
-                           "actuellement", "connaitre", "connaître", "j'aimerais", "aujourd'hui"]
-        
-        for mot in mots_a_supprimer:
-            texte = texte.replace(f"{mot} ", " ")
-        
-        # Liste de villes courantes en France pour détecter les mentions directes
-        villes_courantes = [
-            "paris", "marseille", "lyon", "toulouse", "nice", "nantes", 
-            "strasbourg", "montpellier", "bordeaux", "lille", "rennes", 
-            "reims", "toulon", "angers", "grenoble", "dijon", "nancy", "metz",
-            "tokyo", "londres", "new york", "bali"
-        ]
-        
-        # Vérifier les mentions directes de villes
-        for ville in villes_courantes:
-            if re.search(r'\b' + re.escape(ville) + r'\b', texte):
-                return ville.title()
-        
-        # Patterns spécifiques pour les questions de météo
-        patterns = [
-            # Format: "météo à Paris"
-            r'(?:à|a|au|en|de|pour|sur)\s+([a-zÀ-ÿ\s\-]+)(?:\s|$|\?|\.)',
-            
-            # Format pour capturer une ville à la fin d'une phrase
-            r'(?:à|a|au|en|de|pour|sur)\s+([a-zÀ-ÿ\s\-]+)$',
-            
-            # Format pour questions sur l'humidité, la pluie, etc.
-            r'(?:humidit[ée]|pleut|pleuvoir|température|degr[ée]s).*?(?:à|a|au|en|de|pour|sur)\s+([a-zÀ-ÿ\s\-]+)(?:\s|$|\?|\.)',
-            
-            # Format simple pour capturer un mot qui pourrait être une ville
-            r'\b([a-zÀ-ÿ\-]{3,})\b'
-        ]
-        
-        # Tester tous les patterns
-        for pattern in patterns:
-            matches = re.findall(pattern, texte)
-            if matches:
-                for match in matches:
-                    ville_candidate = match.strip()
-                    # Ignorer les mots courants qui ne sont pas des villes
-                    mots_exclus = ["demain", "aujourd'hui", "ce soir", "ce matin", 
-                                  "temps", "pluie", "présent", "futur", "il",
-                                  "quelle", "quel", "est", "fait", "pleut", "pleuvoir"]
-                    
-                    if any(mot == ville_candidate for mot in mots_exclus):
-                        continue
-                    
-                    # Si la ville candidate est non vide et n'est pas dans les mots exclus
-                    if ville_candidate and not any(mot in ville_candidate for mot in mots_exclus):
-                        # Vérifier que ce n'est pas un mot commun (minimum 3 lettres)
-                        if len(ville_candidate) >= 3:
-                            return ville_candidate.title()
-        
-        # Si aucune ville n'a été trouvée
+        # Tester les patterns introduits par une préposition
+        for pattern in PATTERNS_VILLE:
+            ville = self._premiere_ville_candidate(pattern, texte)
+            if ville:
+                return ville
+        
+        # Une ville connue, même mal placée, plutôt qu'un mot quelconque de la question
+        villes_connues = index.extraire_toutes(question)
+        if villes_connues:
+            return villes_connues[0]["nom"]
+        return self._premiere_ville_candidate(PATTERN_MOT_VILLE, texte)
+    
+    @staticmethod
+    def _premiere_ville_candidate(pattern, texte):
+        """Première capture de `pattern` qui pourrait être une ville (mots courants exclus), en titre ; None sinon."""
+        for match in pattern.findall(texte):
+            ville_candidate = match.strip()
+            # Ignorer les mots courants et les prépositions seules
+            if ville_candidate in MOTS_EXCLUS or retirer_accents(ville_candidate) in PREPOSITIONS_LIEU:
+                continue
+            
+            # Si la ville candidate est non vide et n'est pas dans les mots exclus
+            if ville_candidate and not any(mot in ville_candidate for mot in MOTS_EXCLUS):
+                # Vérifier que ce n'est pas un mot commun (minimum 3 lettres)
+                if len(ville_candidate) >= 3:
+                    return ville_candidate.title()
         return None
     
     def rechercher_ville_api(self, nom_ville):
         """
         Recherche une ville en utilisant l'API de géocodage.
+        Les résultats, y compris les noms introuvables, sont conservés dans le cache persistant ;
+        les erreurs du service ne sont pas mémorisées.
         
         Args:
             nom_ville (str): Le nom de la ville à rechercher
@@ -118,30 +825,63 @@ class MeteoService:
         Returns:
             dict: Informations sur la ville trouvée ou None si aucune correspondance
         """
-        try:
-            params = {
-                "name": nom_ville,
-                "count": 5,  # Récupérer plusieurs résultats
-                "language": "fr"
-            }
-            
-            response = requests.get(self.geocoding_url, params=params)
-            data = response.json()
-            
-            if "results" in data and data["results"]:
-                # Choisir le premier résultat comme le plus pertinent
-                ville = data["results"][0]
-                return {
-                    "nom": ville["name"],
-                    "pays": ville.get("country", ""),
-                    "latitude": ville["latitude"],
-                    "longitude": ville["longitude"]
-                }
+        cle = CacheGeocodage.cle(nom_ville)
+        if not cle:
             return None
+        trouve, ville = self.cache_geocodage.obtenir(cle)
+        if trouve:
+            return ville
+        return self.appels_geocodage.executer(cle, self._geocoder, cle, nom_ville)
+    
+    def _geocoder(self, cle, nom_ville):
+        """Interroge l'API de géocodage (voir rechercher_ville_api) ; None en cas d'erreur."""
+        try:
+            response = self.client.get(self.geocoding_url, params=self._params_geocodage(nom_ville), service="geocodage")
+            return self._lire_geocodage(cle, response)
             
         except Exception as e:
+            ERREURS_AMONT.incrementer("geocodage", "exception")
             logger.error(f"Erreur lors de la recherche de ville via API: {e}")
             return None
+    
+    @staticmethod
+    def _params_geocodage(nom_ville):
+        """Paramètres d'une recherche de ville auprès de l'API de géocodage."""
+        return {
+            "name": nom_ville,
+            "count": 5,  # Récupérer plusieurs résultats
+            "language": "fr"
+        }
+    
+    def _lire_geocodage(self, cle, response):
+        """
+        Interprète une réponse de l'API de géocodage et la conserve dans le cache persistant.
+        
+        Args:
+            cle (str): Nom normalisé (voir CacheGeocodage.cle())
+            response: Réponse HTTP du service
+            
+        Returns:
+            dict: Informations sur la ville trouvée, ou None (nom introuvable ou erreur HTTP)
+        """
+        if response.status_code != 200:
+            ERREURS_AMONT.incrementer("geocodage", "http")
+            logger.error(f"Erreur HTTP lors de la recherche de ville: {response.status_code}")
+            return None
+        data = response.json()
+        
+        ville = None
+        if "results" in data and data["results"]:
+            # Choisir le premier résultat comme le plus pertinent
+            resultat = data["results"][0]
+            ville = {
+                "nom": resultat["name"],
+                "pays": resultat.get("country", ""),
+                "latitude": resultat["latitude"],
+                "longitude": resultat["longitude"]
+            }
+        self.cache_geocodage.enregistrer(cle, ville)
+        return ville
             
     def trouver_ville(self, texte):
         """
@@ -154,57 +894,40 @@ class MeteoService:
             dict: Informations sur la ville trouvée (nom, coordonnées, etc.)
         """
         try:
-            # Liste des villes courantes avec leurs coordonnées
-            villes_courantes = {
-                "paris": {"nom": "Paris", "pays": "France", "latitude": 48.8566, "longitude": 2.3522},
-                "marseille": {"nom": "Marseille", "pays": "France", "latitude": 43.2965, "longitude": 5.3698},
-                "lyon": {"nom": "Lyon", "pays": "France", "latitude": 45.7578, "longitude": 4.8320},
-                "toulouse": {"nom": "Toulouse", "pays": "France", "latitude": 43.6047, "longitude": 1.4442},
-                "nice": {"nom": "Nice", "pays": "France", "latitude": 43.7102, "longitude": 7.2620},
-                "nantes": {"nom": "Nantes", "pays": "France", "latitude": 47.2184, "longitude": -1.5536},
-                "strasbourg": {"nom": "Strasbourg", "pays": "France", "latitude": 48.5734, "longitude": 7.7521},
-                "montpellier": {"nom": "Montpellier", "pays": "France", "latitude": 43.6119, "longitude": 3.8772},
-                "bordeaux": {"nom": "Bordeaux", "pays": "France", "latitude": 44.8378, "longitude": -0.5792},
-                "lille": {"nom": "Lille", "pays": "France", "latitude": 50.6292, "longitude": 3.0573},
-                "rennes": {"nom": "Rennes", "pays": "France", "latitude": 48.1173, "longitude": -1.6778},
-                "reims": {"nom": "Reims", "pays": "France", "latitude": 49.2583, "longitude": 4.0317},
-                "nancy": {"nom": "Nancy", "pays": "France", "latitude": 48.6921, "longitude": 6.1844},
-                "metz": {"nom": "Metz", "pays": "France", "latitude": 49.1193, "longitude": 6.1755},
-                "tokyo": {"nom": "Tokyo", "pays": "Japon", "latitude": 35.6762, "longitude": 139.6503},
-                "londres": {"nom": "Londres", "pays": "Royaume-Uni", "latitude": 51.5074, "longitude": -0.1278},
-                "new york": {"nom": "New York", "pays": "États-Unis", "latitude": 40.7128, "longitude": -74.0060},
-                "bali": {"nom": "Bali", "pays": "Indonésie", "latitude": -8.3405, "longitude": 115.0920}
-            }
-            
-            # Extraire le nom de la ville du texte
-            nom_ville = self.extraire_nom_ville(texte)
-            
-            # Si aucune ville n'est trouvée ou si l'extraction échoue, utiliser Paris par défaut
-            if not nom_ville:
-                nom_ville = "Paris"
+            nom_ville, ville_connue = self._ville_locale(texte)
+            if ville_connue:
+                return ville_connue
             
-            # Vérifier si la ville est dans notre cache
-            nom_ville_lower = nom_ville.lower()
-            if nom_ville_lower in villes_courantes:
-                return villes_courantes[nom_ville_lower]
-            
-            # Si ce n'est pas dans notre cache, essayer via l'API
-            ville_info = self.rechercher_ville_api(nom_ville)
-            
-            # Si la ville n'est pas trouvée via API, utiliser Paris par défaut
-            if not ville_info:
-                return villes_courantes["paris"]
-            
-            return ville_info
+            # Si ce n'est pas dans notre index, essayer via l'API, puis une faute de frappe (Paris par défaut)
+            return (self.rechercher_ville_api(nom_ville) or obtenir_index_villes().corriger(nom_ville)
+                    or obtenir_index_villes().trouver("paris"))
             
         except Exception as e:
             # En cas d'erreur, retourner Paris comme solution de secours
-            return {
-                "nom": "Paris",
-                "pays": "France",
-                "latitude": 48.8566,
-                "longitude": 2.3522
-            }
+            return dict(VILLE_SECOURS)
+    
+    def _ville_locale(self, texte):
+        """
+        Extrait le nom de la ville du texte (Paris si aucune n'est détectée)
+        et le cherche sous ce nom exact dans l'index local.
+        
+        Returns:
+            tuple: (nom de la ville, ville de l'index local ou None)
+        """
+        nom_ville = self.extraire_nom_ville(texte) or "Paris"
+        return nom_ville, obtenir_index_villes().trouver(nom_ville)
+    
+    def _localiser(self, ville):
+        """
+        Localise une ville par son nom : index local (nom exact), puis géocodage, puis correction
+        d'une faute de frappe en dernier recours (une vraie ville absente de l'index n'est pas
+        prise pour une ville connue au nom voisin).
+        
+        Returns:
+            dict: Informations sur la ville, ou None si elle est introuvable
+        """
+        index = obtenir_index_villes()
+        return index.trouver(ville) or self.rechercher_ville_api(ville) or index.corriger(ville)
     
     def obtenir_meteo(self, texte):
         """
@@ -218,59 +941,145 @@ class MeteoService:
         """
         try:
             # Trouver la ville dans le texte
-            ville_info = self.trouver_ville(texte)
+            with Etape("geocodage"):
+                ville_info = self.trouver_ville(texte)
             
-            # Récupérer les coordonnées
-            lat = ville_info["latitude"]
-            lon = ville_info["longitude"]
+            # Conditions actuelles (servies par le cache météo si possible)
+            current = self.obtenir_conditions(ville_info["latitude"], ville_info["longitude"])
+            return self._message_meteo(ville_info, current)
+                
+        except Exception as e:
+            # En cas d'exception, retourner un message d'erreur générique
+            return MESSAGE_ERREUR_METEO
+    
+    def _message_meteo(self, ville_info, current):
+        """
+        Construit la réponse de obtenir_meteo().
+        
+        Args:
+            ville_info (dict): Ville trouvée
+            current (dict): Conditions actuelles, ou None si le service a échoué
             
-            # Construire l'URL pour l'API Open-Meteo (version simple et fiable)
-            url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current=temperature_2m,relative_humidity_2m,apparent_temperature,weather_code,wind_speed_10m&timezone=auto"
+        Returns:
+            str: Message formaté, ou message d'erreur
+        """
+        if current is None:
+            return MESSAGE_ERREUR_METEO
+        
+        # Créer un dictionnaire avec les informations formatées
+        meteo_info = {
+            "status": "success",
+            "ville": ville_info["nom"],
+            "pays": ville_info.get("pays", ""),
+            "temperature": round(current.get("temperature_2m", 0)),
+            "temperature_ressentie": round(current.get("apparent_temperature", 0)),
+            "humidite": current.get("relative_humidity_2m", 0),
+            "unite_humidite": "%",
+            "vent": round(current.get("wind_speed_10m", 0)),
+            "unite_vent": "km/h",
+            "code": current.get("weather_code", 0),
+            "est_jour": 1,  # Supposer qu'il fait jour par défaut
+            "timestamp": datetime.now().strftime("%d %B %Y, %H:%M"),
+            "age_observation": current.get("age_observation"),
+        }
+        
+        # Interpréter le code météo
+        meteo_info["description"] = self.interpreter_code_meteo(meteo_info["code"])
+        
+        # Obtenir l'icône correspondante
+        meteo_info["icone"] = self.obtenir_icone_meteo(meteo_info["code"])
+        
+        # Formater le message
+        with Etape("formatage"):
+            return self.formater_message_meteo(meteo_info)
+    
+    def obtenir_prevision(self, texte, periode, pluie=False):
+        """
+        Répond à une question sur la météo à venir (ce soir, demain, pluie dans les prochaines heures)
+        à partir des prévisions du lieu, téléchargées et mises en cache avec les conditions actuelles.
+        
+        Args:
+            texte (str): Texte contenant potentiellement un nom de ville
+            periode (str): PERIODE_SOIR, PERIODE_DEMAIN, PERIODE_APRES_DEMAIN ou PERIODE_PROCHAINES_HEURES
+            pluie (bool): La question porte sur la pluie ("va-t-il pleuvoir ?")
             
-            # Faire la requête HTTP
-            response = requests.get(url)
+        Returns:
+            str: Message formaté, ou None si les prévisions sont indisponibles
+                (l'appelant peut alors répondre avec les conditions actuelles)
+        """
+        try:
+            with Etape("geocodage"):
+                ville_info = self.trouver_ville(texte)
+            conditions = self.obtenir_conditions(ville_info["latitude"], ville_info["longitude"])
+            return self._message_prevision(ville_info, conditions, periode, pluie)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'obtention des prévisions: {str(e)}")
+            return None
+    
+    def _message_prevision(self, ville_info, conditions, periode, pluie):
+        """Construit la réponse de obtenir_prevision() (None si les prévisions sont indisponibles)."""
+        previsions = conditions.get("previsions") if conditions else None
+        if previsions is None:
+            return None
+        resume = previsions.resumer(periode)
+        if resume is None:
+            return None
+        with Etape("formatage"):
+            message = self.formater_message_prevision(ville_info["nom"], periode, resume, pluie)
+        if conditions.get("age_observation") is not None:
+            message += self.formater_note_observation(conditions["age_observation"])
+        return message
+    
+    def formater_message_prevision(self, ville, periode, resume, pluie=False):
+        """
+        Formate une prévision en message texte.
+        
+        Args:
+            ville (str): Nom de la ville
+            periode (str): Période de la prévision ("ce soir", "demain"...)
+            resume (dict): Résumé des prévisions (voir PrevisionsLieu.resumer)
+            pluie (bool): La question porte sur la pluie
             
-            # Vérifier si la requête a réussi
-            if response.status_code == 200:
-                # Parser les données JSON
-                data = response.json()
-                
-                # Extraire les informations actuelles
-                current = data.get("current", {})
-                
-                # Créer un dictionnaire avec les informations formatées
-                meteo_info = {
-                    "status": "success",
-                    "ville": ville_info["nom"],
-                    "pays": ville_info.get("pays", ""),
-                    "temperature": round(current.get("temperature_2m", 0)),
-                    "temperature_ressentie": round(current.get("apparent_temperature", 0)),
-                    "humidite": current.get("relative_humidity_2m", 0),
-                    "unite_humidite": "%",
-                    "vent": round(current.get("wind_speed_10m", 0)),
-                    "unite_vent": "km/h",
-                    "code": current.get("weather_code", 0),
-                    "est_jour": 1,  # Supposer qu'il fait jour par défaut
-                    "timestamp": datetime.now().strftime("%d %B %Y, %H:%M"),
-                }
-                
-                # Interpréter le code météo
-                meteo_info["description"] = self.interpreter_code_meteo(meteo_info["code"])
-                
-                # Obtenir l'icône correspondante
-                meteo_info["icone"] = self.obtenir_icone_meteo(meteo_info["code"])
-                
-                # Formater le message
-                message = self.formater_message_meteo(meteo_info)
-                
-                return message
+        Returns:
+            str: Message formaté
+        """
+        code = resume["code"]
+        description = self.interpreter_code_meteo(code) if code is not None else "conditions inconnues"
+        icone = self.obtenir_icone_meteo(code)
+        probabilite = resume["probabilite_pluie"]
+        
+        # Risque de pluie : probabilité annoncée, à défaut hauteur de pluie prévue
+        if probabilite is not None:
+            risque = "fort" if probabilite >= 60 else "possible" if probabilite >= 30 else "faible"
+        else:
+            risque = "fort" if resume["pluie"] >= 1 else "possible" if resume["pluie"] > 0 else "faible"
+        
+        if pluie:
+            if risque == "fort":
+                message = f"{icone} Oui, il risque de pleuvoir {periode} à {ville} ({description}"
+            elif risque == "possible":
+                message = f"{icone} Il pourrait pleuvoir {periode} à {ville} ({description}"
             else:
-                # En cas d'erreur HTTP, créer un message d'erreur
-                return f"Désolé, une erreur s'est produite lors de la récupération des informations météo. Veuillez réessayer plus tard."
-                
-        except Exception as e:
-            # En cas d'exception, retourner un message d'erreur générique
-            return "Désolé, une erreur s'est produite lors de la récupération des informations météo. Veuillez réessayer plus tard."
+                message = f"{icone} Non, il ne devrait pas pleuvoir {periode} à {ville} ({description}"
+            if probabilite is not None:
+                message += f", probabilité de pluie de {probabilite}%"
+            if resume["pluie"] > 0:
+                message += f", {resume['pluie']} mm attendus"
+            message += ")."
+        else:
+            message = f"{icone} {periode[0].upper()}{periode[1:]} à {ville} : {description}."
+            if risque != "faible" and probabilite is not None:
+                message += f" Probabilité de pluie : {probabilite}%."
+        
+        if resume["temperature_min"] is not None:
+            if resume["temperature_min"] == resume["temperature_max"]:
+                message += f" Température prévue : {resume['temperature_min']}°C."
+            else:
+                message += f" Températures entre {resume['temperature_min']}°C et {resume['temperature_max']}°C."
+        
+        if pluie and risque != "faible":
+            message += " N'oubliez pas votre parapluie ! 🌂"
+        return message
     
     def obtenir_meteo_ville(self, ville):
         """
@@ -284,108 +1093,368 @@ class MeteoService:
             dict: Dictionnaire avec informations météo complètes
         """
         try:
-            logger.info(f"Obtention de la météo pour la ville: {ville}")
-            
-            # Trouver les coordonnées de la ville
-            ville_info = None
-            
-            # Vérifier si la ville est dans notre cache
-            ville_lower = ville.lower()
-            villes_courantes = {
-                "paris": {"nom": "Paris", "pays": "France", "latitude": 48.8566, "longitude": 2.3522},
-                "marseille": {"nom": "Marseille", "pays": "France", "latitude": 43.2965, "longitude": 5.3698},
-                "lyon": {"nom": "Lyon", "pays": "France", "latitude": 45.7578, "longitude": 4.8320},
-                "toulouse": {"nom": "Toulouse", "pays": "France", "latitude": 43.6047, "longitude": 1.4442},
-                "nice": {"nom": "Nice", "pays": "France", "latitude": 43.7102, "longitude": 7.2620},
-                "nantes": {"nom": "Nantes", "pays": "France", "latitude": 47.2184, "longitude": -1.5536},
-                "strasbourg": {"nom": "Strasbourg", "pays": "France", "latitude": 48.5734, "longitude": 7.7521},
-                "montpellier": {"nom": "Montpellier", "pays": "France", "latitude": 43.6119, "longitude": 3.8772},
-                "bordeaux": {"nom": "Bordeaux", "pays": "France", "latitude": 44.8378, "longitude": -0.5792},
-                "lille": {"nom": "Lille", "pays": "France", "latitude": 50.6292, "longitude": 3.0573}
-            }
+            logger.debug(f"Obtention de la météo pour la ville: {ville}")
             
-            if ville_lower in villes_courantes:
-                ville_info = villes_courantes[ville_lower]
-            else:
-                # Essayer via l'API de géocodage
-                ville_info = self.rechercher_ville_api(ville)
-                
-                # Si toujours pas trouvé, utiliser Paris par défaut
-                if not ville_info:
-                    logger.warning(f"Ville non trouvée, utilisation de Paris par défaut")
-                    ville_info = villes_courantes["paris"]
-            
-            # Récupérer les coordonnées
-            lat = ville_info["latitude"]
-            lon = ville_info["longitude"]
-            
-            # Construire l'URL pour l'API Open-Meteo avec toutes les informations
-            # Version sécurisée qui fonctionne avec l'API actuelle
-            url = f"https://api.open-meteo.com/v1/forecast?latitude={lat}&longitude={lon}&current=temperature_2m,weather_code,relative_humidity_2m,apparent_temperature,wind_speed_10m&timezone=auto"
-            
-            # Faire la requête HTTP
-            response = requests.get(url)
-            logger.info(f"Statut de la réponse API météo: {response.status_code}")
-            
-            # Vérifier si la requête a réussi
-            if response.status_code == 200:
-                # Parser les données JSON
-                data = response.json()
-                logger.info(f"Données API météo reçues: {data.keys()}")
-                
-                # Extraire les informations actuelles
-                current = data.get("current", {})
-                
-                if current:
-                    # Créer un dictionnaire avec les informations formatées
-                    meteo_info = {
-                        "status": "success",
-                        "ville": ville_info.get("nom", ville),
-                        "pays": ville_info.get("pays", ""),
-                        "temperature": round(current.get("temperature_2m", 0)),
-                        "temperature_ressentie": round(current.get("apparent_temperature", 0)) if "apparent_temperature" in current else None,
-                        "humidite": current.get("relative_humidity_2m", 0) if "relative_humidity_2m" in current else None,
-                        "unite_humidite": "%",
-                        "vent": round(current.get("wind_speed_10m", 0)) if "wind_speed_10m" in current else None,
-                        "unite_vent": "km/h",
-                        "code": current.get("weather_code", 0),
-                        "est_jour": 1,  # Supposer qu'il fait jour par défaut
-                        "timestamp": datetime.now().strftime("%d %B %Y, %H:%M")
-                    }
-                    
-                    # Interpréter le code météo
-                    meteo_info["description"] = self.interpreter_code_meteo(meteo_info["code"])
-                    meteo_info["condition"] = meteo_info["description"]  # Pour compatibilité
-                    
-                    # Obtenir l'icône correspondante
-                    meteo_info["icone"] = self.obtenir_icone_meteo(meteo_info["code"])
-                    
-                    return meteo_info
-                else:
-                    logger.error(f"Données current non trouvées dans: {data}")
-                    return {
-                        "status": "error",
-                        "ville": ville,
-                        "temperature": 0,
-                        "condition": "Données météo indisponibles"
-                    }
-            else:
-                logger.error(f"Erreur HTTP lors de la requête météo: {response.status_code} - {response.text}")
-                return {
-                    "status": "error",
-                    "ville": ville,
-                    "temperature": 0,
-                    "condition": "Service météo temporairement indisponible"
-                }
+            # Index local, puis API de géocodage, puis faute de frappe, puis Paris par défaut
+            with Etape("geocodage"):
+                ville_info = self._localiser(ville) or self._ville_par_defaut()
+            
+            # Conditions actuelles (servies par le cache météo si possible)
+            current = self.obtenir_conditions(ville_info["latitude"], ville_info["longitude"])
+            return self._resultat_meteo_ville(ville, ville_info, current)
                 
         except Exception as e:
             logger.error(f"Erreur lors de l'obtention de la météo pour {ville}: {str(e)}")
-            return {
-                "status": "error",
-                "ville": ville,
-                "temperature": 0,
-                "condition": "Erreur du service météo"
-            }
+            return self._erreur_meteo_ville(ville, "Erreur du service météo")
+    
+    @staticmethod
+    def _ville_par_defaut():
+        """Ville utilisée quand une ville demandée reste introuvable."""
+        logger.warning(f"Ville non trouvée, utilisation de Paris par défaut")
+        return obtenir_index_villes().trouver("paris")
+    
+    @staticmethod
+    def _erreur_meteo_ville(ville, condition):
+        """Résultat d'erreur de obtenir_meteo_ville()."""
+        return {
+            "status": "error",
+            "ville": ville,
+            "temperature": 0,
+            "condition": condition
+        }
+    
+    def _resultat_meteo_ville(self, ville, ville_info, current):
+        """
+        Construit le résultat de obtenir_meteo_ville().
+        
+        Args:
+            ville (str): Nom de la ville demandée
+            ville_info (dict): Ville trouvée
+            current (dict): Conditions actuelles, ou None si le service a échoué
+            
+        Returns:
+            dict: Dictionnaire avec informations météo complètes, ou résultat d'erreur
+        """
+        if current is None:
+            return self._erreur_meteo_ville(ville, "Service météo temporairement indisponible")
+        if not current:
+            logger.error(f"Données current non trouvées pour {ville_info.get('nom', ville)}")
+            return self._erreur_meteo_ville(ville, "Données météo indisponibles")
+        
+        # Créer un dictionnaire avec les informations formatées
+        meteo_info = {
+            "status": "success",
+            "ville": ville_info.get("nom", ville),
+            "pays": ville_info.get("pays", ""),
+            "temperature": round(current.get("temperature_2m", 0)),
+            "temperature_ressentie": round(current.get("apparent_temperature", 0)) if "apparent_temperature" in current else None,
+            "humidite": current.get("relative_humidity_2m", 0) if "relative_humidity_2m" in current else None,
+            "unite_humidite": "%",
+            "vent": round(current.get("wind_speed_10m", 0)) if "wind_speed_10m" in current else None,
+            "unite_vent": "km/h",
+            "code": current.get("weather_code", 0),
+            "est_jour": 1,  # Supposer qu'il fait jour par défaut
+            "timestamp": datetime.now().strftime("%d %B %Y, %H:%M"),
+            "age_observation": current.get("age_observation")
+        }
+        
+        # Interpréter le code météo
+        meteo_info["description"] = self.interpreter_code_meteo(meteo_info["code"])
+        meteo_info["condition"] = meteo_info["description"]  # Pour compatibilité
+        
+        # Obtenir l'icône correspondante
+        meteo_info["icone"] = self.obtenir_icone_meteo(meteo_info["code"])
+        
+        return meteo_info
+    
+    def obtenir_meteo_villes(self, villes):
+        """
+        Obtient la météo de plusieurs villes avec le moins d'appels possible : les villes absentes
+        du cache météo sont demandées à Open-Meteo par lots de METEO_LOT_TAILLE coordonnées,
+        un appel par lot. Les villes inconnues de l'index sont géocodées en parallèle (au plus
+        METEO_GEOCODAGES_PARALLELES appels simultanés, un seul par nom).
+        
+        Args:
+            villes (list): Noms des villes
+            
+        Returns:
+            list: Un dictionnaire par ville, dans l'ordre demandé, de même forme que obtenir_meteo_ville()
+        """
+        resultats = [None] * len(villes)
+        villes_info = {}
+        with Etape("geocodage"):
+            inconnues = {}
+            for i, ville in enumerate(villes):
+                ville_info = obtenir_index_villes().trouver(ville)
+                if ville_info:
+                    villes_info[i] = ville_info
+                else:
+                    inconnues.setdefault(ville, []).append(i)
+            
+            for ville, (ville_info, erreur) in self._geocoder_villes(list(inconnues)).items():
+                for i in inconnues[ville]:
+                    if erreur is None:
+                        villes_info[i] = ville_info or obtenir_index_villes().corriger(ville) or self._ville_par_defaut()
+                    else:
+                        logger.error(f"Erreur lors de l'obtention de la météo pour {ville}: {str(erreur)}")
+                        resultats[i] = self._erreur_meteo_ville(ville, "Erreur du service météo")
+        
+        # Cache météo d'abord, puis un appel par lot de coordonnées manquantes
+        cles = {i: CacheMeteo.cle(ville_info["latitude"], ville_info["longitude"]) for i, ville_info in villes_info.items()}
+        conditions = {}
+        for cle in cles.values():
+            if cle not in conditions:
+                conditions[cle] = self._conditions_en_cache(cle)
+        manquantes = [cle for cle, valeur in conditions.items() if valeur is None]
+        for debut in range(0, len(manquantes), METEO_LOT_TAILLE):
+            conditions.update(self._conditions_lot(manquantes[debut:debut + METEO_LOT_TAILLE]))
+        
+        for i, ville_info in villes_info.items():
+            resultats[i] = self._resultat_meteo_ville(villes[i], ville_info, conditions[cles[i]])
+        return resultats
+    
+    def _geocoder_villes(self, noms):
+        """
+        Géocode plusieurs noms de ville via rechercher_ville_api (cache persistant et appels partagés),
+        en parallèle sur un petit groupe de threads.
+        
+        Returns:
+            dict: Nom -> (informations sur la ville ou None, exception levée ou None)
+        """
+        if len(noms) <= 1:
+            appels = {nom: None for nom in noms}
+        else:
+            if self._executeur_geocodage is None:
+                with self._verrou_rafraichissement:
+                    if self._executeur_geocodage is None:
+                        self._executeur_geocodage = ThreadPoolExecutor(max_workers=METEO_GEOCODAGES_PARALLELES,
+                                                                       thread_name_prefix="meteo-geocodage")
+            appels = {nom: self._executeur_geocodage.submit(self.rechercher_ville_api, nom) for nom in noms}
+        
+        resultats = {}
+        for nom, appel in appels.items():
+            try:
+                resultats[nom] = (self.rechercher_ville_api(nom) if appel is None else appel.result(), None)
+            except Exception as e:
+                resultats[nom] = (None, e)
+        return resultats
+    
+    def _conditions_lot(self, cles):
+        """
+        Télécharge les conditions d'un lot de coordonnées et les met en cache.
+        En cas d'échec, chaque clé reçoit sa dernière observation connue (ou None).
+        
+        Returns:
+            dict: Conditions par clé
+        """
+        try:
+            lot = self.telecharger_conditions_lot(cles)
+        except Exception as e:
+            logger.error(f"Erreur lors de la requête météo groupée ({len(cles)} villes): {str(e)}")
+            lot = None
+        if lot is None:
+            return {cle: self._derniere_observation(cle) for cle in cles}
+        return {cle: self._conserver_conditions(cle, conditions) for cle, conditions in zip(cles, lot)}
+    
+    def telecharger_conditions_lot(self, cles):
+        """
+        Interroge Open-Meteo pour les conditions actuelles de plusieurs coordonnées en un seul appel
+        (latitudes et longitudes séparées par des virgules), sans passer par le cache.
+        
+        Args:
+            cles (list): Coordonnées (latitude, longitude)
+            
+        Returns:
+            list: Conditions actuelles de chaque coordonnée, dans l'ordre,
+                ou None en cas d'erreur HTTP ou de disjoncteur ouvert
+        """
+        jeton = self.disjoncteur.autoriser()
+        if jeton is None:
+            return None
+        
+        params = self._params_conditions(",".join(str(latitude) for latitude, _ in cles),
+                                         ",".join(str(longitude) for _, longitude in cles))
+        debut = time.perf_counter()
+        try:
+            with Etape("meteo"):
+                response = self.client.get(self.base_url, params=params, service="meteo")
+        except BaseException:
+            # Toute sortie (y compris une annulation) rend le jeton : un appel d'essai ne reste jamais en suspens
+            self._echec_conditions(debut, jeton)
+            raise
+        
+        donnees = self._donnees_meteo(response, debut, jeton)
+        if donnees is None:
+            return None
+        # Open-Meteo retourne un objet pour une seule coordonnée, une liste sinon
+        if isinstance(donnees, dict):
+            donnees = [donnees]
+        if len(donnees) != len(cles):
+            ERREURS_AMONT.incrementer("meteo", "reponse")
+            logger.error(f"Réponse météo groupée incomplète: {len(donnees)} résultats pour {len(cles)} villes")
+            return None
+        return [self._conditions_lieu(donnee) for donnee in donnees]
+    
+    def telecharger_conditions(self, latitude, longitude):
+        """
+        Interroge Open-Meteo pour les conditions actuelles, sans passer par le cache.
+        L'appel n'est pas tenté quand le disjoncteur du service météo est ouvert.
+        
+        Args:
+            latitude (float): Latitude
+            longitude (float): Longitude
+            
+        Returns:
+            dict: Conditions actuelles (vide si la réponse n'en contient pas),
+                ou None en cas d'erreur HTTP ou de disjoncteur ouvert
+        """
+        jeton = self.disjoncteur.autoriser()
+        if jeton is None:
+            return None
+        
+        debut = time.perf_counter()
+        try:
+            with Etape("meteo"):
+                response = self.client.get(self.base_url, params=self._params_conditions(latitude, longitude),
+                                           service="meteo")
+        except BaseException:
+            # Toute sortie (y compris une annulation) rend le jeton : un appel d'essai ne reste jamais en suspens
+            self._echec_conditions(debut, jeton)
+            raise
+        return self._lire_conditions(response, debut, jeton)
+    
+    @staticmethod
+    def _params_conditions(latitude, longitude):
+        """Paramètres d'une demande de conditions actuelles (et de prévisions) à Open-Meteo."""
+        return {
+            "latitude": latitude,
+            "longitude": longitude,
+            "current": VARIABLES_ACTUELLES,
+            "hourly": VARIABLES_HORAIRES,
+            "daily": VARIABLES_QUOTIDIENNES,
+            "forecast_days": METEO_JOURS_PREVISION,
+            "timeformat": "unixtime",
+            "timezone": "auto"
+        }
+    
+    def _echec_conditions(self, debut, jeton):
+        """Note un appel météo resté sans réponse (commencé à `debut`, horloge perf_counter ; `jeton` du disjoncteur)."""
+        self.disjoncteur.enregistrer(False, time.perf_counter() - debut, jeton)
+        ERREURS_AMONT.incrementer("meteo", "exception")
+    
+    def _lire_conditions(self, response, debut, jeton):
+        """
+        Note le résultat d'un appel météo (commencé à `debut`, autorisé par `jeton`) et en extrait
+        les conditions actuelles.
+        
+        Returns:
+            dict: Conditions actuelles (vide si la réponse n'en contient pas), ou None en cas d'erreur HTTP
+        """
+        donnees = self._donnees_meteo(response, debut, jeton)
+        return None if donnees is None else self._conditions_lieu(donnees)
+    
+    @staticmethod
+    def _conditions_lieu(donnees):
+        """Conditions actuelles d'un lieu, avec ses prévisions (clé "previsions") si la réponse en contient."""
+        conditions = donnees.get("current", {})
+        previsions = PrevisionsLieu.depuis_reponse(donnees)
+        if conditions and previsions is not None:
+            conditions = dict(conditions, previsions=previsions)
+        return conditions
+    
+    def _donnees_meteo(self, response, debut, jeton):
+        """
+        Note le résultat d'un appel météo (commencé à `debut`, autorisé par `jeton`) et retourne
+        le JSON reçu, ou None en cas d'erreur HTTP.
+        """
+        self.disjoncteur.enregistrer(response.status_code not in STATUTS_REESSAYABLES, time.perf_counter() - debut,
+                                     jeton)
+        
+        if response.status_code != 200:
+            ERREURS_AMONT.incrementer("meteo", "http")
+            logger.error(f"Erreur HTTP lors de la requête météo: {response.status_code} - {response.text}")
+            return None
+        return response.json()
+    
+    def obtenir_conditions(self, latitude, longitude):
+        """
+        Retourne les conditions actuelles pour des coordonnées, depuis le cache si possible.
+        Une entrée périmée est servie telle quelle et rafraîchie en arrière-plan.
+        Les demandes simultanées de mêmes coordonnées absentes du cache partagent un seul appel.
+        Si le service météo échoue (ou si son disjoncteur est ouvert), la dernière observation
+        connue est servie, quel que soit son âge, avec la clé "age_observation" (en secondes).
+        
+        Args:
+            latitude (float): Latitude
+            longitude (float): Longitude
+            
+        Returns:
+            dict: Conditions actuelles, ou None si le service échoue et qu'aucune observation n'est connue
+        """
+        cle = CacheMeteo.cle(latitude, longitude)
+        conditions = self._conditions_en_cache(cle)
+        if conditions is not None:
+            return conditions
+        
+        try:
+            conditions = self.appels_meteo.executer(cle, self.telecharger_conditions, *cle)
+        except Exception:
+            conditions = self._derniere_observation(cle)
+            if conditions is None:
+                raise
+            return conditions
+        return self._conserver_conditions(cle, conditions)
+    
+    def _conditions_en_cache(self, cle):
+        """Conditions en cache d'une clé (rafraîchies en arrière-plan si périmées), ou None."""
+        self.planificateur.observer(cle)
+        entree = self.cache.obtenir(cle)
+        if entree is None:
+            return None
+        conditions, age = entree
+        if age >= self.cache.ttl:
+            self._rafraichir_en_arriere_plan(cle)
+        return conditions
+    
+    def _conserver_conditions(self, cle, conditions):
+        """Met en cache des conditions téléchargées ; si le téléchargement a échoué (None), sert la dernière observation."""
+        if conditions is None:
+            return self._derniere_observation(cle)
+        if conditions:
+            self.cache.ajouter(cle, conditions)
+        return conditions
+    
+    def _derniere_observation(self, cle):
+        """Mode dégradé : dernière observation connue pour une clé, avec son âge, ou None."""
+        entree = self.cache.dernier(cle)
+        if entree is None:
+            return None
+        conditions, age = entree
+        logger.warning(f"Service météo indisponible, observation de {cle} servie depuis le cache (âge {age:.0f} s)")
+        return dict(conditions, age_observation=round(age))
+    
+    def _rafraichir_en_arriere_plan(self, cle):
+        """Programme le rafraîchissement d'une entrée périmée (une seule fois par clé à la fois)."""
+        with self._verrou_rafraichissement:
+            if cle in self._rafraichissements:
+                return
+            self._rafraichissements.add(cle)
+            if self._executeur is None:
+                # Créé à la première utilisation, donc après le fork des workers
+                self._executeur = ThreadPoolExecutor(max_workers=2, thread_name_prefix="meteo-rafraichissement")
+        self._executeur.submit(self._rafraichir, cle)
+    
+    def _rafraichir(self, cle):
+        """Télécharge à nouveau les conditions d'une clé ; en cas d'échec, l'entrée périmée est conservée."""
+        try:
+            conditions = self.appels_meteo.executer(cle, self.telecharger_conditions, *cle)
+            if conditions:
+                self.cache.ajouter(cle, conditions)
+        except Exception as e:
+            logger.warning(f"Échec du rafraîchissement de la météo pour {cle}: {str(e)}")
+        finally:
+            with self._verrou_rafraichissement:
+                self._rafraichissements.discard(cle)
     
     def interpreter_code_meteo(self, code):
         """
@@ -523,9 +1592,25 @@ class MeteoService:
                 message += " La température est agréable, mais peut-être pas encore idéale pour le maillot de bain ! 🌞"
             else:
                 message += " Il ne fait pas encore assez chaud pour sortir le maillot de bain ! 🧥"
+        
+        # Mode dégradé : préciser que l'observation vient du cache
+        if meteo_info.get('age_observation') is not None:
+            message += self.formater_note_observation(meteo_info['age_observation'])
                 
         return message
     
+    def formater_note_observation(self, age):
+        """Note ajoutée à une réponse tirée d'une ancienne observation (service météo indisponible)."""
+        return f" (Observation d'il y a {self.formater_age(age)} : le service météo est momentanément indisponible.)"
+    
+    @staticmethod
+    def formater_age(secondes):
+        """Formate l'âge d'une observation ("12 min", "3 h")."""
+        minutes = max(1, round(secondes / 60))
+        if minutes < 90:
+            return f"{minutes} min"
+        return f"{round(minutes / 60)} h"
+    
     def traduire_date(self, date_en):
         """
         Traduit une date en anglais vers le français.
@@ -554,4 +1639,178 @@ class MeteoService:
         for i, mois in enumerate(mois_en):
             date_fr = date_fr.replace(mois, mois_fr[i])
             
-        return date_fr 
\ No newline at end of file
+        return date_fr
+
+
+class MeteoServiceAsync:
+    """
+    Variante asynchrone de MeteoService, pour un serveur asyncio : les appels à Open-Meteo
+    ne bloquent pas la boucle d'événements, et des centaines de recherches peuvent être en
+    cours dans un même processus. L'extraction de la ville, les caches, le disjoncteur et la
+    mise en forme sont ceux du service synchrone enveloppé ; seul le transport change.
+    """
+    
+    def __init__(self, service=None):
+        """
+        Initialise le service météo asynchrone.
+        
+        Args:
+            service (MeteoService): Service synchrone dont les caches et le disjoncteur sont partagés
+                (par défaut, un nouveau service)
+        """
+        self.service = service or MeteoService()
+        self.client = ClientHTTPAsync(self.service.client)
+    
+    async def rechercher_ville_api(self, nom_ville):
+        """
+        Recherche une ville en utilisant l'API de géocodage (voir MeteoService.rechercher_ville_api).
+        
+        Args:
+            nom_ville (str): Le nom de la ville à rechercher
+            
+        Returns:
+            dict: Informations sur la ville trouvée ou None si aucune correspondance
+        """
+        service = self.service
+        cle = CacheGeocodage.cle(nom_ville)
+        if not cle:
+            return None
+        # Lecture SQLite locale : assez brève pour rester dans la boucle d'événements
+        trouve, ville = service.cache_geocodage.obtenir(cle)
+        if trouve:
+            return ville
+        return await service.appels_geocodage.executer_async(cle, self._geocoder, cle, nom_ville)
+    
+    async def _geocoder(self, cle, nom_ville):
+        """Interroge l'API de géocodage (voir rechercher_ville_api) ; None en cas d'erreur."""
+        service = self.service
+        try:
+            response = await self.client.get(service.geocoding_url, params=service._params_geocodage(nom_ville),
+                                             service="geocodage")
+            return service._lire_geocodage(cle, response)
+        except Exception as e:
+            ERREURS_AMONT.incrementer("geocodage", "exception")
+            logger.error(f"Erreur lors de la recherche de ville via API: {e}")
+            return None
+    
+    async def trouver_ville(self, texte):
+        """
+        Trouve une ville dans le texte et renvoie ses coordonnées.
+        
+        Args:
+            texte (str): Le texte contenant potentiellement un nom de ville
+            
+        Returns:
+            dict: Informations sur la ville trouvée (nom, coordonnées, etc.)
+        """
+        try:
+            nom_ville, ville_connue = self.service._ville_locale(texte)
+            if ville_connue:
+                return ville_connue
+            return (await self.rechercher_ville_api(nom_ville) or obtenir_index_villes().corriger(nom_ville)
+                    or obtenir_index_villes().trouver("paris"))
+        except Exception as e:
+            return dict(VILLE_SECOURS)
+    
+    async def obtenir_meteo(self, texte):
+        """
+        Obtient les informations météo pour une ville mentionnée dans le texte.
+        
+        Args:
+            texte (str): Texte contenant potentiellement un nom de ville
+            
+        Returns:
+            str: Message formaté contenant les informations météo
+        """
+        try:
+            ville_info = await self.trouver_ville(texte)
+            current = await self.obtenir_conditions(ville_info["latitude"], ville_info["longitude"])
+            return self.service._message_meteo(ville_info, current)
+        except Exception as e:
+            return MESSAGE_ERREUR_METEO
+    
+    async def obtenir_prevision(self, texte, periode, pluie=False):
+        """
+        Répond à une question sur la météo à venir (voir MeteoService.obtenir_prevision).
+        
+        Returns:
+            str: Message formaté, ou None si les prévisions sont indisponibles
+        """
+        try:
+            ville_info = await self.trouver_ville(texte)
+            conditions = await self.obtenir_conditions(ville_info["latitude"], ville_info["longitude"])
+            return self.service._message_prevision(ville_info, conditions, periode, pluie)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'obtention des prévisions: {str(e)}")
+            return None
+    
+    async def obtenir_meteo_ville(self, ville):
+        """
+        Obtient les informations météo pour une ville spécifiée (voir MeteoService.obtenir_meteo_ville).
+        
+        Args:
+            ville (str): Nom de la ville dont on veut la météo
+            
+        Returns:
+            dict: Dictionnaire avec informations météo complètes
+        """
+        service = self.service
+        try:
+            index = obtenir_index_villes()
+            ville_info = (index.trouver(ville) or await self.rechercher_ville_api(ville) or index.corriger(ville)
+                          or service._ville_par_defaut())
+            current = await self.obtenir_conditions(ville_info["latitude"], ville_info["longitude"])
+            return service._resultat_meteo_ville(ville, ville_info, current)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'obtention de la météo pour {ville}: {str(e)}")
+            return service._erreur_meteo_ville(ville, "Erreur du service météo")
+    
+    async def telecharger_conditions(self, latitude, longitude):
+        """
+        Interroge Open-Meteo pour les conditions actuelles, sans passer par le cache.
+        
+        Returns:
+            dict: Conditions actuelles, ou None en cas d'erreur HTTP ou de disjoncteur ouvert
+        """
+        service = self.service
+        jeton = service.disjoncteur.autoriser()
+        if jeton is None:
+            return None
+        
+        debut = time.perf_counter()
+        try:
+            response = await self.client.get(service.base_url, params=service._params_conditions(latitude, longitude),
+                                             service="meteo")
+        except BaseException:
+            # Tâche annulée ou délai dépassé (CancelledError) : l'appel d'essai doit être rendu au disjoncteur
+            service._echec_conditions(debut, jeton)
+            raise
+        return service._lire_conditions(response, debut, jeton)
+    
+    async def obtenir_conditions(self, latitude, longitude):
+        """
+        Retourne les conditions actuelles pour des coordonnées, depuis le cache partagé si possible
+        (voir MeteoService.obtenir_conditions). Les entrées périmées sont rafraîchies par les
+        threads d'arrière-plan du service synchrone.
+        
+        Returns:
+            dict: Conditions actuelles, ou None si le service échoue et qu'aucune observation n'est connue
+        """
+        service = self.service
+        cle = CacheMeteo.cle(latitude, longitude)
+        conditions = service._conditions_en_cache(cle)
+        if conditions is not None:
+            return conditions
+        
+        try:
+            conditions = await service.appels_meteo.executer_async(cle, self.telecharger_conditions, *cle)
+        except Exception:
+            conditions = service._derniere_observation(cle)
+            if conditions is None:
+                raise
+            return conditions
+        return service._conserver_conditions(cle, conditions)
+    
+    async def fermer(self):
+        """Ferme les connexions de la boucle d'événements courante (à l'arrêt du serveur)."""
+        await self.client.fermer()
@@ -0,0 +1,211 @@
+"""
+Configuration de la journalisation de l'agent Cindy.
+Les enregistrements sont déposés dans une file en mémoire et écrits par un thread dédié,
+pour que les entrées/sorties des journaux ne ralentissent pas le traitement des requêtes.
+"""
+
+import os
+import json
+import queue
+import random
+import atexit
+import logging
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+
+# Attributs standards d'un LogRecord, exclus des champs supplémentaires du format JSON
+ATTRIBUTS_STANDARDS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None)).keys()) | {"message", "asctime"}
+
+FORMAT_TEXTE = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_configuration = None
+_verrou_configuration = threading.Lock()
+
+
+class FormateurJSON(logging.Formatter):
+    """
+    Formate chaque enregistrement sur une ligne JSON.
+    Les champs passés via `extra=` sont ajoutés tels quels.
+    """
+
+    def format(self, record):
+        donnees = {
+            "horodatage": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "niveau": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "processus": record.process
+        }
+        for cle, valeur in record.__dict__.items():
+            if cle not in ATTRIBUTS_STANDARDS and not cle.startswith("_"):
+                donnees[cle] = valeur
+        if record.exc_info:
+            donnees["exception"] = self.formatException(record.exc_info)
+        return json.dumps(donnees, ensure_ascii=False, default=str)
+
+
+class FiltreEchantillonnage(logging.Filter):
+    """
+    Ne conserve qu'une fraction des messages DEBUG/INFO d'un logger.
+    Les avertissements et les erreurs sont toujours conservés.
+    """
+
+    def __init__(self, taux):
+        """
+        Args:
+            taux (float): Fraction des messages conservés (entre 0 et 1)
+        """
+        super().__init__()
+        self.taux = taux
+        self.ignores = 0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or self.taux >= 1 or random.random() < self.taux:
+            return True
+        self.ignores += 1
+        return False
+
+
+class GestionnaireFile(QueueHandler):
+    """
+    Dépose les enregistrements dans une file lue par un thread d'écriture.
+    Quand la file dépasse `seuil_charge`, les messages DEBUG/INFO sont abandonnés
+    pour protéger la latence des requêtes ; les avertissements et erreurs passent toujours.
+    """
+
+    def __init__(self, file, seuil_charge):
+        super().__init__(file)
+        self.seuil_charge = seuil_charge
+        self.ignores = 0
+
+    def emit(self, record):
+        if record.levelno < logging.WARNING and self.seuil_charge and self.queue.qsize() >= self.seuil_charge:
+            self.ignores += 1
+            return
+        super().emit(record)
+
+
+class ConfigurationJournalisation:
+    """État de la journalisation configurée : file, thread d'écriture et filtres."""
+
+    def __init__(self, gestionnaire, ecouteur, filtres):
+        self.gestionnaire = gestionnaire
+        self.ecouteur = ecouteur
+        self.filtres = filtres
+        self.pid = os.getpid()
+
+    def verifier_processus(self):
+        """Relance le thread d'écriture dans un processus issu d'un fork (workers gunicorn)."""
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.ecouteur._thread = None
+            self.ecouteur.start()
+
+    def statistiques(self):
+        """
+        Returns:
+            dict: Messages en attente et messages abandonnés (charge, échantillonnage)
+        """
+        return {
+            "en_attente": self.gestionnaire.queue.qsize(),
+            "ignores_charge": self.gestionnaire.ignores,
+            "ignores_echantillonnage": sum(filtre.ignores for filtre in self.filtres.values())
+        }
+
+    def arreter(self):
+        """Vide la file et arrête le thread d'écriture."""
+        if self.ecouteur._thread is not None:
+            self.ecouteur.stop()
+
+
+def lire_echantillonnage(valeur):
+    """
+    Lit une configuration d'échantillonnage de la forme "nlp_engine=0.1,assistant_ia.agent=0.5".
+
+    Returns:
+        dict: nom du logger -> fraction des messages conservés
+    """
+    taux = {}
+    for element in (valeur or "").split(","):
+        if "=" in element:
+            nom, fraction = element.split("=", 1)
+            taux[nom.strip()] = min(max(float(fraction), 0.0), 1.0)
+    return taux
+
+
+def creer_gestionnaire_fichier(fichier, rotation, taille_max, sauvegardes):
+    """Crée le gestionnaire de fichier avec rotation par taille ou par temps ("taille" ou "temps")."""
+    if rotation == "temps":
+        return TimedRotatingFileHandler(fichier, when="midnight", backupCount=sauvegardes, encoding="utf-8")
+    return RotatingFileHandler(fichier, maxBytes=taille_max, backupCount=sauvegardes, encoding="utf-8")
+
+
+def configurer_journalisation(fichier=None, niveau=None, format_journal=None, echantillonnage=None,
+                              seuil_charge=None, rotation=None, taille_max=None, sauvegardes=None):
+    """
+    Configure une seule fois la journalisation du processus.
+    Les paramètres non fournis sont lus dans les variables d'environnement CINDY_LOG_*.
+
+    Args:
+        fichier (str): Fichier de journal (CINDY_LOG_FICHIER, "assistant.log" par défaut)
+        niveau (str): Niveau minimal (CINDY_LOG_NIVEAU, "INFO" par défaut)
+        format_journal (str): "json" ou "texte" (CINDY_LOG_FORMAT, "json" par défaut)
+        echantillonnage (str): Taux par logger, ex. "nlp_engine=0.1" (CINDY_LOG_ECHANTILLONNAGE)
+        seuil_charge (int): Taille de file au-delà de laquelle DEBUG/INFO sont abandonnés
+            (CINDY_LOG_SEUIL_CHARGE, 1000 par défaut, 0 pour désactiver)
+        rotation (str): "taille" ou "temps" (CINDY_LOG_ROTATION, "taille" par défaut)
+        taille_max (int): Taille maximale d'un fichier en octets (CINDY_LOG_TAILLE_MAX, 10 Mo par défaut)
+        sauvegardes (int): Nombre d'anciens fichiers conservés (CINDY_LOG_SAUVEGARDES, 5 par défaut)
+
+    Returns:
+        ConfigurationJournalisation: La configuration active
+    """
+    global _configuration
+    with _verrou_configuration:
+        if _configuration is not None:
+            _configuration.verifier_processus()
+            return _configuration
+
+        env = os.environ.get
+        fichier = fichier or env("CINDY_LOG_FICHIER", "assistant.log")
+        niveau = (niveau or env("CINDY_LOG_NIVEAU", "INFO")).upper()
+        format_journal = format_journal or env("CINDY_LOG_FORMAT", "json")
+        echantillonnage = lire_echantillonnage(echantillonnage if echantillonnage is not None else env("CINDY_LOG_ECHANTILLONNAGE", ""))
+        seuil_charge = int(seuil_charge if seuil_charge is not None else env("CINDY_LOG_SEUIL_CHARGE", 1000))
+        rotation = rotation or env("CINDY_LOG_ROTATION", "taille")
+        taille_max = int(taille_max or env("CINDY_LOG_TAILLE_MAX", 10 * 1024 * 1024))
+        sauvegardes = int(sauvegardes if sauvegardes is not None else env("CINDY_LOG_SAUVEGARDES", 5))
+
+        formateur = FormateurJSON() if format_journal == "json" else logging.Formatter(FORMAT_TEXTE)
+        sorties = [creer_gestionnaire_fichier(fichier, rotation, taille_max, sauvegardes), logging.StreamHandler()]
+        for sortie in sorties:
+            sortie.setFormatter(formateur)
+
+        file = queue.Queue()
+        gestionnaire = GestionnaireFile(file, seuil_charge)
+        ecouteur = QueueListener(file, *sorties, respect_handler_level=True)
+
+        racine = logging.getLogger()
+        for ancien in list(racine.handlers):
+            racine.removeHandler(ancien)
+        racine.addHandler(gestionnaire)
+        racine.setLevel(niveau)
+
+        filtres = {}
+        for nom, taux in echantillonnage.items():
+            filtre = FiltreEchantillonnage(taux)
+            logging.getLogger(nom).addFilter(filtre)
+            filtres[nom] = filtre
+
+        ecouteur.start()
+        _configuration = ConfigurationJournalisation(gestionnaire, ecouteur, filtres)
+        atexit.register(_configuration.arreter)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=_configuration.verifier_processus)
+        return _configuration
+
+
+def obtenir_configuration():
+    """Retourne la configuration active, ou None si configurer_journalisation() n'a pas été appelée."""
+    return _configuration
@@ -0,0 +1,248 @@
+"""
+Métriques de l'agent Cindy au format texte de Prometheus.
+Les durées des étapes d'une question sont notées dans une trace propre au thread,
+puis ajoutées en une fois aux histogrammes quand l'intention est connue.
+Une observation ne coûte qu'une recherche dichotomique ; le texte n'est produit qu'à la lecture de /metrics.
+"""
+
+import os
+import time
+import threading
+from bisect import bisect_left
+
+# Bornes des histogrammes de durée, en secondes
+BORNES_DUREE = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Les traces peuvent être désactivées (CINDY_METRIQUES=0) ; les compteurs restent actifs
+METRIQUES_ACTIVES = os.environ.get("CINDY_METRIQUES", "1") != "0"
+
+_traces = threading.local()
+_instruments = []
+_caches = {}
+
+
+def _formater_etiquettes(noms, valeurs, supplement=""):
+    """Formate les étiquettes d'une série : {etape="intention",intention="meteo"}."""
+    paires = [f'{nom}="{str(valeur)}"' for nom, valeur in zip(noms, valeurs)]
+    if supplement:
+        paires.append(supplement)
+    return "{" + ",".join(paires) + "}" if paires else ""
+
+
+def _formater_valeur(valeur):
+    """Formate une valeur numérique (entiers sans décimales)."""
+    if isinstance(valeur, float) and valeur.is_integer():
+        return str(int(valeur))
+    return repr(valeur) if isinstance(valeur, float) else str(valeur)
+
+
+class Compteur:
+    """Compteur monotone, éventuellement ventilé par étiquettes."""
+
+    type_metrique = "counter"
+
+    def __init__(self, nom, aide, etiquettes=()):
+        """
+        Args:
+            nom (str): Nom de la métrique (suffixe _total compris)
+            aide (str): Description affichée dans la ligne # HELP
+            etiquettes (tuple): Noms des étiquettes
+        """
+        self.nom = nom
+        self.aide = aide
+        self.etiquettes = tuple(etiquettes)
+        self.valeurs = {}
+        self.verrou = threading.Lock()
+        _instruments.append(self)
+
+    def incrementer(self, *valeurs_etiquettes, quantite=1):
+        """Ajoute `quantite` à la série désignée par les valeurs d'étiquettes."""
+        with self.verrou:
+            self.valeurs[valeurs_etiquettes] = self.valeurs.get(valeurs_etiquettes, 0) + quantite
+
+    def valeur(self, *valeurs_etiquettes):
+        """Retourne la valeur actuelle d'une série (0 si elle n'existe pas)."""
+        return self.valeurs.get(valeurs_etiquettes, 0)
+
+    def exposer(self):
+        """Produit les lignes Prometheus du compteur."""
+        with self.verrou:
+            series = sorted(self.valeurs.items())
+        lignes = [f"# HELP {self.nom} {self.aide}", f"# TYPE {self.nom} {self.type_metrique}"]
+        for valeurs_etiquettes, valeur in series:
+            lignes.append(f"{self.nom}{_formater_etiquettes(self.etiquettes, valeurs_etiquettes)} {_formater_valeur(valeur)}")
+        return lignes
+
+
+class Jauge(Compteur):
+    """Valeur instantanée (état, taille...), éventuellement ventilée par étiquettes."""
+
+    type_metrique = "gauge"
+
+    def definir(self, valeur, *valeurs_etiquettes):
+        """Remplace la valeur de la série désignée par les valeurs d'étiquettes."""
+        with self.verrou:
+            self.valeurs[valeurs_etiquettes] = valeur
+
+
+class Histogramme:
+    """Histogramme à bornes fixes, éventuellement ventilé par étiquettes."""
+
+    def __init__(self, nom, aide, etiquettes=(), bornes=BORNES_DUREE):
+        """
+        Args:
+            nom (str): Nom de la métrique
+            aide (str): Description affichée dans la ligne # HELP
+            etiquettes (tuple): Noms des étiquettes
+            bornes (tuple): Bornes supérieures des intervalles, triées
+        """
+        self.nom = nom
+        self.aide = aide
+        self.etiquettes = tuple(etiquettes)
+        self.bornes = tuple(bornes)
+        # valeurs d'étiquettes -> [comptes par intervalle (+Inf en dernier), somme, nombre]
+        self.series = {}
+        self.verrou = threading.Lock()
+        _instruments.append(self)
+
+    def observer(self, valeur, *valeurs_etiquettes):
+        """Ajoute une observation à la série désignée par les valeurs d'étiquettes."""
+        indice = bisect_left(self.bornes, valeur)
+        with self.verrou:
+            serie = self.series.get(valeurs_etiquettes)
+            if serie is None:
+                serie = self.series[valeurs_etiquettes] = [[0] * (len(self.bornes) + 1), 0.0, 0]
+            serie[0][indice] += 1
+            serie[1] += valeur
+            serie[2] += 1
+
+    def exposer(self):
+        """Produit les lignes Prometheus de l'histogramme (comptes cumulés par borne)."""
+        with self.verrou:
+            series = sorted((cle, (list(comptes), somme, nombre)) for cle, (comptes, somme, nombre) in self.series.items())
+        lignes = [f"# HELP {self.nom} {self.aide}", f"# TYPE {self.nom} histogram"]
+        for valeurs_etiquettes, (comptes, somme, nombre) in series:
+            cumul = 0
+            for borne, compte in zip(self.bornes + ("+Inf",), comptes):
+                cumul += compte
+                le = f'le="{borne}"'
+                lignes.append(f"{self.nom}_bucket{_formater_etiquettes(self.etiquettes, valeurs_etiquettes, le)} {cumul}")
+            etiquettes = _formater_etiquettes(self.etiquettes, valeurs_etiquettes)
+            lignes.append(f"{self.nom}_sum{etiquettes} {somme!r}")
+            lignes.append(f"{self.nom}_count{etiquettes} {nombre}")
+        return lignes
+
+
+# Instruments partagés par les modules de l'agent
+DUREE_ETAPES = Histogramme(
+    "cindy_etape_duree_secondes", "Durée de chaque étape du traitement d'une question, par intention",
+    ("etape", "intention")
+)
+DUREE_QUESTIONS = Histogramme(
+    "cindy_question_duree_secondes", "Durée totale du traitement d'une question par l'agent, par intention",
+    ("intention",)
+)
+ERREURS_AMONT = Compteur(
+    "cindy_erreurs_amont_total", "Erreurs des services externes (géocodage, météo), par type",
+    ("service", "type")
+)
+
+
+class Etape:
+    """
+    Mesure la durée d'une étape et la note dans la trace de la question en cours.
+    Sans trace active (traitement par lot, métriques désactivées), ne mesure rien.
+
+    Exemple :
+        with Etape("geocodage"):
+            ville = trouver_ville(texte)
+    """
+
+    __slots__ = ("nom", "trace", "debut")
+
+    def __init__(self, nom):
+        self.nom = nom
+
+    def __enter__(self):
+        self.trace = getattr(_traces, "trace", None)
+        if self.trace is not None:
+            self.debut = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.trace is not None:
+            self.trace.append((self.nom, time.perf_counter() - self.debut))
+        return False
+
+
+def demarrer_trace():
+    """Ouvre la trace des étapes de la question traitée par le thread courant."""
+    if METRIQUES_ACTIVES:
+        _traces.trace = []
+        _traces.debut = time.perf_counter()
+
+
+def terminer_trace(intention):
+    """
+    Ferme la trace du thread courant et l'ajoute aux histogrammes de l'intention.
+
+    Args:
+        intention (str): L'intention finalement retenue pour la question
+    """
+    trace = getattr(_traces, "trace", None)
+    if trace is None:
+        return
+    DUREE_QUESTIONS.observer(time.perf_counter() - _traces.debut, intention)
+    for nom, duree in trace:
+        DUREE_ETAPES.observer(duree, nom, intention)
+    _traces.trace = None
+
+
+def enregistrer_cache(nom, statistiques):
+    """
+    Expose les statistiques d'un cache (succès, échecs, taille) sur /metrics.
+
+    Args:
+        nom (str): Nom du cache (valeur de l'étiquette "cache")
+        statistiques (callable): Fonction retournant un dict avec au moins "succes", "echecs" et "taille"
+    """
+    _caches[nom] = statistiques
+
+
+def _exposer_caches():
+    """Produit les lignes Prometheus des caches enregistrés, lues au moment de l'exposition."""
+    familles = (
+        ("cindy_cache_succes_total", "counter", "Requêtes servies par le cache", "succes"),
+        ("cindy_cache_echecs_total", "counter", "Requêtes absentes du cache", "echecs"),
+        ("cindy_cache_taux_succes", "gauge", "Part des requêtes servies par le cache", "taux_succes"),
+        ("cindy_cache_evictions_total", "counter", "Entrées retirées du cache faute de place", "evictions"),
+        ("cindy_cache_taille", "gauge", "Nombre d'entrées dans le cache", "taille"),
+    )
+    statistiques = {}
+    for nom, fonction in sorted(_caches.items()):
+        stats = dict(fonction())
+        total = stats.get("succes", 0) + stats.get("echecs", 0)
+        stats.setdefault("taux_succes", stats.get("succes", 0) / total if total else 0.0)
+        statistiques[nom] = stats
+
+    lignes = []
+    for metrique, type_metrique, aide, cle in familles:
+        lignes.extend([f"# HELP {metrique} {aide}", f"# TYPE {metrique} {type_metrique}"])
+        for nom, stats in statistiques.items():
+            if cle in stats:
+                lignes.append(f'{metrique}{{cache="{nom}"}} {_formater_valeur(stats[cle])}')
+    return lignes
+
+
+def exposer():
+    """
+    Retourne toutes les métriques au format texte de Prometheus (version 0.0.4).
+
+    Returns:
+        str: Le contenu de la réponse /metrics
+    """
+    lignes = []
+    for instrument in _instruments:
+        lignes.extend(instrument.exposer())
+    lignes.extend(_exposer_caches())
+    return "\n".join(lignes) + "\n"
@@ -3,503 +3,722 @@ Module de traitement du langage naturel pour l'agent Cindy.
 Ce module permet d'analyser les questions des utilisateurs et de générer des réponses appropriées.
 """
 
+import os
 import re
+import json
+import time
 import random
 import logging
+import threading
+from collections import OrderedDict
+from itertools import islice
 from datetime import datetime
-from external_services import MeteoService
-
-# Configuration du logger
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("nlp_engine.log"),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger("nlp_engine")
+from external_services import (MeteoService, PERIODE_SOIR, PERIODE_DEMAIN, PERIODE_APRES_DEMAIN,
+                               PERIODE_PROCHAINES_HEURES)
+from villes import EXPRESSIONS_HORS_LIEU, obtenir_index_villes
+from normalisation import QuestionNormalisee, retirer_accents
+from metriques import Etape, enregistrer_cache
 
-# Initialisation du service météo
-meteo_service = MeteoService()
+# Configuration du logger (les sorties sont configurées par journalisation.py)
+logger = logging.getLogger("nlp_engine")
 
-# Importer le module centralisé des réponses
+# Importer le module centralisé des réponses (sans effet de bord : les réponses sont compilées à la première utilisation)
 try:
     import reponses as reponses_module
     has_reponses_module = True
-    logger.info("Module de réponses centralisées importé avec succès")
 except ImportError:
+    reponses_module = None
     has_reponses_module = False
-    logger.warning("Module de réponses centralisées non trouvé, création d'un module minimal")
-    
-    # Créer un module minimal si nécessaire
-    try:
-        with open('reponses.py', 'w', encoding='utf-8') as f:
-            f.write('''"""
-Module centralisé pour les réponses de l'agent Cindy.
-Ce fichier regroupe toutes les réponses possibles pour éviter les duplications
-et assurer la cohérence.
-"""
 
-def obtenir_reponses(nom_agent="Cindy"):
-    """
-    Génère un dictionnaire de réponses en intégrant le nom de l'agent.
-    """
-    return {
-        "salutation": [f"Bonjour ! Je suis {nom_agent}, votre assistant. Comment puis-je vous aider ?"],
-        "meteo": ["Je vais consulter la météo pour vous."],
-        "heure": ["Il est actuellement [HEURE]."],
-        "date": ["Nous sommes le [DATE]."],
-        "bien_etre": ["Je vais très bien, merci ! Et vous, comment allez-vous ?"],
-        "identite": [f"Je suis {nom_agent}, votre assistant IA. Je peux vous aider avec la météo, l'heure et bien d'autres choses !"],
-        "createur": ["Ma créatrice est Cindy Singer, une experte en intelligence artificielle travaillant chez Digital Factory."],
-        "fonctionnement": ["Mon fonctionnement repose sur l'analyse de votre texte pour en extraire le sens et l'intention."],
-        "inconnu": ["Je ne comprends pas votre question. Pouvez-vous reformuler ?"]
-    }
-
-def obtenir_suggestions(intention="inconnu"):
-    """
-    Fournit des suggestions de questions basées sur l'intention détectée.
-    """
-    suggestions = {
-        "salutation": ["Quelle heure est-il ?", "Quelle est la météo à Paris ?", "Comment vas-tu ?"],
-        "meteo": ["Quel temps fait-il à Lyon ?", "Quelle heure est-il ?", "Qui t'a créé ?"],
-        "heure": ["Quelle est la météo à Paris ?", "Comment vas-tu ?", "Qui es-tu ?"],
-        "bien_etre": ["Quelle heure est-il ?", "Raconte-moi une blague", "Quel temps fait-il à Paris ?"],
-        "identite": ["Qui t'a créé ?", "Comment fonctionnes-tu ?", "Quelle est la météo à Paris ?"],
-        "createur": ["Comment fonctionnes-tu ?", "Quelle est la météo à Paris ?", "Raconte-moi une blague"],
-        "fonctionnement": ["Qui t'a créé ?", "Quelle est la météo à Paris ?", "Raconte-moi une blague"],
-        "inconnu": ["Quelle heure est-il ?", "Quelle est la météo à Paris ?", "Comment vas-tu ?"]
-    }
-    
-    return suggestions.get(intention, suggestions["inconnu"])
-''')
-        import reponses as reponses_module
-        has_reponses_module = True
-        logger.info("Module de réponses centralisées créé et importé avec succès")
-    except Exception as e:
-        logger.error(f"Erreur lors de la création du module de réponses: {str(e)}")
-        has_reponses_module = False
+# Service météo, créé à la première question météo
+_meteo_service = None
+_verrou_meteo_service = threading.Lock()
 
-def determiner_intention(question):
+# Motifs d'extraction de la ville pour les questions météo
+VILLES_PATTERNS = [
+    re.compile(r"\b(à|a|pour|dans|sur|en|de|au)\s+([A-Za-zÀ-ÿ]+(?:[-\s][A-Za-zÀ-ÿ]+)*)\b"),
+    re.compile(r"\bà\s+([A-Za-zÀ-ÿ]+(?:[-\s][A-Za-zÀ-ÿ]+)*)\s*\?"),  # Capture "à Paris ?"
+    re.compile(r"\bpleut.*?\b(à|a|en|au|aux)\s+([A-Za-zÀ-ÿ]+(?:[-\s][A-Za-zÀ-ÿ]+)*)\b"),  # "pleut-il à Paris"
+    re.compile(r"\bfait-il\s+(?:beau|chaud|froid).*?\b(à|a|en|au|aux)\s+([A-Za-zÀ-ÿ]+(?:[-\s][A-Za-zÀ-ÿ]+)*)\b"),  # "fait-il beau à Paris"
+    # Capture plus générale des villes
+    re.compile(r"(?:pleut|neige|beau).*?(?:à|a|en|au|dans|de)\s+([A-Za-zÀ-ÿ]+(?:[-\s][A-Za-zÀ-ÿ]+)*)")
+]
+
+def compiler_intentions(definitions):
     """
-    Détermine l'intention de l'utilisateur à partir de sa question.
+    Compile les motifs de toutes les intentions en une seule expression régulière.
+    
+    Chaque intention devient un groupe nommé d'une alternance placée dans un lookahead :
+    à chaque position, l'alternance est essayée dans l'ordre de la liste (ordre de priorité)
+    et le groupe qui correspond désigne l'intention. Un seul parcours de la question avec
+    finditer suffit donc pour trouver l'intention la plus prioritaire (voir
+    GrammaireIntentions.reconnaitre), quel que soit le nombre d'intentions.
     
     Args:
-        question (str): La question posée par l'utilisateur
+        definitions (list): Liste de tuples (intention, score, motifs)
         
     Returns:
-        tuple: (intention détectée, score de confiance, entités extraites)
+        tuple: (expression compilée, dictionnaire intention -> priorité, dictionnaire intention -> score)
+    """
+    alternatives = []
+    priorites = {}
+    scores = {}
+    for priorite, (intention, score, patterns) in enumerate(definitions):
+        alternatives.append("(?P<%s>%s)" % (intention, "|".join(patterns)))
+        priorites[intention] = priorite
+        scores[intention] = score
+    # Le lookahead rend chaque correspondance vide : finditer essaie alors toutes les positions,
+    # sans qu'une correspondance d'une intention en masque une autre plus prioritaire
+    expression = re.compile("(?=%s)" % "|".join(alternatives))
+    return expression, priorites, scores
+
+
+class GrammaireIntentions:
+    """
+    Grammaire des intentions compilée depuis le fichier de données (data/intentions.json).
+    Les motifs sont appliqués à la question en minuscules et sans accents.
+    Une instance est immuable : un rechargement crée une nouvelle instance.
     """
-    # Convertir en minuscules et nettoyer la question
-    question_lower = question.lower().strip()
-    
-    # Dictionnaire pour stocker les entités extraites
-    entites = {}
-    
-    # ==== Cas spécial pour les questions sur l'heure ====
-    patterns_heure = [
-        r"\bquelle\s+heure\s+est[- ]il\b",
-        r"\bl'heure\b",
-        r"\bheure actuelle\b",
-        r"\bheure est[- ]il\b"
-    ]
-    
-    for pattern in patterns_heure:
-        if re.search(pattern, question_lower):
-            logger.info(f"Question sur l'heure détectée: {question}")
-            return "heure", 1.0, entites
-    
-    # ==== Cas spécial pour les questions sur la date ====
-    patterns_date = [
-        r"\bquelle\s+(est\s+la\s+|)date\b",
-        r"\bquel\s+jour\s+(sommes[- ]nous|est[- ]on|est[- ]il|on\s+est)\b",
-        r"\bquel\s+jour\s+est[- ]ce\b",
-        r"\ben\s+quel\s+jour\s+sommes[- ]nous\b",
-        r"\bla\s+date\s+d'aujourd'hui\b",
-        r"\bla\s+date\s+du\s+jour\b",
-        r"\bdate\s+d'aujourd'hui\b",
-        r"\bdate\s+du\s+jour\b",
-        r"\bquel\s+est\s+le\s+jour\b"
-    ]
     
-    for pattern in patterns_date:
-        if re.search(pattern, question_lower):
-            logger.info(f"Question sur la date détectée: {question}")
-            return "date", 1.0, entites
-    
-    # ==== Cas spécial pour les questions météo ====
-    patterns_meteo = [
-        r"\bm[ée]t[ée]o\b", 
-        r"\btemps\b.*\b(à|a|dans|en|de)\b",
-        r"\btemps\s+qu'il\s+fait\b",
-        r"\btemps\s+fait[- ]il\b", 
-        r"\btemps\s+(à|a|dans|en|de)\b",
-        r"\bquel\s+temps\b",
-        r"\bclimat\b",
-        r"\bfait[- ]il\s+(chaud|froid|beau)\b", 
-        r"\btemperature\b", 
-        r"\btempérature\b",
-        r"\bdegr[ée]s?\b",
-        r"\bdonne[- ]moi\s+le\s+temps\b",
-        r"\bdonne[- ]moi\s+la\s+m[ée]t[ée]o\b",
-        r"\bhumidit[ée]\b",
-        r"\btaux\s+d[\"']humidit[ée]\b",
-        r"\bpleut\b",
-        r"\bpleuvoir\b",
-        r"\best[\s-]ce\s+qu[\"']il\s+pleut\b",
-        r"\bcombien\s+de\s+degr[ée]s\b",
-        r"\bc[o\"]nna[iî]tre\s+(?:la|le)\s+(?:m[ée]t[ée]o|temps|temp[ée]rature|climat|humidit[ée])\b",
-        r"\bj[\"']aimerais\s+(?:conna[iî]tre|savoir)\s+(?:la|le)\s+(?:m[ée]t[ée]o|temps|temp[ée]rature|climat|humidit[ée])\b",
-        r"\bquel(?:le)?\s+est\s+(?:la|le)\s+(?:m[ée]t[ée]o|temps|temp[ée]rature|climat|humidit[ée])\b",
-        r"\best[\s-]ce\s+qu[\"']il\s+(fait\s+beau|pleut|neige)\b",
-        r"\by[\s-]a[\s-]t[\s-]il\s+(du\s+soleil|de\s+la\s+pluie|de\s+la\s+neige)\b",
-        r"\bfait[\s-]il\s+(beau|chaud|froid)\b",
-        r"\ba[\s-]t[\s-]il\s+(plu|neigé)\b",
-        r"\bva[\s-]t[\s-]il\s+(pleuvoir|neiger)\b"
-    ]
+    def __init__(self, definitions, chemin=None, mtime=None):
+        """
+        Initialise la grammaire.
+        
+        Args:
+            definitions (list): Liste de tuples (intention, score, motifs) par ordre de priorité
+            chemin (str): Fichier d'origine
+            mtime (float): Date de modification du fichier au moment du chargement
+        """
+        self.definitions = definitions
+        self.expression, self.priorites, self.scores = compiler_intentions(definitions)
+        self.chemin = chemin
+        self.mtime = mtime
+    
+    @classmethod
+    def charger(cls, chemin):
+        """
+        Lit et compile un fichier de grammaire.
+        
+        Raises:
+            ValueError: Si le fichier est mal formé ou si un motif est invalide
+        """
+        mtime = os.path.getmtime(chemin)
+        with open(chemin, encoding="utf-8") as f:
+            donnees = json.load(f)
+        
+        definitions = []
+        for intention in donnees["intentions"]:
+            nom = intention["nom"]
+            if not nom.isidentifier():
+                raise ValueError(f"Nom d'intention invalide: {nom}")
+            # Les motifs s'appliquent à la question sans accents
+            motifs = [retirer_accents(motif) for motif in intention["motifs"]]
+            for motif in motifs:
+                try:
+                    re.compile(motif)
+                except re.error as e:
+                    raise ValueError(f"Motif invalide pour l'intention '{nom}': {motif} ({e})")
+            definitions.append((nom, float(intention.get("score", 1.0)), motifs))
+        try:
+            return cls(definitions, chemin, mtime)
+        except re.error as e:
+            raise ValueError(f"Motifs incompatibles dans {chemin}: {e}")
     
-    for pattern in patterns_meteo:
-        if re.search(pattern, question_lower):
-            # Recherche de villes
-            villes_patterns = [
-                r"\b(à|a|pour|dans|sur|en|de|au)\s+([A-Za-zÀ-ÿ]+(?:[-\s][A-Za-zÀ-ÿ]+)*)\b",
-                r"\bà\s+([A-Za-zÀ-ÿ]+(?:[-\s][A-Za-zÀ-ÿ]+)*)\s*\?", # Capture "à Paris ?"
-                r"\bpleut.*?\b(à|a|en|au|aux)\s+([A-Za-zÀ-ÿ]+(?:[-\s][A-Za-zÀ-ÿ]+)*)\b", # "pleut-il à Paris"
-                r"\bfait-il\s+(?:beau|chaud|froid).*?\b(à|a|en|au|aux)\s+([A-Za-zÀ-ÿ]+(?:[-\s][A-Za-zÀ-ÿ]+)*)\b", # "fait-il beau à Paris"
-                # Nouvelle ligne pour capturer plus généralement les villes
-                r"(?:pleut|neige|beau).*?(?:à|a|en|au|dans|de)\s+([A-Za-zÀ-ÿ]+(?:[-\s][A-Za-zÀ-ÿ]+)*)"
-            ]
+    def reconnaitre(self, texte):
+        """
+        Trouve l'intention la plus prioritaire dont un motif apparaît dans le texte.
+        
+        Args:
+            texte (str): Question en minuscules et sans accents
             
-            # Essayer tous les patterns
-            ville_trouvee = False
-            for ville_pattern in villes_patterns:
-                match_ville = re.search(ville_pattern, question)
-                if match_ville:
-                    # Si le pattern a deux groupes, prendre le deuxième (la ville)
-                    if len(match_ville.groups()) > 1:
-                        ville = match_ville.group(2)
-                    else:
-                        ville = match_ville.group(1)
-                    
-                    # Capitaliser la première lettre
-                    ville = ville.strip().title()
-                    entites["ville"] = ville
-                    logger.info(f"Ville extraite: {ville}")
-                    ville_trouvee = True
+        Returns:
+            str: Nom de l'intention, ou None si aucune ne correspond
+        """
+        meilleure = None
+        for correspondance in self.expression.finditer(texte):
+            intention = correspondance.lastgroup
+            if meilleure is None or self.priorites[intention] < self.priorites[meilleure]:
+                meilleure = intention
+                if self.priorites[intention] == 0:
                     break
-            
-            logger.info(f"Question météo détectée: {question}")
-            return "meteo", 1.0, entites
-    
-    # ==== Cas spécial pour les questions sur le bien-être ====
-    patterns_bien_etre = [
-        r"\bcomment\s+(vas|va|allez)[- ](tu|vous)\b",
-        r"\bça\s+va\b",
-        r"\btu\s+vas\s+bien\b",
-        r"\bcomment\s+tu\s+te\s+sens\b",
-        r"\bhow\s+are\s+you\b",
-        r"\btu\s+vas\s+comment\b",
-        r"\bcomment\s+te\s+portes[- ]tu\b",
-        r"\bça\s+roule\b",
-        r"\bt'es\s+en\s+forme\b",
-        r"\bla\s+forme\b",
-        r"\btu\s+te\s+sens\s+bien\b"
-    ]
-    
-    for pattern in patterns_bien_etre:
-        if re.search(pattern, question_lower):
-            logger.info(f"Question sur le bien-être détectée: {question}")
-            return "bien_etre", 1.0, entites
-    
-    # ==== Cas spécial pour les questions sur l'identité ====
-    patterns_identite = [
-        r"\bqui\s+(es[- ]tu|êtes[- ]vous|est[- ]ce que tu es)\b",
-        r"\btu\s+(es|est)\s+qui\b",
-        r"\bcomment\s+(t'appelles[- ]tu|vous appelez[- ]vous|tu t'appelles)\b",
-        r"\bton\s+nom\b",
-        r"\bquel\s+est\s+ton\s+nom\b"
-    ]
+        return meilleure
+
+
+CHEMIN_INTENTIONS = os.environ.get(
+    "CINDY_INTENTIONS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "intentions.json")
+)
+# Délai minimal (en secondes) entre deux vérifications du fichier de grammaire (0 pour désactiver)
+INTERVALLE_RECHARGEMENT = float(os.environ.get("CINDY_INTERVALLE_RECHARGEMENT", 5))
+
+# Grammaire active, chargée à la première utilisation (voir obtenir_grammaire)
+grammaire = None
+_prochaine_verification = 0.0
+_dernier_mtime = None
+_verrou_grammaire = threading.Lock()
+_verrou_chargement = threading.Lock()
+
+
+def obtenir_grammaire():
+    """
+    Retourne la grammaire des intentions active, en la chargeant à la première utilisation.
     
-    for pattern in patterns_identite:
-        if re.search(pattern, question_lower):
-            logger.info(f"Question sur l'identité détectée: {question}")
-            return "identite", 1.0, entites
-            
-    # ==== Cas spécial pour les réponses aux questions de bien-être ====
-    # Quand l'agent demande "Comment vas-tu ?" et que l'utilisateur répond
-    patterns_reponse_bien_etre = [
-        r"^(je\s+vais|ça\s+va|ca\s+va|je\s+me\s+sens|je\s+me\s+porte|je\s+suis)(\s+[a-zéèêàôûçñ]+){1,3}$",
-        r"^(bien|mal|super|génial|bof|pas\s+mal|très\s+bien|excellent|parfait|moyen|pas\s+top)$",
-        r"^(oui|non|ça\s+peut\s+aller|comme\s+ci\s+comme\s+ça|couci\s+couça|on\s+fait\s+aller)$",
-        r"^(en\s+forme|fatigué|fatigué|épuisé|heureux|triste|stressé|relaxé|content|énervé)$",
-        r"^(et\s+toi|et\s+vous|moi\s+aussi|pareil|à\s+merveille)$",
-        r"^\w+\s+bien\b",  # "très bien", "plutôt bien", etc.
-        r"^(bien|super|ok|okay|oui|génial|parfait).*merci$",  # "bien merci", "super merci", etc.
-        r"^merci.*$"  # N'importe quoi qui commence par merci
-    ]
+    Returns:
+        GrammaireIntentions: La grammaire compilée
+    """
+    global grammaire, _dernier_mtime
+    actuelle = grammaire
+    if actuelle is None:
+        with _verrou_chargement:
+            if grammaire is None:
+                grammaire = GrammaireIntentions.charger(CHEMIN_INTENTIONS)
+                _dernier_mtime = grammaire.mtime
+            actuelle = grammaire
+    return actuelle
+
+
+def obtenir_meteo_service():
+    """
+    Retourne le service météo partagé, créé à la première utilisation.
+    Un seul service par processus : ses caches, son disjoncteur et son planificateur sont communs.
     
-    for pattern in patterns_reponse_bien_etre:
-        if re.search(pattern, question_lower):
-            logger.info(f"Réponse à une question de bien-être détectée: {question}")
-            return "reponse_bien_etre", 1.0, entites
-            
-    # ==== Cas spécial pour les remerciements ====
-    patterns_remerciement = [
-        r"\b(merci|thanks|thx|remercie|je\s+te\s+remercie|je\s+vous\s+remercie)\b",
-        r"\b(je\s+t'en\s+remercie|c'est\s+gentil|sympa|cool|trop\s+bien)\b"
-    ]
+    Returns:
+        MeteoService: Le service partagé
+    """
+    global _meteo_service
+    if _meteo_service is None:
+        with _verrou_meteo_service:
+            if _meteo_service is None:
+                _meteo_service = MeteoService()
+    return _meteo_service
+
+
+def recharger_intentions(chemin=None):
+    """
+    Recharge la grammaire des intentions et la remplace de manière atomique.
+    Les requêtes en cours continuent avec l'ancienne grammaire. En cas d'erreur
+    dans le fichier, l'ancienne grammaire est conservée.
     
-    for pattern in patterns_remerciement:
-        if re.search(pattern, question_lower):
-            logger.info(f"Remerciement détecté: {question}")
-            return "remerciement", 1.0, entites
-    
-    # ==== Cas spécial pour les questions sur le créateur ====
-    patterns_createur = [
-        r"\bqui\s+(t'a\s+cr[ée]{1,3}|vous\s+a\s+cr[ée]{1,3})\b",
-        r"\bton\s+cr[ée]ateur\b",
-        r"\bcr[ée]{1,3}\s+par\s+qui\b",
-        r"\bqui\s+t'a\s+(con[çc]u|programm[ée])\b",
-        r"\bton\s+(auteur|inventeur|d[ée]veloppeur)\b"
-    ]
+    Args:
+        chemin (str): Fichier à charger (par défaut celui de la grammaire courante)
+        
+    Returns:
+        bool: True si la nouvelle grammaire est en place
+    """
+    global grammaire
+    chemin = chemin or (grammaire.chemin if grammaire else CHEMIN_INTENTIONS)
+    try:
+        nouvelle = GrammaireIntentions.charger(chemin)
+    except Exception as e:
+        logger.error(f"Rechargement de la grammaire des intentions impossible ({chemin}): {str(e)}")
+        return False
     
-    for pattern in patterns_createur:
-        if re.search(pattern, question_lower):
-            logger.info(f"Question sur le créateur détectée: {question}")
-            return "createur", 1.0, entites
-    
-    # ==== Cas spécial pour les questions sur les capacités ====
-    patterns_capacites = [
-        r"\b(que|quoi|qu'est[- ]ce que)\s+(tu\s+sais\s+faire|vous\s+savez\s+faire)\b",
-        r"\b(quelles?\s+sont|c'est\s+quoi)\s+(tes|vos)\s+capacit[ée]s\b",
-        r"\b(quelles?\s+sont|c'est\s+quoi)\s+(tes|vos)\s+(fonctions|fonctionnalit[ée]s)\b",
-        r"\bque\s+peux[- ]tu\s+faire\b",
-        r"\btu\s+peux\s+faire\s+quoi\b",
-        r"\btu\s+(sais|sers\s+[aà])\s+quoi\b",
-        r"\bqu'est[- ]ce\s+que\s+tu\s+peux\s+faire\b",
-        r"\bcapacit[ée]s?\b",
-        r"\bfonctionne?s?\b"
-    ]
+    grammaire = nouvelle
+    cache_intentions.invalider()
+    logger.info(f"Grammaire des intentions rechargée depuis {chemin}: {len(nouvelle.definitions)} intentions")
+    return True
+
+
+def verifier_grammaire():
+    """
+    Recharge la grammaire si son fichier a été modifié depuis le dernier chargement.
+    Le fichier n'est consulté qu'une fois par INTERVALLE_RECHARGEMENT secondes.
+    """
+    global _prochaine_verification, _dernier_mtime
+    if INTERVALLE_RECHARGEMENT <= 0 or grammaire is None:
+        return
+    maintenant = time.monotonic()
+    if maintenant < _prochaine_verification or not _verrou_grammaire.acquire(blocking=False):
+        return
+    try:
+        _prochaine_verification = maintenant + INTERVALLE_RECHARGEMENT
+        actuelle = grammaire
+        try:
+            mtime = os.path.getmtime(actuelle.chemin)
+        except OSError:
+            return
+        # Un fichier invalide n'est retenté qu'après une nouvelle modification
+        if mtime != _dernier_mtime:
+            _dernier_mtime = mtime
+            recharger_intentions(actuelle.chemin)
+    finally:
+        _verrou_grammaire.release()
+
+
+# Probabilité minimale pour accepter une intention proposée par le classifieur de secours
+# (une valeur supérieure à 1 désactive le classifieur)
+SEUIL_CLASSIFIEUR = float(os.environ.get("CINDY_SEUIL_CLASSIFIEUR", 0.6))
+
+
+def extraire_ville_question(question):
+    """
+    Extrait le nom de la ville d'une question météo.
     
-    for pattern in patterns_capacites:
-        if re.search(pattern, question_lower):
-            logger.info(f"Question sur les capacités détectée: {question}")
-            return "capacites", 1.0, entites
-    
-    # ==== Cas spécial pour les questions sur le fonctionnement ====
-    patterns_fonctionnement = [
-        r"\bcomment\s+(fonctionnes[- ]tu|tu\s+fonctionnes|ça\s+marche|fonctionne|ça\s+fonctionne)\b",
-        r"\bexplique\s+(ton|votre)\s+fonctionnement\b",
-        r"\bcomment\s+(es[- ]tu|êtes[- ]vous)\s+(fait|programmé)\b",
-        r"\bton\s+fonctionnement\b",
-        r"\bc'est\s+quoi\s+ton\s+système\b"
-    ]
+    Args:
+        question (str ou QuestionNormalisee): La question posée par l'utilisateur
+        
+    Returns:
+        str: Le nom de la ville capitalisé, ou None si aucune ville n'est trouvée
+    """
+    question = QuestionNormalisee.depuis(question)
+    
+    # Les villes connues sont repérées en un seul passage et renvoyées sous leur nom canonique
+    ville_connue = obtenir_index_villes().extraire(question)
+    if ville_connue:
+        return ville_connue["nom"]
+    
+    # Sinon, repérer un nom de lieu probable (il sera géocodé par le service météo) ;
+    # une virgule remplace les expressions de temps et de météo pour qu'elles ne prolongent pas le nom
+    texte = EXPRESSIONS_HORS_LIEU.sub(",", question.texte)
+    for ville_pattern in VILLES_PATTERNS:
+        match_ville = ville_pattern.search(texte)
+        if match_ville:
+            # Si le pattern a deux groupes, prendre le deuxième (la ville)
+            if len(match_ville.groups()) > 1:
+                ville = match_ville.group(2)
+            else:
+                ville = match_ville.group(1)
+            
+            # Corriger les fautes de frappe sur les villes connues ("Parius" -> "Paris")
+            ville_corrigee = obtenir_index_villes().corriger(ville)
+            if ville_corrigee:
+                return ville_corrigee["nom"]
+            
+            # Capitaliser la première lettre
+            return ville.strip().title()
+    return None
+
+
+def periode_meteo(question):
+    """
+    Détermine la période visée par une question météo.
     
-    for pattern in patterns_fonctionnement:
-        if re.search(pattern, question_lower):
-            logger.info(f"Question sur le fonctionnement détectée: {question}")
-            return "fonctionnement", 1.0, entites
-    
-    # ==== Cas spécial pour les demandes de blagues ====
-    patterns_blague = [
-        r"\b(raconte|dis|raconte[- ]moi|dis[- ]moi)[\s-]+(une|ta|une\s+autre|ta\s+meilleure|une\s+bonne|une\s+petite)\s+blague\b",
-        r"\b(raconte|dis)[- ]moi\s+quelque\s+chose\s+de\s+dr[ôo]le\b",
-        r"\bfais[- ]moi\s+rire\b",
-        r"\btu\s+(as|connais)\s+une\s+blague\b",
-        r"\btu\s+peux\s+me\s+faire\s+rire\b",
-        r"\bblague\b",
-        r"\bfais[- ]moi\s+une\s+blague\b",
-        r"\bune\s+blague\s'il\s+(te|vous)\s+pla[iî]t\b"
-    ]
+    Args:
+        question (str ou QuestionNormalisee): La question posée par l'utilisateur
+        
+    Returns:
+        str: PERIODE_APRES_DEMAIN, PERIODE_DEMAIN, PERIODE_SOIR, PERIODE_PROCHAINES_HEURES
+            (pluie au futur), ou None pour les conditions actuelles
+    """
+    question = QuestionNormalisee.depuis(question)
+    if "apres-demain" in question.repliee or "apres demain" in question.repliee:
+        return PERIODE_APRES_DEMAIN
+    if question.contient("demain"):
+        return PERIODE_DEMAIN
+    if "ce soir" in question.repliee or "cette nuit" in question.repliee:
+        return PERIODE_SOIR
+    if question.contient("pleuvoir", "pleuvra"):
+        return PERIODE_PROCHAINES_HEURES
+    return None
+
+
+def classer_intention(question):
+    """
+    Classe une question avec les seuls motifs de la grammaire, sans journalisation ni cache.
     
-    for pattern in patterns_blague:
-        if re.search(pattern, question_lower):
-            logger.info(f"Demande de blague détectée: {question}")
-            return "blague", 1.0, entites
+    Args:
+        question (str ou QuestionNormalisee): La question posée par l'utilisateur
+        
+    Returns:
+        tuple: (intention détectée, score de confiance, entités extraites)
+    """
+    question = QuestionNormalisee.depuis(question)
     
-    # ==== Cas spécial pour les salutations ====
-    patterns_salutation = [
-        r"^(bonjour|salut|coucou|hello|hey|hi|bonsoir)(\s|$)",
-        r"^(bon(jour|soir)|salut|coucou|hello|hey|hi)(\s|$)"
-    ]
+    # Un seul parcours de la question ; l'intention la plus prioritaire reconnue l'emporte
+    actuelle = obtenir_grammaire()
+    intention = actuelle.reconnaitre(question.repliee)
+    if intention is None:
+        return "inconnu", 0.3, {}
     
-    for pattern in patterns_salutation:
-        if re.search(pattern, question_lower):
-            logger.info(f"Salutation détectée: {question}")
-            return "salutation", 0.8, entites
-    
-    # ==== Cas spécial pour les questions sur Digital Factory ====
-    patterns_digital_factory = [
-        r"\bc\'?est\s+quoi\s+digital\s+factory\b",
-        r"\bqu[\'e]est[- ]ce\s+que\s+digital\s+factory\b",
-        r"\bdigital\s+factory\s+c\'?est\s+quoi\b",
-        r"\bparle[- ]moi\s+de\s+digital\s+factory\b",
-        r"\bexplique[- ]moi\s+digital\s+factory\b",
-        r"\bdigital\s+factory\b"  # Juste la mention de "Digital Factory"
-    ]
+    entites = {}
     
-    for pattern in patterns_digital_factory:
-        if re.search(pattern, question_lower):
-            logger.info(f"Question sur Digital Factory détectée: {question}")
-            return "digital_factory", 1.0, entites
+    # Recherche de la ville pour les questions météo
+    if intention == "meteo":
+        with Etape("entites"):
+            ville = extraire_ville_question(question)
+        if ville:
+            entites["ville"] = ville
     
-    # Si aucune intention spécifique n'est détectée
-    logger.info(f"Aucune intention spécifique détectée pour: {question}")
-    return "inconnu", 0.3, entites
+    return intention, actuelle.scores[intention], entites
 
-def generer_reponse_simple(intention, entites=None):
+
+def classer_par_modele(question, intention="inconnu", score=0.3, entites=None):
     """
-    Génère une réponse simple basée sur l'intention détectée.
+    Consulte le classifieur de secours pour une question non reconnue par les motifs.
+    Le résultat n'est retenu que si la probabilité dépasse SEUIL_CLASSIFIEUR.
     
     Args:
-        intention (str): L'intention détectée
-        entites (dict): Les entités extraites de la question
+        question (str ou QuestionNormalisee): La question posée par l'utilisateur
+        intention, score, entites: Le résultat à conserver si le modèle n'est pas assez sûr
         
     Returns:
-        str: La réponse générée
+        tuple: (intention détectée, score de confiance, entités extraites)
     """
     if entites is None:
         entites = {}
+    if SEUIL_CLASSIFIEUR > 1:
+        return intention, score, entites
     
-    # Essayer d'obtenir les réponses depuis le module centralisé
-    reponses = {}
-    if has_reponses_module:
-        try:
-            reponses = reponses_module.obtenir_reponses("Cindy")
-            logger.info(f"Réponses obtenues depuis le module centralisé: {len(reponses)} catégories")
-        except Exception as e:
-            logger.error(f"Erreur lors de l'obtention des réponses centralisées: {str(e)}")
-    
-    # Si l'intention est "heure", générer l'heure actuelle
-    if intention == "heure":
-        maintenant = datetime.now()
-        heure_actuelle = maintenant.strftime("%H:%M:%S")
-        
-        # Format de date en français
-        jours = ["lundi", "mardi", "mercredi", "jeudi", "vendredi", "samedi", "dimanche"]
-        mois = ["janvier", "février", "mars", "avril", "mai", "juin", "juillet", 
-               "août", "septembre", "octobre", "novembre", "décembre"]
-        
-        jour_semaine = jours[maintenant.weekday()]
-        jour_mois = maintenant.day
-        mois_nom = mois[maintenant.month - 1]
-        annee = maintenant.year
+    try:
+        import classifieur
+        modele = classifieur.obtenir_classifieur()
+        if modele is None:
+            return intention, score, entites
         
-        reponse = f"Il est actuellement {heure_actuelle} ,nous sommes le {jour_semaine} {jour_mois} {mois_nom} {annee}."
+        intention_modele, probabilite = modele.predire(str(question))
+    except Exception as e:
+        logger.error(f"Erreur lors de la classification de secours: {str(e)}")
+        return intention, score, entites
+    
+    if intention_modele == "inconnu" or probabilite < SEUIL_CLASSIFIEUR:
+        return intention, score, entites
+    
+    entites = {}
+    if intention_modele == "meteo":
+        with Etape("entites"):
+            ville = extraire_ville_question(question)
+        if ville:
+            entites["ville"] = ville
+    logger.debug(f"Intention '{intention_modele}' proposée par le classifieur (probabilité: {probabilite:.2f})")
+    return intention_modele, round(probabilite, 2), entites
+
+
+def analyser_intention(question, journaliser=True):
+    """
+    Détermine l'intention de l'utilisateur à partir de sa question, sans passer par le cache.
+    
+    Args:
+        question (str ou QuestionNormalisee): La question posée par l'utilisateur
+        journaliser (bool): Journaliser le résultat (désactivé pour les traitements par lot)
         
-        # Ajouter un petit complément selon le moment de la journée
-        heure = maintenant.hour
-        if 5 <= heure < 12:
-            reponse += " Passez une excellente matinée !"
-        elif 12 <= heure < 18:
-            reponse += " Je vous souhaite un bel après-midi !"
-        elif 18 <= heure < 22:
-            reponse += " Bonne soirée à vous !"
-        else:
-            reponse += " Bonne nuit, il est déjà tard !"
-            
-        return reponse
+    Returns:
+        tuple: (intention détectée, score de confiance, entités extraites)
+    """
+    question = QuestionNormalisee.depuis(question)
+    intention, score, entites = classer_intention(question)
+    
+    # Repli sur le classifieur entraîné quand aucun motif ne correspond
+    if intention == "inconnu":
+        intention, score, entites = classer_par_modele(question, intention, score, entites)
+    
+    if not journaliser:
+        return intention, score, entites
+    if intention == "inconnu":
+        # Si aucune intention spécifique n'est détectée
+        logger.debug(f"Aucune intention spécifique détectée pour: {question}")
+    else:
+        if "ville" in entites:
+            logger.debug(f"Ville extraite: {entites['ville']}")
+        logger.debug(f"Intention '{intention}' détectée: {question}")
+    return intention, score, entites
+
+
+def _classer_lot(questions):
+    """Classe une liste de questions (exécuté dans un processus de travail)."""
+    return [analyser_intention(question, journaliser=False) for question in questions]
+
+
+def determiner_intentions(questions, processus=None, taille_lot=1000):
+    """
+    Classe un ensemble de questions par lot, sans journalisation par question.
+    Les résultats sont produits au fil de l'eau, dans l'ordre des questions reçues.
+    
+    Args:
+        questions (iterable): Les questions à classer
+        processus (int): Nombre de processus de travail (None ou 1 pour rester dans le processus courant)
+        taille_lot (int): Nombre de questions envoyées à la fois à un processus
         
-    # Si l'intention est "date", générer la date actuelle
-    elif intention == "date":
-        maintenant = datetime.now()
+    Yields:
+        tuple: (intention détectée, score de confiance, entités extraites) pour chaque question
+    """
+    if not processus or processus <= 1:
+        for question in questions:
+            yield analyser_intention(question, journaliser=False)
+        return
+    
+    from concurrent.futures import ProcessPoolExecutor
+    
+    iterateur = iter(questions)
+    with ProcessPoolExecutor(max_workers=processus) as executeur:
+        while True:
+            # Découper l'entrée en blocs pour ne pas charger tout le flux en mémoire
+            lots = []
+            for _ in range(processus * 2):
+                lot = list(islice(iterateur, taille_lot))
+                if not lot:
+                    break
+                lots.append(lot)
+            if not lots:
+                break
+            for resultats in executeur.map(_classer_lot, lots):
+                yield from resultats
+
+
+class CacheIntentions:
+    """
+    Cache LRU borné des analyses d'intention, indexé sur la question normalisée.
+    """
+    
+    def __init__(self, capacite=1024):
+        """
+        Initialise le cache.
         
-        # Format de date en français
-        jours = ["lundi", "mardi", "mercredi", "jeudi", "vendredi", "samedi", "dimanche"]
-        mois = ["janvier", "février", "mars", "avril", "mai", "juin", "juillet", 
-               "août", "septembre", "octobre", "novembre", "décembre"]
+        Args:
+            capacite (int): Nombre maximum de questions conservées
+        """
+        self.capacite = capacite
+        self.entrees = OrderedDict()
+        self.verrou = threading.Lock()
+        self.succes = 0
+        self.echecs = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def normaliser(question):
+        """Normalise la question (espaces superflus) pour en faire une clé de cache."""
+        return " ".join(question.split())
+    
+    def obtenir(self, cle):
+        """
+        Retourne l'analyse en cache pour une clé, ou None si elle est absente.
+        Les entités sont copiées pour que l'appelant ne puisse pas modifier le cache.
+        """
+        with self.verrou:
+            entree = self.entrees.get(cle)
+            if entree is None:
+                self.echecs += 1
+                return None
+            self.entrees.move_to_end(cle)
+            self.succes += 1
+        intention, score, entites = entree
+        return intention, score, dict(entites)
+    
+    def ajouter(self, cle, intention, score, entites):
+        """Ajoute une analyse au cache en évinçant la plus ancienne si nécessaire."""
+        if self.capacite <= 0:
+            return
+        with self.verrou:
+            self.entrees[cle] = (intention, score, dict(entites))
+            self.entrees.move_to_end(cle)
+            while len(self.entrees) > self.capacite:
+                self.entrees.popitem(last=False)
+                self.evictions += 1
+    
+    def invalider(self):
+        """Supprime toutes les entrées (par exemple après un changement de grammaire)."""
+        with self.verrou:
+            self.entrees.clear()
+    
+    def vider(self):
+        """Vide le cache et remet les compteurs à zéro."""
+        with self.verrou:
+            self.entrees.clear()
+            self.succes = 0
+            self.echecs = 0
+            self.evictions = 0
+    
+    def statistiques(self):
+        """
+        Retourne les compteurs du cache.
         
-        jour_semaine = jours[maintenant.weekday()]
-        jour_mois = maintenant.day
-        mois_nom = mois[maintenant.month - 1]
-        annee = maintenant.year
+        Returns:
+            dict: Succès, échecs, évictions, taille et capacité du cache
+        """
+        with self.verrou:
+            total = self.succes + self.echecs
+            return {
+                "succes": self.succes,
+                "echecs": self.echecs,
+                "evictions": self.evictions,
+                "taux_succes": self.succes / total if total else 0.0,
+                "taille": len(self.entrees),
+                "capacite": self.capacite
+            }
+
+
+# Cache partagé des analyses d'intention (taille réglable par variable d'environnement)
+cache_intentions = CacheIntentions(int(os.environ.get("CINDY_CACHE_INTENTIONS", 1024)))
+enregistrer_cache("intentions", cache_intentions.statistiques)
+
+
+def determiner_intention(question):
+    """
+    Détermine l'intention de l'utilisateur à partir de sa question.
+    Les questions déjà analysées sont servies depuis le cache des intentions.
+    
+    Args:
+        question (str ou QuestionNormalisee): La question posée par l'utilisateur
         
-        reponse = f"Nous sommes le {jour_semaine} {jour_mois} {mois_nom} {annee}."
+    Returns:
+        tuple: (intention détectée, score de confiance, entités extraites)
+    """
+    verifier_grammaire()
+    
+    question = QuestionNormalisee.depuis(question)
+    cle = CacheIntentions.normaliser(question.texte)
+    resultat = cache_intentions.obtenir(cle)
+    if resultat is not None:
+        logger.debug(f"Intention servie depuis le cache: {question}")
+        return resultat
+    
+    intention, score, entites = analyser_intention(question)
+    cache_intentions.ajouter(cle, intention, score, entites)
+    return intention, score, entites
+
+# Noms des jours et des mois en français
+JOURS = ("lundi", "mardi", "mercredi", "jeudi", "vendredi", "samedi", "dimanche")
+MOIS = ("janvier", "février", "mars", "avril", "mai", "juin", "juillet",
+        "août", "septembre", "octobre", "novembre", "décembre")
+
+# Blagues de secours au cas où les blagues centralisées ne sont pas disponibles
+BLAGUES_SECOURS = (
+    "Pourquoi les plongeurs plongent-ils toujours en arrière ? Parce que sinon, ils tombent dans le bateau !",
+    "Que se passe-t-il quand deux poissons s'énervent ? Le thon monte !",
+    "Qu'est-ce qu'un crocodile qui surveille la pharmacie ? Un Lacoste Garde.",
+    "Qu'est-ce qui est petit, carré et jaune ? Un petit carré jaune.",
+    "Pourquoi les informaticiens confondent-ils Halloween et Noël ? Parce qu'Oct 31 = Dec 25.",
+    "Que dit un informaticien quand il s'ennuie ? Je bit ma vie !"
+)
+
+# Réponses de secours quand le catalogue ne contient aucune réponse pour l'intention
+REPONSES_SECOURS = {
+    "bien_etre": (
+        "Je vais super bien aujourd'hui, merci de demander ! Et toi, comment ça va ?",
+        "Tout va bien, merci ! C'est gentil de t'inquiéter pour moi. Et de ton côté ?",
+        "Je me sens en pleine forme ! J'espère que ta journée se passe bien aussi ?",
+        "Ça va très bien, merci ! Et toi, comment se passe ta journée ?",
+        "Plutôt bien ! C'est toujours un plaisir de discuter avec toi. Comment vas-tu ?",
+        "Je me porte à merveille, merci ! J'espère que toi aussi ?"
+    ),
+    "reponse_bien_etre": (
+        "Je suis contente de l'apprendre ! Comment puis-je t'aider aujourd'hui ?",
+        "C'est super ! Que puis-je faire pour toi ?",
+        "Excellent ! Je suis là si tu as besoin de quoi que ce soit.",
+        "Tant mieux ! Y a-t-il quelque chose dont tu voudrais discuter ?",
+        "Merci de partager ça avec moi ! En quoi puis-je t'être utile ?",
+        "C'est bien de le savoir ! N'hésite pas à me demander de l'aide si tu en as besoin.",
+        "Parfait ! Que veux-tu savoir ou faire maintenant ?"
+    )
+}
+
+
+def obtenir_catalogue():
+    """
+    Retourne le catalogue compilé des réponses de l'agent (construit une seule fois).
+    
+    Returns:
+        dict: intention -> tuple de réponses pré-analysées, vide si le module est indisponible
+    """
+    if has_reponses_module:
+        try:
+            return reponses_module.obtenir_catalogue("Cindy")
+        except Exception as e:
+            logger.error(f"Erreur lors de l'obtention des réponses centralisées: {str(e)}")
+    return {}
+
+
+def _repondre_heure(intention, catalogue, entites):
+    """Génère l'heure actuelle."""
+    maintenant = datetime.now()
+    heure_actuelle = maintenant.strftime("%H:%M:%S")
+    
+    jour_semaine = JOURS[maintenant.weekday()]
+    mois_nom = MOIS[maintenant.month - 1]
+    
+    reponse = f"Il est actuellement {heure_actuelle} ,nous sommes le {jour_semaine} {maintenant.day} {mois_nom} {maintenant.year}."
+    
+    # Ajouter un petit complément selon le moment de la journée
+    heure = maintenant.hour
+    if 5 <= heure < 12:
+        reponse += " Passez une excellente matinée !"
+    elif 12 <= heure < 18:
+        reponse += " Je vous souhaite un bel après-midi !"
+    elif 18 <= heure < 22:
+        reponse += " Bonne soirée à vous !"
+    else:
+        reponse += " Bonne nuit, il est déjà tard !"
         
-        # Ajouter une mention pour les jours spéciaux
-        if jour_mois == 1 and mois_nom == "janvier":
-            reponse += " Bonne année !"
-        elif jour_mois == 25 and mois_nom == "décembre":
-            reponse += " Joyeux Noël !"
-        elif jour_mois == 14 and mois_nom == "juillet":
-            reponse += " C'est la fête nationale française !"
-        elif jour_semaine == "samedi" or jour_semaine == "dimanche":
-            reponse += " Bon week-end !"
-            
-        return reponse
-    
-    # Si l'intention est "blague", renvoyer une blague aléatoire
-    elif intention == "blague":
-        if has_reponses_module and "blague" in reponses:
-            blagues = reponses["blague"]
-            if blagues:
-                return random.choice(blagues)
+    return reponse
+
+
+def _repondre_date(intention, catalogue, entites):
+    """Génère la date actuelle."""
+    maintenant = datetime.now()
+    
+    jour_semaine = JOURS[maintenant.weekday()]
+    jour_mois = maintenant.day
+    mois_nom = MOIS[maintenant.month - 1]
+    
+    reponse = f"Nous sommes le {jour_semaine} {jour_mois} {mois_nom} {maintenant.year}."
+    
+    # Ajouter une mention pour les jours spéciaux
+    if jour_mois == 1 and mois_nom == "janvier":
+        reponse += " Bonne année !"
+    elif jour_mois == 25 and mois_nom == "décembre":
+        reponse += " Joyeux Noël !"
+    elif jour_mois == 14 and mois_nom == "juillet":
+        reponse += " C'est la fête nationale française !"
+    elif jour_semaine == "samedi" or jour_semaine == "dimanche":
+        reponse += " Bon week-end !"
         
-        # Blagues de secours au cas où les blagues centralisées ne sont pas disponibles
-        blagues_secours = [
-            "Pourquoi les plongeurs plongent-ils toujours en arrière ? Parce que sinon, ils tombent dans le bateau !",
-            "Que se passe-t-il quand deux poissons s'énervent ? Le thon monte !",
-            "Qu'est-ce qu'un crocodile qui surveille la pharmacie ? Un Lacoste Garde.",
-            "Qu'est-ce qui est petit, carré et jaune ? Un petit carré jaune.",
-            "Pourquoi les informaticiens confondent-ils Halloween et Noël ? Parce qu'Oct 31 = Dec 25.",
-            "Que dit un informaticien quand il s'ennuie ? Je bit ma vie !"
-        ]
-        return random.choice(blagues_secours)
-    
-    # Chercher l'intention dans le dictionnaire des réponses
-    if intention in reponses:
-        reponses_possibles = reponses[intention]
+    return reponse
+
+
+def _repondre_blague(intention, catalogue, entites):
+    """Renvoie une blague aléatoire."""
+    blagues = catalogue.get("blague")
+    if blagues:
+        return random.choice(blagues).texte
+    return random.choice(BLAGUES_SECOURS)
+
+
+def _repondre_catalogue(intention, catalogue, entites):
+    """Choisit une réponse du catalogue pour l'intention et la complète avec les entités."""
+    if intention in catalogue:
+        reponses_possibles = catalogue[intention]
         
         # Si la liste est vide, utiliser une réponse par défaut
         if not reponses_possibles:
-            if intention == "bien_etre":
-                # Réponses de secours pour le bien-être
-                reponses_bien_etre = [
-                    "Je vais super bien aujourd'hui, merci de demander ! Et toi, comment ça va ?",
-                    "Tout va bien, merci ! C'est gentil de t'inquiéter pour moi. Et de ton côté ?",
-                    "Je me sens en pleine forme ! J'espère que ta journée se passe bien aussi ?",
-                    "Ça va très bien, merci ! Et toi, comment se passe ta journée ?",
-                    "Plutôt bien ! C'est toujours un plaisir de discuter avec toi. Comment vas-tu ?",
-                    "Je me porte à merveille, merci ! J'espère que toi aussi ?"
-                ]
-                logger.warning(f"Utilisation de la réponse de secours pour l'intention: {intention}")
-                return random.choice(reponses_bien_etre)
-            elif intention == "reponse_bien_etre":
-                # Réponses de secours pour les réponses aux questions de bien-être
-                reponses_reponse_bien_etre = [
-                    "Je suis contente de l'apprendre ! Comment puis-je t'aider aujourd'hui ?",
-                    "C'est super ! Que puis-je faire pour toi ?",
-                    "Excellent ! Je suis là si tu as besoin de quoi que ce soit.",
-                    "Tant mieux ! Y a-t-il quelque chose dont tu voudrais discuter ?",
-                    "Merci de partager ça avec moi ! En quoi puis-je t'être utile ?",
-                    "C'est bien de le savoir ! N'hésite pas à me demander de l'aide si tu en as besoin.",
-                    "Parfait ! Que veux-tu savoir ou faire maintenant ?"
-                ]
+            if intention in REPONSES_SECOURS:
                 logger.warning(f"Utilisation de la réponse de secours pour l'intention: {intention}")
-                return random.choice(reponses_reponse_bien_etre)
-            else:
-                return "Je ne suis pas sûre de comprendre votre question."
-            
-        # Choisir une réponse aléatoire
-        reponse = random.choice(reponses_possibles)
+                return random.choice(REPONSES_SECOURS[intention])
+            return "Je ne suis pas sûre de comprendre votre question."
         
-        # Personnaliser la réponse avec les entités si nécessaire
-        for entite, valeur in entites.items():
-            reponse = reponse.replace(f"[{entite.upper()}]", str(valeur))
-            
-        return reponse
-    else:
-        # Pour les intentions inconnues, générer une réponse d'excuse
-        if has_reponses_module and "inconnu" in reponses:
-            reponses_inconnues = reponses["inconnu"]
-            if reponses_inconnues:
-                reponse = random.choice(reponses_inconnues)
-                # Ne pas ajouter de suggestion de météo automatiquement
-                return reponse
+        # Choisir une réponse aléatoire et la personnaliser avec les entités si nécessaire
+        return random.choice(reponses_possibles).remplir(entites)
+    
+    # Pour les intentions inconnues, générer une réponse d'excuse
+    reponses_inconnues = catalogue.get("inconnu")
+    if reponses_inconnues:
+        return random.choice(reponses_inconnues).texte
+    
+    # Réponse de secours si les réponses centralisées ne sont pas disponibles
+    return "Je ne suis pas sûre de comprendre. Pouvez-vous reformuler votre question ?"
+
+
+# Table de répartition : intention -> fonction qui génère la réponse
+GESTIONNAIRES_REPONSES = {
+    "heure": _repondre_heure,
+    "date": _repondre_date,
+    "blague": _repondre_blague
+}
+
+
+def generer_reponse_simple(intention, entites=None):
+    """
+    Génère une réponse simple basée sur l'intention détectée.
+    
+    Args:
+        intention (str): L'intention détectée
+        entites (dict): Les entités extraites de la question
         
-        # Réponse de secours si les réponses centralisées ne sont pas disponibles
-        return "Je ne suis pas sûre de comprendre. Pouvez-vous reformuler votre question ?"
+    Returns:
+        str: La réponse générée
+    """
+    if entites is None:
+        entites = {}
+    
+    gestionnaire = GESTIONNAIRES_REPONSES.get(intention, _repondre_catalogue)
+    return gestionnaire(intention, obtenir_catalogue(), entites)
 
 def obtenir_suggestions_dynamiques(intention):
     """
@@ -536,37 +755,44 @@ def analyser_et_repondre(question):
     Analyse une question et génère une réponse complète.
     
     Args:
-        question (str): La question posée par l'utilisateur
+        question (str ou QuestionNormalisee): La question posée par l'utilisateur
         
     Returns:
         dict: Dictionnaire contenant la réponse, l'intention, le score et les suggestions
     """
     try:
-        logger.info(f"Analyse de la question: {question}")
-        
-        # Convertir la question en minuscules pour faciliter la détection
-        question_lower = question.lower()
+        # Normaliser la question une seule fois pour toutes les étapes de l'analyse
+        question = QuestionNormalisee.depuis(question)
+        logger.debug(f"Analyse de la question: {question}")
         
         # Déterminer l'intention de la question
-        intention, score, entites = determiner_intention(question)
-        logger.info(f"Intention détectée: {intention} (score: {score}), entités: {entites}")
+        with Etape("intention"):
+            intention, score, entites = determiner_intention(question)
+        logger.info("Intention détectée", extra={"intention": intention, "score": score, "entites": entites})
         
         # Cas spécial pour la météo
         if intention == "meteo":
             try:
                 # Obtenir la ville (ou utiliser Paris par défaut)
                 ville = entites.get("ville", "Paris")
-                logger.info(f"Demande météo pour la ville: {ville}")
+                logger.debug(f"Demande météo pour la ville: {ville}")
 
                 # Tentative simple d'obtention des données météo
                 try:
                     # Déterminer si la question concerne un type spécifique de météo
-                    concerne_pluie = any(mot in question_lower for mot in ["pleut", "pluie", "pleuvoir"])
-                    concerne_neige = any(mot in question_lower for mot in ["neige", "neiger"])
-                    concerne_beau_temps = any(mot in question_lower for mot in ["soleil", "ensoleillé", "soleil", "ciel bleu", "beau"])
+                    concerne_pluie = question.contient_prefixe("pleu", "pluie")
+                    concerne_neige = question.contient_prefixe("neige")
+                    concerne_beau_temps = question.contient_prefixe("soleil", "ensoleill", "beau") or "ciel bleu" in question.repliee
+                    
+                    # Météo à venir : réponse tirée des prévisions mises en cache avec les conditions actuelles
+                    reponse = None
+                    periode = periode_meteo(question)
+                    if periode:
+                        reponse = obtenir_meteo_service().obtenir_prevision(f"météo à {ville}", periode, concerne_pluie)
                     
                     # Appel direct à la fonction obtenir_meteo - méthode simple et robuste
-                    reponse = meteo_service.obtenir_meteo(f"météo à {ville}")
+                    if reponse is None:
+                        reponse = obtenir_meteo_service().obtenir_meteo(f"météo à {ville}")
                     
                     # Pour les questions spécifiques, ajouter une précision
                     if isinstance(reponse, str):
@@ -600,13 +826,15 @@ def analyser_et_repondre(question):
                 reponse = "Une erreur est survenue lors du traitement de votre demande météo. Veuillez réessayer plus tard."
         else:
             # Générer une réponse pour les autres intentions
-            reponse = generer_reponse_simple(intention, entites)
+            with Etape("formatage"):
+                reponse = generer_reponse_simple(intention, entites)
         
-        logger.info(f"Réponse générée: {reponse}")
+        logger.debug(f"Réponse générée: {reponse}")
         
         # Obtenir des suggestions de questions à poser
-        suggestions = obtenir_suggestions_dynamiques(intention)
-        logger.info(f"Suggestions générées: {suggestions}")
+        with Etape("suggestions"):
+            suggestions = obtenir_suggestions_dynamiques(intention)
+        logger.debug(f"Suggestions générées: {suggestions}")
         
         resultat = {
             "reponse": reponse,
@@ -634,8 +862,23 @@ def analyser_et_repondre(question):
             ]
         }
 
+def initialiser():
+    """
+    Charge immédiatement les ressources normalement construites à la première requête :
+    grammaire des intentions, index des villes, service météo et catalogue des réponses.
+    À appeler dans le processus maître (gunicorn --preload) pour que les workers en héritent.
+    """
+    obtenir_grammaire()
+    obtenir_index_villes()
+    obtenir_meteo_service()
+    obtenir_catalogue()
+
+
 # Tests unitaires simples si le script est exécuté directement
 if __name__ == "__main__":
+    from journalisation import configurer_journalisation
+    configurer_journalisation(format_journal="texte")
+    
     # Tests de différentes questions
     questions_test = [
         "Bonjour, comment ça va ?",
@@ -0,0 +1,76 @@
+"""
+Normalisation des questions de l'agent Cindy.
+Une question est normalisée une seule fois par requête (minuscules, accents retirés, mots)
+puis transmise telle quelle à chaque étape de l'analyse.
+"""
+
+import re
+import unicodedata
+
+# Les tirets, apostrophes, espaces et la ponctuation séparent les mots
+MOTS_REGEX = re.compile(r"[a-z0-9]+")
+
+
+def retirer_accents(texte):
+    """Retire les accents d'un texte sans changer la casse ("Genève" -> "Geneve")."""
+    texte = unicodedata.normalize("NFKD", texte)
+    return "".join(c for c in texte if not unicodedata.combining(c))
+
+
+def replier_accents(texte):
+    """Met le texte en minuscules et retire les accents ("Genève" -> "geneve")."""
+    return retirer_accents(texte.lower())
+
+
+def decouper_mots(texte):
+    """Découpe un texte en mots sans accents ni ponctuation."""
+    return MOTS_REGEX.findall(replier_accents(texte))
+
+
+class QuestionNormalisee:
+    """
+    Question de l'utilisateur accompagnée de ses formes normalisées, calculées une seule fois.
+
+    Attributs:
+        texte (str): La question telle que reçue
+        minuscule (str): La question en minuscules, sans espaces en début et fin
+        repliee (str): La question en minuscules et sans accents
+        mots (tuple): Les mots de la question (sans accents ni ponctuation)
+        ensemble_mots (frozenset): Les mêmes mots, pour les tests d'appartenance
+    """
+
+    __slots__ = ("texte", "minuscule", "repliee", "mots", "ensemble_mots")
+
+    def __init__(self, texte):
+        """
+        Normalise une question.
+
+        Args:
+            texte (str): La question posée par l'utilisateur
+        """
+        self.texte = texte
+        self.minuscule = texte.lower().strip()
+        self.repliee = replier_accents(self.minuscule)
+        self.mots = tuple(MOTS_REGEX.findall(self.repliee))
+        self.ensemble_mots = frozenset(self.mots)
+
+    @classmethod
+    def depuis(cls, question):
+        """Retourne la question normalisée, en réutilisant celle déjà construite le cas échéant."""
+        if isinstance(question, cls):
+            return question
+        return cls(question)
+
+    def contient(self, *mots):
+        """Indique si l'un des mots (sans accents) figure dans la question."""
+        return not self.ensemble_mots.isdisjoint(mots)
+
+    def contient_prefixe(self, *prefixes):
+        """Indique si un mot de la question commence par l'un des préfixes (sans accents)."""
+        return any(mot.startswith(prefixes) for mot in self.mots)
+
+    def __str__(self):
+        return self.texte
+
+    def __repr__(self):
+        return f"QuestionNormalisee({self.texte!r})"
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Banc d'essai du moteur NLP de l'agent Cindy.
+Rejoue les questions archivées (archives/data/interactions.json et motifs_questions.json)
+ainsi que des questions synthétiques (longues, mal formées) à travers determiner_intention,
+extraire_nom_ville et analyser_et_repondre. Le réseau est simulé : aucune requête ne sort
+(réponses Open-Meteo fixes, ou rejouées depuis une cassette avec --cassette).
+
+Les résultats (opérations par seconde, percentiles, mémoire, précision des intentions et des villes)
+sont enregistrés en JSON pour comparer les exécutions entre elles.
+
+Utilisation :
+    python outils/benchmark_nlp.py --repetitions 5
+    python outils/benchmark_nlp.py --comparer outils/resultats/benchmark_20260101-120000.json
+    python outils/benchmark_nlp.py --cassette outils/cassettes/open_meteo.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+import platform
+import subprocess
+import tracemalloc
+from datetime import datetime
+
+DOSSIER_PROJET = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, DOSSIER_PROJET)
+
+import requests
+
+CHEMIN_INTERACTIONS = os.path.join(DOSSIER_PROJET, "archives", "data", "interactions.json")
+CHEMIN_MOTIFS = os.path.join(DOSSIER_PROJET, "archives", "data", "motifs_questions.json")
+DOSSIER_RESULTATS = os.path.join(DOSSIER_PROJET, "outils", "resultats")
+
+# Réponses simulées des services Open-Meteo
+REPONSE_GEOCODAGE = {"results": [{"name": "Villeneuve", "country": "France", "latitude": 46.0, "longitude": 2.0}]}
+REPONSE_METEO = {
+    "current": {"temperature_2m": 18.4, "relative_humidity_2m": 62, "apparent_temperature": 17.9,
+                "weather_code": 2, "wind_speed_10m": 12.0}
+}
+
+
+def simuler_reseau():
+    """
+    Remplace les requêtes HTTP par des réponses Open-Meteo fixes.
+    Toutes les requêtes de la bibliothèque requests passent par Session.request.
+    """
+    def requete_simulee(session, method, url, params=None, **kwargs):
+        reponse = requests.Response()
+        reponse.status_code = 200
+        reponse.url = url
+        reponse.encoding = "utf-8"
+        donnees = REPONSE_GEOCODAGE if "geocoding" in url else REPONSE_METEO
+        reponse._content = json.dumps(donnees).encode("utf-8")
+        return reponse
+
+    requests.sessions.Session.request = requete_simulee
+
+
+def charger_corpus():
+    """
+    Charge les questions archivées avec leur intention attendue.
+
+    Returns:
+        list: Liste de tuples (question, intention attendue ou None)
+    """
+    corpus = []
+    with open(CHEMIN_INTERACTIONS, encoding="utf-8") as f:
+        for element in json.load(f):
+            if element.get("question"):
+                corpus.append((element["question"], element.get("intention")))
+    with open(CHEMIN_MOTIFS, encoding="utf-8") as f:
+        for intention, questions in json.load(f).items():
+            corpus.extend((question, intention) for question in questions)
+    return corpus
+
+
+def generer_questions_synthetiques(corpus, nombre, graine):
+    """
+    Génère des questions longues ou mal formées à partir du corpus (reproductible).
+
+    Args:
+        corpus (list): Corpus de tuples (question, intention)
+        nombre (int): Nombre de questions par famille
+        graine (int): Graine du générateur aléatoire
+
+    Returns:
+        list: Liste de tuples (famille, question)
+    """
+    aleatoire = random.Random(graine)
+    questions = [question for question, _ in corpus]
+
+    def fautes(texte):
+        lettres = list(texte)
+        for _ in range(max(1, len(lettres) // 10)):
+            i = aleatoire.randrange(max(1, len(lettres) - 1))
+            lettres[i:i + 2] = lettres[i:i + 2][::-1]
+        return "".join(lettres)
+
+    familles = {
+        "longue": lambda: " ".join(aleatoire.choices(questions, k=40)),
+        "fautes": lambda: fautes(aleatoire.choice(questions)),
+        "repetition": lambda: "à " * aleatoire.randint(200, 2000) + "Paris ?",
+        "sans_espaces": lambda: "".join(aleatoire.choice(questions).split()) * 20,
+        "ponctuation": lambda: "?!.,;'-" * aleatoire.randint(50, 500),
+        "unicode": lambda: aleatoire.choice(questions) + " 🌧️☀️ ÉÈÊËéèêë ßØæœ " * 50,
+        "majuscules": lambda: aleatoire.choice(questions).upper() * 10,
+    }
+    return [(famille, generer()) for famille, generer in familles.items() for _ in range(nombre)]
+
+
+def percentile(valeurs_triees, fraction):
+    """Percentile par rang le plus proche d'une liste triée."""
+    if not valeurs_triees:
+        return 0.0
+    rang = max(0, min(len(valeurs_triees) - 1, int(round(fraction * len(valeurs_triees) + 0.5)) - 1))
+    return valeurs_triees[rang]
+
+
+def mesurer(nom, fonction, questions, repetitions, avant_appel=None):
+    """
+    Mesure une fonction appelée sur chaque question, `repetitions` fois, après une passe d'échauffement.
+    Une passe supplémentaire sous tracemalloc mesure la mémoire (hors chronométrage).
+
+    Args:
+        nom (str): Nom du scénario
+        fonction (callable): Fonction appelée avec une question
+        questions (list): Questions à rejouer
+        repetitions (int): Nombre de passes chronométrées
+        avant_appel (callable): Fonction appelée avant chaque appel, hors chronométrage
+
+    Returns:
+        dict: Statistiques du scénario
+    """
+    for question in questions:
+        if avant_appel:
+            avant_appel()
+        fonction(question)
+
+    durees = []
+    horloge = time.perf_counter_ns
+    for _ in range(repetitions):
+        for question in questions:
+            if avant_appel:
+                avant_appel()
+            debut = horloge()
+            fonction(question)
+            durees.append(horloge() - debut)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    avant = tracemalloc.take_snapshot()
+    for question in questions:
+        if avant_appel:
+            avant_appel()
+        fonction(question)
+    pic = tracemalloc.get_traced_memory()[1]
+    apres = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    differences = apres.compare_to(avant, "filename")
+    blocs_retenus = sum(difference.count_diff for difference in differences)
+    octets_retenus = sum(difference.size_diff for difference in differences)
+
+    durees.sort()
+    total = sum(durees) / 1e9
+    return {
+        "scenario": nom,
+        "operations": len(durees),
+        "ops_par_seconde": round(len(durees) / total, 1) if total else None,
+        "moyenne_us": round(total * 1e6 / len(durees), 2) if durees else None,
+        "p50_us": round(percentile(durees, 0.50) / 1000, 2),
+        "p95_us": round(percentile(durees, 0.95) / 1000, 2),
+        "p99_us": round(percentile(durees, 0.99) / 1000, 2),
+        "max_us": round(durees[-1] / 1000, 2) if durees else None,
+        "memoire_pic_kio": round(pic / 1024, 1),
+        "blocs_retenus_par_operation": round(blocs_retenus / len(questions), 2) if questions else 0,
+        "octets_retenus_par_operation": round(octets_retenus / len(questions), 1) if questions else 0,
+    }
+
+
+def mesurer_precision(corpus, classer):
+    """
+    Compare l'intention détectée à l'intention archivée pour chaque question étiquetée.
+
+    Returns:
+        dict: Précision globale, par intention, et premières erreurs
+    """
+    par_intention = {}
+    erreurs = []
+    for question, attendue in corpus:
+        if not attendue:
+            continue
+        obtenue = classer(question)[0]
+        stats = par_intention.setdefault(attendue, {"total": 0, "justes": 0})
+        stats["total"] += 1
+        if obtenue == attendue:
+            stats["justes"] += 1
+        elif len(erreurs) < 25:
+            erreurs.append({"question": question, "attendue": attendue, "obtenue": obtenue})
+
+    total = sum(stats["total"] for stats in par_intention.values())
+    justes = sum(stats["justes"] for stats in par_intention.values())
+    for stats in par_intention.values():
+        stats["precision"] = round(stats["justes"] / stats["total"], 4)
+    return {
+        "total": total,
+        "justes": justes,
+        "precision": round(justes / total, 4) if total else None,
+        "par_intention": dict(sorted(par_intention.items())),
+        "erreurs": erreurs,
+    }
+
+
+# Villes attendues pour des questions météo délicates (noms composés, mots de temps, fautes de frappe) ;
+# None : aucune ville ne doit être extraite
+VILLES_ATTENDUES = [
+    ("donne moi la météo de Maizières les Metz", "Maizières Les Metz"),
+    ("Quelle est la météo à Paris aujourd'hui ?", "Paris"),
+    ("Va-t-il pleuvoir à Bordeaux demain ?", "Bordeaux"),
+    ("Pleut-il à Lille actuellement ?", "Lille"),
+    ("quelle température à Aix-en-Provence ?", "Aix-en-Provence"),
+    ("quel temps fait-il à New York ?", "New York"),
+    ("météo de la Rochelle", "La Rochelle"),
+    ("météo à Parius", "Paris"),
+    # Vraies villes absentes de l'index, à ne pas corriger en une ville connue au nom voisin
+    ("Quelle est la météo à Cannes ?", "Cannes"),
+    ("météo à Vannes", "Vannes"),
+    ("quel temps fait-il à Bâle ?", "Bâle"),
+    ("Météo du jour Paris", "Paris"),
+    ("météo de ce week-end Paris", "Paris"),
+    ("Quel temps à Sarlat demain ?", "Sarlat"),
+    ("Quelle météo pour demain ?", None),
+    ("Y aura-t-il de la pluie ce soir à Brive ?", "Brive"),
+]
+
+# Villes attendues de MeteoService.extraire_nom_ville (noms non corrigés : la correction des
+# fautes de frappe n'intervient qu'après le géocodage)
+VILLES_ATTENDUES_SERVICE = [
+    ("Météo du jour Paris", "Paris"),
+    ("météo de ce week-end Paris", "Paris"),
+    ("Quelle est la météo à Cannes ?", "Cannes"),
+    ("donne moi la météo de Maizières les Metz", "Maizières Les Metz"),
+    ("météo à Maizières Les Metz", "Maizières Les Metz"),
+    ("Quelle est la météo à Paris aujourd'hui ?", "Paris"),
+    ("météo à Parius", "Parius"),
+    ("Quel temps à Sarlat demain ?", "Sarlat"),
+    ("Quelle météo pour demain ?", None),
+    ("Y aura-t-il de la pluie ce soir à Brive ?", "Brive"),
+]
+
+
+def mesurer_villes(extraire, cas):
+    """
+    Compare la ville extraite à la ville attendue pour chaque question.
+
+    Args:
+        extraire (callable): Fonction d'extraction de la ville
+        cas (list): Tuples (question, ville attendue)
+
+    Returns:
+        dict: Nombre de villes justes et écarts constatés
+    """
+    erreurs = []
+    for question, attendue in cas:
+        obtenue = extraire(question)
+        if obtenue != attendue:
+            erreurs.append({"question": question, "attendue": attendue, "obtenue": obtenue})
+    return {"total": len(cas), "justes": len(cas) - len(erreurs), "erreurs": erreurs}
+
+
+def version_code():
+    """Retourne le commit git courant, ou None hors dépôt git."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=DOSSIER_PROJET,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparer(resultats, chemin_reference):
+    """Affiche l'évolution des scénarios par rapport à une exécution précédente."""
+    with open(chemin_reference, encoding="utf-8") as f:
+        reference = {scenario["scenario"]: scenario for scenario in json.load(f)["scenarios"]}
+
+    print(f"\nComparaison avec {chemin_reference}")
+    for scenario in resultats["scenarios"]:
+        ancien = reference.get(scenario["scenario"])
+        if not ancien:
+            continue
+        evolutions = []
+        for cle in ("ops_par_seconde", "p50_us", "p99_us"):
+            if ancien.get(cle) and scenario.get(cle):
+                evolutions.append(f"{cle} {(scenario[cle] / ancien[cle] - 1) * 100:+.1f}%")
+        print(f"  {scenario['scenario']:<40} " + ", ".join(evolutions))
+
+
+def main():
+    """Point d'entrée en ligne de commande."""
+    parser = argparse.ArgumentParser(description="Banc d'essai du moteur NLP (réseau simulé).")
+    parser.add_argument("--repetitions", type=int, default=5, help="Nombre de passes chronométrées par scénario")
+    parser.add_argument("--synthetiques", type=int, default=20, help="Questions synthétiques par famille")
+    parser.add_argument("--graine", type=int, default=42, help="Graine des questions synthétiques et des réponses")
+    parser.add_argument("--sortie", help="Fichier JSON des résultats (outils/resultats/ par défaut)")
+    parser.add_argument("--comparer", help="Fichier JSON d'une exécution précédente")
+    parser.add_argument("--cassette", help="Réponses Open-Meteo enregistrées à rejouer (voir client_http.Cassette)")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    # Cache de géocodage en mémoire et pas de rafraîchissement planifié : chaque exécution part du même état
+    os.environ.setdefault("CINDY_GEOCODAGE_CACHE", ":memory:")
+    os.environ.setdefault("CINDY_METEO_VILLES_SUIVIES", "0")
+    if args.cassette:
+        os.environ["CINDY_HTTP_CASSETTE"] = args.cassette
+        os.environ["CINDY_HTTP_CASSETTE_MODE"] = "relecture"
+    else:
+        simuler_reseau()
+    random.seed(args.graine)
+
+    import nlp_engine
+    from external_services import MeteoService
+
+    nlp_engine.initialiser()
+    service = MeteoService()
+    vider_cache = nlp_engine.cache_intentions.vider
+
+    corpus = charger_corpus()
+    questions = [question for question, _ in corpus]
+    synthetiques = generer_questions_synthetiques(corpus, args.synthetiques, args.graine)
+    questions_synthetiques = [question for _, question in synthetiques]
+
+    scenarios = [
+        ("determiner_intention (corpus, sans cache)", nlp_engine.determiner_intention, questions, vider_cache),
+        ("determiner_intention (corpus, cache chaud)", nlp_engine.determiner_intention, questions, None),
+        ("determiner_intention (synthétiques)", nlp_engine.determiner_intention, questions_synthetiques, vider_cache),
+        ("extraire_nom_ville (corpus)", service.extraire_nom_ville, questions, None),
+        ("extraire_nom_ville (synthétiques)", service.extraire_nom_ville, questions_synthetiques, None),
+        ("analyser_et_repondre (corpus)", nlp_engine.analyser_et_repondre, questions, None),
+    ]
+
+    resultats = {
+        "horodatage": datetime.now().isoformat(timespec="seconds"),
+        "commit": version_code(),
+        "python": platform.python_version(),
+        "plateforme": platform.platform(),
+        "parametres": vars(args),
+        "corpus": {"questions": len(questions), "synthetiques": len(questions_synthetiques)},
+        "scenarios": [],
+    }
+
+    print(f"Corpus: {len(questions)} questions, {len(questions_synthetiques)} synthétiques, {args.repetitions} passes")
+    print(f"\n{'scénario':<45} {'ops/s':>10} {'p50 µs':>9} {'p95 µs':>9} {'p99 µs':>9} {'pic Kio':>9}")
+    for nom, fonction, jeu, avant_appel in scenarios:
+        statistiques = mesurer(nom, fonction, jeu, args.repetitions, avant_appel)
+        resultats["scenarios"].append(statistiques)
+        print(f"{nom:<45} {statistiques['ops_par_seconde']:>10} {statistiques['p50_us']:>9} "
+              f"{statistiques['p95_us']:>9} {statistiques['p99_us']:>9} {statistiques['memoire_pic_kio']:>9}")
+
+    vider_cache()
+    resultats["precision"] = mesurer_precision(corpus, nlp_engine.determiner_intention)
+    precision = resultats["precision"]
+    print(f"\nPrécision des intentions: {precision['justes']}/{precision['total']} ({precision['precision']:.1%})")
+    resultats["villes"] = mesurer_villes(nlp_engine.extraire_ville_question, VILLES_ATTENDUES)
+    resultats["villes_service"] = mesurer_villes(service.extraire_nom_ville, VILLES_ATTENDUES_SERVICE)
+    for cle, libelle in (("villes", "Villes extraites"), ("villes_service", "Villes extraites (service météo)")):
+        print(f"{libelle}: {resultats[cle]['justes']}/{resultats[cle]['total']}")
+        for erreur in resultats[cle]["erreurs"]:
+            print(f"  {erreur['question']!r}: {erreur['obtenue']!r} au lieu de {erreur['attendue']!r}")
+
+    sortie = args.sortie or os.path.join(DOSSIER_RESULTATS, f"benchmark_{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(sortie) or ".", exist_ok=True)
+    with open(sortie, "w", encoding="utf-8") as f:
+        json.dump(resultats, f, ensure_ascii=False, indent=2)
+    print(f"Résultats enregistrés dans {sortie}")
+
+    if args.comparer:
+        comparer(resultats, args.comparer)
+
+
+if __name__ == "__main__":
+    main()
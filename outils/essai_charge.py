@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Essai de charge de bout en bout de l'agent Cindy.
+Lance un faux service Open-Meteo (latence et erreurs injectables), démarre l'application
+(gunicorn ou serveur Flask) pointée sur ce faux service, puis envoie des POST /question
+en parallèle selon un mélange de questions configurable.
+
+Utilisation :
+    python outils/essai_charge.py --concurrence 16 --duree 30 --workers 4 --latence-ms 120 --taux-erreur 0.02
+    python outils/essai_charge.py --url http://127.0.0.1:5000 --requetes 2000   # application déjà lancée
+    python outils/essai_charge.py --cassette outils/cassettes/charge.json --enregistrer   # enregistrer les réponses
+    python outils/essai_charge.py --cassette outils/cassettes/charge.json   # les rejouer, sans faux service ni réseau
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+import platform
+import tempfile
+import itertools
+import threading
+import subprocess
+import importlib.util
+from datetime import datetime
+
+import requests
+
+DOSSIER_PROJET = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from faux_open_meteo import FauxOpenMeteo
+
+CHEMIN_INTERACTIONS = os.path.join(DOSSIER_PROJET, "archives", "data", "interactions.json")
+CHEMIN_MOTIFS = os.path.join(DOSSIER_PROJET, "archives", "data", "motifs_questions.json")
+CHEMIN_VILLES = os.path.join(DOSSIER_PROJET, "data", "villes.json")
+
+# Villes absentes de data/villes.json, pour solliciter le géocodage
+VILLES_INCONNUES = ("Sarlat", "Rocamadour", "Gordes", "Sancerre", "Collonges", "Brantome", "Uzes", "Conques")
+MODELES_METEO = ("Quel temps fait-il à {} ?", "Quelle est la météo à {} ?", "Est-ce qu'il pleut à {} ?",
+                 "Quelle température à {} ?", "Fait-il beau à {} ?")
+
+MELANGE_PAR_DEFAUT = "corpus=0.6,meteo_ville=0.3,meteo_geocodage=0.1"
+
+
+def charger_groupes():
+    """
+    Construit les groupes de questions disponibles pour le mélange.
+
+    Returns:
+        dict: nom du groupe -> liste de questions. "corpus" contient toutes les questions archivées,
+            chaque intention archivée forme aussi son propre groupe.
+    """
+    groupes = {}
+    with open(CHEMIN_INTERACTIONS, encoding="utf-8") as f:
+        for element in json.load(f):
+            if element.get("question"):
+                groupes.setdefault(element.get("intention") or "inconnu", []).append(element["question"])
+    with open(CHEMIN_MOTIFS, encoding="utf-8") as f:
+        for intention, questions in json.load(f).items():
+            groupes.setdefault(intention, []).extend(questions)
+    groupes["corpus"] = [question for questions in list(groupes.values()) for question in questions]
+
+    with open(CHEMIN_VILLES, encoding="utf-8") as f:
+        villes = [ville["nom"] for ville in json.load(f)["villes"]]
+    groupes["meteo_ville"] = [modele.format(ville) for modele in MODELES_METEO for ville in villes]
+    groupes["meteo_geocodage"] = [modele.format(ville) for modele in MODELES_METEO for ville in VILLES_INCONNUES]
+    return groupes
+
+
+def lire_melange(valeur, groupes):
+    """
+    Lit un mélange de la forme "corpus=0.6,meteo_ville=0.4".
+
+    Returns:
+        tuple: (noms des groupes, poids)
+    """
+    noms, poids = [], []
+    for element in valeur.split(","):
+        nom, _, fraction = element.partition("=")
+        nom = nom.strip()
+        if nom not in groupes:
+            raise SystemExit(f"Groupe inconnu dans le mélange: {nom} (disponibles: {', '.join(sorted(groupes))})")
+        noms.append(nom)
+        poids.append(float(fraction or 1))
+    return noms, poids
+
+
+def port_libre():
+    """Retourne un port TCP libre sur l'interface locale."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def lancer_application(serveur, port, workers, threads, url_faux_service, journal, environnement=None):
+    """
+    Démarre l'application dans un processus séparé, pointée sur le faux service.
+
+    Args:
+        url_faux_service (str): Adresse du faux service, ou None (relecture d'une cassette)
+        environnement (dict): Variables d'environnement supplémentaires de l'application
+
+    Returns:
+        subprocess.Popen: Le processus de l'application
+    """
+    env = dict(os.environ)
+    if url_faux_service:
+        env["CINDY_METEO_URL"] = f"{url_faux_service}/v1/forecast"
+        env["CINDY_GEOCODAGE_URL"] = f"{url_faux_service}/v1/search"
+    env.update(environnement or {})
+    env.update({
+        "CINDY_LOG_FICHIER": env.get("CINDY_LOG_FICHIER", os.devnull),
+        # Cache de géocodage vide à chaque essai (partagé par les workers de l'essai)
+        "CINDY_GEOCODAGE_CACHE": env.get("CINDY_GEOCODAGE_CACHE",
+                                         os.path.join(tempfile.mkdtemp(prefix="cindy-charge-"), "geocodage.sqlite3")),
+        "PORT": str(port),
+    })
+    if serveur == "gunicorn":
+        commande = [sys.executable, "-m", "gunicorn", "-w", str(workers), "--threads", str(threads),
+                    "-b", f"127.0.0.1:{port}", "wsgi:app"]
+    else:
+        commande = [sys.executable, "app.py"]
+    sortie = open(journal, "ab") if journal else subprocess.DEVNULL
+    return subprocess.Popen(commande, cwd=DOSSIER_PROJET, env=env, stdout=sortie, stderr=subprocess.STDOUT)
+
+
+def attendre_application(url, processus=None, delai=60):
+    """Attend que l'application réponde sur / (échoue si le processus s'arrête ou si le délai expire)."""
+    limite = time.monotonic() + delai
+    while time.monotonic() < limite:
+        if processus is not None and processus.poll() is not None:
+            raise SystemExit(f"L'application s'est arrêtée au démarrage (code {processus.returncode})")
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"L'application ne répond pas sur {url} après {delai} s")
+
+
+def percentile(valeurs_triees, fraction):
+    """Percentile par rang le plus proche d'une liste triée."""
+    if not valeurs_triees:
+        return 0.0
+    rang = max(0, min(len(valeurs_triees) - 1, int(round(fraction * len(valeurs_triees) + 0.5)) - 1))
+    return valeurs_triees[rang]
+
+
+def resumer_latences(durees):
+    """Percentiles d'une liste de durées (secondes), en millisecondes."""
+    durees = sorted(durees)
+    return {
+        "requetes": len(durees),
+        "p50_ms": round(percentile(durees, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(durees, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(durees, 0.99) * 1000, 2),
+        "max_ms": round(durees[-1] * 1000, 2) if durees else 0.0,
+    }
+
+
+def envoyer(session, url, question, delai):
+    """
+    Envoie une question et classe le résultat.
+
+    Returns:
+        str: "ok", "degradee" (réponse d'excuse du service météo), "http_<statut>" ou le nom de l'exception
+    """
+    try:
+        reponse = session.post(f"{url}/question", json={"question": question}, timeout=delai)
+    except requests.RequestException as e:
+        return type(e).__name__
+    if reponse.status_code != 200:
+        return f"http_{reponse.status_code}"
+    texte = reponse.json().get("reponse", "")
+    if texte.startswith("Désolé,") and "météo" in texte:
+        return "degradee"
+    return "ok"
+
+
+def executer(url, groupes, noms, poids, concurrence, duree, nombre_requetes, delai, graine):
+    """
+    Envoie les questions en parallèle jusqu'à la fin de la durée ou du nombre de requêtes.
+
+    Returns:
+        tuple: (liste de tuples (groupe, catégorie, durée), durée réelle en secondes)
+    """
+    resultats = []
+    compteur = itertools.count()
+    fin = time.monotonic() + duree if duree else None
+
+    def client(indice):
+        aleatoire = random.Random(graine + indice)
+        session = requests.Session()
+        while True:
+            if fin is not None and time.monotonic() >= fin:
+                break
+            if nombre_requetes and next(compteur) >= nombre_requetes:
+                break
+            groupe = aleatoire.choices(noms, poids)[0]
+            question = aleatoire.choice(groupes[groupe])
+            debut = time.perf_counter()
+            categorie = envoyer(session, url, question, delai)
+            resultats.append((groupe, categorie, time.perf_counter() - debut))
+        session.close()
+
+    clients = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrence)]
+    debut = time.perf_counter()
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    return resultats, time.perf_counter() - debut
+
+
+def main():
+    """Point d'entrée en ligne de commande."""
+    parser = argparse.ArgumentParser(description="Essai de charge de POST /question contre un faux Open-Meteo.")
+    application = parser.add_argument_group("application")
+    application.add_argument("--url", help="Application déjà lancée (sinon elle est démarrée par l'essai)")
+    application.add_argument("--serveur", choices=("gunicorn", "flask"),
+                             default="gunicorn" if importlib.util.find_spec("gunicorn") else "flask")
+    application.add_argument("--workers", type=int, default=2, help="Workers gunicorn")
+    application.add_argument("--threads", type=int, default=1, help="Threads par worker gunicorn")
+    application.add_argument("--journal-serveur", help="Fichier recevant la sortie de l'application")
+
+    charge = parser.add_argument_group("charge")
+    charge.add_argument("--concurrence", type=int, default=8, help="Clients simultanés")
+    charge.add_argument("--duree", type=float, default=20.0, help="Durée de l'essai en secondes (0 : illimitée)")
+    charge.add_argument("--requetes", type=int, default=0, help="Nombre maximal de requêtes (0 : illimité)")
+    charge.add_argument("--echauffement", type=int, default=20, help="Requêtes envoyées avant la mesure")
+    charge.add_argument("--melange", default=MELANGE_PAR_DEFAUT, help="Poids des groupes de questions")
+    charge.add_argument("--delai-client", type=float, default=30.0, help="Délai maximal d'une requête (s)")
+    charge.add_argument("--graine", type=int, default=42)
+
+    faux = parser.add_argument_group("faux Open-Meteo (démarré par l'essai)")
+    faux.add_argument("--latence-ms", type=float, default=50.0)
+    faux.add_argument("--gigue-ms", type=float, default=20.0)
+    faux.add_argument("--taux-erreur", type=float, default=0.0, help="Part des réponses en erreur 503")
+    faux.add_argument("--taux-coupure", type=float, default=0.0, help="Part des connexions coupées")
+
+    cassette = parser.add_argument_group("cassette (réponses Open-Meteo enregistrées)")
+    cassette.add_argument("--cassette", help="Rejoue les réponses de ce fichier, sans faux service ni réseau "
+                                             "(latence simulée : --latence-ms)")
+    cassette.add_argument("--enregistrer", action="store_true",
+                          help="Enregistre dans --cassette les réponses du faux service")
+
+    parser.add_argument("--sortie", help="Fichier JSON des résultats")
+    args = parser.parse_args()
+    if not args.duree and not args.requetes:
+        parser.error("--duree ou --requetes doit être non nul")
+    if args.enregistrer and not args.cassette:
+        parser.error("--enregistrer nécessite --cassette")
+
+    groupes = charger_groupes()
+    noms, poids = lire_melange(args.melange, groupes)
+
+    environnement = {}
+    faux_service = None
+    if args.cassette:
+        environnement = {
+            "CINDY_HTTP_CASSETTE": os.path.abspath(args.cassette),
+            "CINDY_HTTP_CASSETTE_MODE": "enregistrement" if args.enregistrer else "relecture",
+            "CINDY_HTTP_CASSETTE_LATENCE_MS": str(args.latence_ms),
+        }
+    if not args.cassette or args.enregistrer:
+        faux_service = FauxOpenMeteo(latence=args.latence_ms / 1000, gigue=args.gigue_ms / 1000,
+                                     taux_erreur=args.taux_erreur, taux_coupure=args.taux_coupure).demarrer()
+    processus = None
+    url = args.url
+    if not url:
+        port = port_libre()
+        url = f"http://127.0.0.1:{port}"
+        processus = lancer_application(args.serveur, port, args.workers, args.threads,
+                                       faux_service.url if faux_service else None, args.journal_serveur,
+                                       environnement)
+    try:
+        attendre_application(url, processus)
+        amont = f"faux Open-Meteo: {faux_service.url}" if faux_service else f"cassette: {args.cassette}"
+        if faux_service and args.cassette:
+            amont += f" (enregistré dans {args.cassette})"
+        print(f"Application: {url} ({'externe' if args.url else args.serveur}), {amont}")
+
+        if args.echauffement:
+            executer(url, groupes, noms, poids, min(args.concurrence, args.echauffement), 0,
+                     args.echauffement, args.delai_client, args.graine + 1000)
+        avant = dict(faux_service.compteurs) if faux_service else {}
+
+        resultats, duree_reelle = executer(url, groupes, noms, poids, args.concurrence, args.duree,
+                                           args.requetes, args.delai_client, args.graine)
+    finally:
+        if processus is not None:
+            processus.terminate()
+            try:
+                processus.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                processus.kill()
+        if faux_service:
+            faux_service.shutdown()
+
+    categories = {}
+    for _, categorie, _ in resultats:
+        categories[categorie] = categories.get(categorie, 0) + 1
+    par_groupe = {
+        groupe: resumer_latences([duree for nom, _, duree in resultats if nom == groupe])
+        for groupe in noms
+    }
+
+    rapport = {
+        "horodatage": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "parametres": vars(args),
+        "duree_s": round(duree_reelle, 2),
+        "debit_rps": round(len(resultats) / duree_reelle, 1) if duree_reelle else None,
+        "latences": resumer_latences([duree for _, _, duree in resultats]),
+        "par_groupe": par_groupe,
+        "resultats": dict(sorted(categories.items())),
+        "faux_service": ({cle: valeur - avant.get(cle, 0) for cle, valeur in faux_service.compteurs.items()}
+                         if faux_service else None),
+    }
+
+    latences = rapport["latences"]
+    print(f"\n{len(resultats)} requêtes en {rapport['duree_s']} s : {rapport['debit_rps']} req/s")
+    print(f"Latence : p50 {latences['p50_ms']} ms, p95 {latences['p95_ms']} ms, "
+          f"p99 {latences['p99_ms']} ms, max {latences['max_ms']} ms")
+    print(f"\n{'groupe':<20} {'requêtes':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for groupe, stats in par_groupe.items():
+        print(f"{groupe:<20} {stats['requetes']:>9} {stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}")
+    print("\nRésultats : " + ", ".join(f"{categorie}={nombre}" for categorie, nombre in rapport["resultats"].items()))
+    if faux_service:
+        print("Faux Open-Meteo : " + ", ".join(f"{cle}={valeur}" for cle, valeur in rapport["faux_service"].items()))
+
+    if args.sortie:
+        os.makedirs(os.path.dirname(os.path.abspath(args.sortie)), exist_ok=True)
+        with open(args.sortie, "w", encoding="utf-8") as f:
+            json.dump(rapport, f, ensure_ascii=False, indent=2)
+        print(f"Résultats enregistrés dans {args.sortie}")
+
+
+if __name__ == "__main__":
+    main()
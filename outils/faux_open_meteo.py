@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Faux service Open-Meteo (prévisions et géocodage) pour les essais de charge.
+Les réponses sont déterministes ; la latence et les erreurs sont injectables.
+
+Utilisation autonome :
+    python outils/faux_open_meteo.py --port 8900 --latence-ms 80 --taux-erreur 0.05
+
+Puis lancer l'application avec :
+    CINDY_METEO_URL=http://127.0.0.1:8900/v1/forecast
+    CINDY_GEOCODAGE_URL=http://127.0.0.1:8900/v1/search
+"""
+
+import json
+import time
+import zlib
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class GestionnaireOpenMeteo(BaseHTTPRequestHandler):
+    """Répond aux routes /v1/forecast et /v1/search comme le ferait Open-Meteo."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        serveur = self.server
+        adresse = urlparse(self.path)
+        params = {cle: valeurs[0] for cle, valeurs in parse_qs(adresse.query).items()}
+        serveur.compter("requetes")
+
+        delai = serveur.latence + random.uniform(0, serveur.gigue)
+        if delai > 0:
+            time.sleep(delai)
+
+        tirage = random.random()
+        if tirage < serveur.taux_coupure:
+            # Fermer la connexion sans répondre (le client reçoit une erreur de connexion)
+            serveur.compter("coupures")
+            self.close_connection = True
+            return
+        if tirage < serveur.taux_coupure + serveur.taux_erreur:
+            serveur.compter("erreurs")
+            self.repondre(503, {"error": True, "reason": "Erreur injectée par le faux service"})
+            return
+
+        if adresse.path.endswith("/forecast"):
+            self.repondre(200, self.prevision(params))
+        elif adresse.path.endswith("/search"):
+            self.repondre(200, self.geocodage(params))
+        else:
+            self.repondre(404, {"error": True, "reason": "Route inconnue"})
+
+    @classmethod
+    def prevision(cls, params):
+        """Conditions actuelles (et prévisions, si demandées) déterministes, calculées à partir des coordonnées."""
+        latitudes = params.get("latitude", "48.85").split(",")
+        longitudes = params.get("longitude", "2.35").split(",")
+        reponses = []
+        for latitude, longitude in zip(latitudes, longitudes):
+            graine = zlib.crc32(f"{latitude},{longitude}".encode("utf-8"))
+            temperature = round(5 + graine % 25 + (graine % 10) / 10, 1)
+            reponse = {
+                "latitude": float(latitude),
+                "longitude": float(longitude),
+                "utc_offset_seconds": 0,
+                "current": {
+                    "time": time.strftime("%Y-%m-%dT%H:%M"),
+                    "temperature_2m": temperature,
+                    "relative_humidity_2m": 40 + graine % 50,
+                    "apparent_temperature": round(temperature - 1.5, 1),
+                    "weather_code": (0, 1, 2, 3, 45, 61, 63, 71, 80, 95)[graine % 10],
+                    "wind_speed_10m": round(graine % 40 + 0.5, 1)
+                }
+            }
+            if "hourly" in params or "daily" in params:
+                reponse.update(cls.series(graine, temperature, params))
+            reponses.append(reponse)
+        # Open-Meteo retourne une liste quand plusieurs coordonnées sont demandées
+        return reponses[0] if len(reponses) == 1 else reponses
+
+    @staticmethod
+    def series(graine, temperature, params):
+        """Prévisions horaires et quotidiennes (heure UTC) à partir de minuit, sur forecast_days jours."""
+        jours = int(params.get("forecast_days", 7))
+        minuit = int(time.time()) // 86400 * 86400
+        heures = [minuit + 3600 * h for h in range(24 * jours)]
+        # Maximum à midi, minimum à minuit ; le temps change toutes les six heures
+        temperatures = [round(temperature + 4 - abs(12 - h % 24) * 2 / 3, 1) for h in range(24 * jours)]
+        codes = [(0, 1, 2, 3, 45, 61, 63, 71, 80, 95)[(graine + h // 6) % 10] for h in range(24 * jours)]
+        probabilites = [70 + graine % 30 if code >= 61 else graine % 25 for code in codes]
+        pluies = [round(probabilite / 50, 1) if code >= 61 else 0.0 for probabilite, code in zip(probabilites, codes)]
+        horodatages = [minuit + 86400 * j for j in range(jours)]
+        if params.get("timeformat") != "unixtime":
+            heures = [time.strftime("%Y-%m-%dT%H:%M", time.gmtime(t)) for t in heures]
+            horodatages = [time.strftime("%Y-%m-%d", time.gmtime(t)) for t in horodatages]
+        heures_du_jour = [range(24 * j, 24 * (j + 1)) for j in range(jours)]
+        return {
+            "hourly": {
+                "time": heures,
+                "temperature_2m": temperatures,
+                "precipitation_probability": probabilites,
+                "precipitation": pluies,
+                "weather_code": codes
+            },
+            "daily": {
+                "time": horodatages,
+                "weather_code": [max(codes[h] for h in jour) for jour in heures_du_jour],
+                "temperature_2m_max": [max(temperatures[h] for h in jour) for jour in heures_du_jour],
+                "temperature_2m_min": [min(temperatures[h] for h in jour) for jour in heures_du_jour],
+                "precipitation_probability_max": [max(probabilites[h] for h in jour) for jour in heures_du_jour],
+                "precipitation_sum": [round(sum(pluies[h] for h in jour), 1) for jour in heures_du_jour]
+            }
+        }
+
+    @staticmethod
+    def geocodage(params):
+        """Une ville fictive pour tout nom, sauf ceux commençant par "inconnu"."""
+        nom = params.get("name", "")
+        if not nom or nom.lower().startswith("inconnu"):
+            return {"generationtime_ms": 0.1}
+        graine = zlib.crc32(nom.lower().encode("utf-8"))
+        return {"results": [{
+            "name": nom.title(),
+            "country": "France",
+            "latitude": round(42 + (graine % 900) / 100, 4),
+            "longitude": round(-4 + (graine // 900 % 1200) / 100, 4)
+        }]}
+
+    def repondre(self, statut, donnees):
+        corps = json.dumps(donnees).encode("utf-8")
+        self.send_response(statut)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def log_message(self, format, *args):
+        # Silencieux : des milliers de requêtes par seconde pendant un essai de charge
+        pass
+
+
+class FauxOpenMeteo(ThreadingHTTPServer):
+    """Serveur HTTP multi-thread avec latence et erreurs injectables."""
+
+    daemon_threads = True
+
+    def __init__(self, adresse=("127.0.0.1", 0), latence=0.0, gigue=0.0, taux_erreur=0.0, taux_coupure=0.0):
+        """
+        Args:
+            adresse (tuple): Hôte et port d'écoute (port 0 : choisi par le système)
+            latence (float): Délai fixe ajouté à chaque réponse, en secondes
+            gigue (float): Délai aléatoire supplémentaire (uniforme entre 0 et gigue), en secondes
+            taux_erreur (float): Part des requêtes qui reçoivent une erreur HTTP 503
+            taux_coupure (float): Part des requêtes dont la connexion est fermée sans réponse
+        """
+        super().__init__(adresse, GestionnaireOpenMeteo)
+        self.latence = latence
+        self.gigue = gigue
+        self.taux_erreur = taux_erreur
+        self.taux_coupure = taux_coupure
+        self.compteurs = {"requetes": 0, "erreurs": 0, "coupures": 0}
+        self.verrou = threading.Lock()
+
+    @property
+    def url(self):
+        """Adresse de base du faux service (http://hôte:port)."""
+        hote, port = self.server_address[:2]
+        return f"http://{hote}:{port}"
+
+    def compter(self, cle):
+        with self.verrou:
+            self.compteurs[cle] += 1
+
+    def demarrer(self):
+        """Sert les requêtes dans un thread en arrière-plan et retourne le serveur."""
+        threading.Thread(target=self.serve_forever, name="faux-open-meteo", daemon=True).start()
+        return self
+
+
+def main():
+    """Point d'entrée en ligne de commande : lance le faux service au premier plan."""
+    parser = argparse.ArgumentParser(description="Faux service Open-Meteo pour les essais de charge.")
+    parser.add_argument("--hote", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latence-ms", type=float, default=0.0, help="Latence fixe ajoutée à chaque réponse")
+    parser.add_argument("--gigue-ms", type=float, default=0.0, help="Latence aléatoire supplémentaire maximale")
+    parser.add_argument("--taux-erreur", type=float, default=0.0, help="Part des réponses en erreur 503")
+    parser.add_argument("--taux-coupure", type=float, default=0.0, help="Part des connexions coupées sans réponse")
+    args = parser.parse_args()
+
+    serveur = FauxOpenMeteo((args.hote, args.port), args.latence_ms / 1000, args.gigue_ms / 1000,
+                            args.taux_erreur, args.taux_coupure)
+    print(f"Faux Open-Meteo sur {serveur.url} (prévisions: /v1/forecast, géocodage: /v1/search)")
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nArrêt. Compteurs: {serveur.compteurs}")
+
+
+if __name__ == "__main__":
+    main()
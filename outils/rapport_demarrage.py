@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rapport du temps d'import de l'application (démarrage à froid de wsgi:app).
+Lance un interpréteur neuf avec `python -X importtime`, agrège la sortie et
+compare le temps total au budget fixé.
+
+Utilisation :
+    python outils/rapport_demarrage.py --budget-ms 800 --top 15
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+DOSSIER_PROJET = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BUDGET_PAR_DEFAUT = float(os.environ.get("CINDY_BUDGET_DEMARRAGE_MS", 1000))
+
+
+def mesurer_import(module="wsgi"):
+    """
+    Importe un module dans un interpréteur neuf et retourne les mesures de -X importtime.
+
+    Args:
+        module (str): Module à importer
+
+    Returns:
+        list: Liste de tuples (module, temps propre en µs, temps cumulé en µs, profondeur)
+    """
+    env = dict(os.environ)
+    # Le rapport ne doit pas écrire dans le journal de l'application
+    env.setdefault("CINDY_LOG_FICHIER", os.devnull)
+    resultat = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=DOSSIER_PROJET, env=env, capture_output=True, text=True
+    )
+    if resultat.returncode != 0:
+        raise RuntimeError(f"L'import de {module} a échoué:\n{resultat.stderr}")
+
+    mesures = []
+    for ligne in resultat.stderr.splitlines():
+        if not ligne.startswith("import time:") or "self [us]" in ligne:
+            continue
+        propre, cumule, nom = ligne[len("import time:"):].split("|", 2)
+        profondeur = (len(nom) - len(nom.lstrip())) // 2
+        mesures.append((nom.strip(), int(propre), int(cumule), profondeur))
+    return mesures
+
+
+def main():
+    """Point d'entrée en ligne de commande : affiche le rapport et échoue si le budget est dépassé."""
+    parser = argparse.ArgumentParser(description="Mesure le temps d'import de l'application.")
+    parser.add_argument("--module", default="wsgi", help="Module à importer (wsgi par défaut)")
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_PAR_DEFAUT,
+                        help="Budget de démarrage en millisecondes (CINDY_BUDGET_DEMARRAGE_MS)")
+    parser.add_argument("--top", type=int, default=15, help="Nombre de modules les plus lents affichés")
+    args = parser.parse_args()
+
+    mesures = mesurer_import(args.module)
+    total = sum(propre for _, propre, _, _ in mesures) / 1000
+
+    print(f"Import de {args.module}: {total:.1f} ms ({len(mesures)} modules), budget {args.budget_ms:.0f} ms")
+    print(f"\n{'module':<40} {'propre (ms)':>12} {'cumulé (ms)':>12}")
+    for nom, propre, cumule, _ in sorted(mesures, key=lambda m: m[2], reverse=True)[:args.top]:
+        print(f"{nom:<40} {propre / 1000:>12.1f} {cumule / 1000:>12.1f}")
+
+    if total > args.budget_ms:
+        print(f"\nBudget dépassé de {total - args.budget_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,14 @@ Ce fichier regroupe toutes les réponses possibles pour éviter les duplications
 et assurer la cohérence.
 """
 
+import re
+import random
+from functools import lru_cache
+from types import MappingProxyType
+
+# Marqueurs à remplacer dans les réponses : [HEURE], [DATE], [VILLE]...
+MARQUEUR_REGEX = re.compile(r"\[([A-Z_]+)\]")
+
 # Fonction pour personnaliser les réponses avec le nom de l'agent
 def obtenir_reponses(nom_agent="Cindy"):
     """
@@ -134,6 +142,186 @@ def obtenir_reponses(nom_agent="Cindy"):
         ]
     }
 
+class Gabarit:
+    """
+    Réponse pré-analysée : le texte est découpé une seule fois autour de ses marqueurs.
+    """
+    
+    __slots__ = ("texte", "morceaux", "variables")
+    
+    def __init__(self, texte):
+        """
+        Analyse le texte d'une réponse.
+        
+        Args:
+            texte (str): Texte de la réponse, avec d'éventuels marqueurs [NOM]
+        """
+        self.texte = texte
+        # Les indices pairs sont du texte fixe, les indices impairs des noms de marqueurs
+        self.morceaux = tuple(MARQUEUR_REGEX.split(texte))
+        self.variables = self.morceaux[1::2]
+    
+    def remplir(self, valeurs=None):
+        """
+        Remplace les marqueurs par les valeurs fournies ([VILLE] <- valeurs["ville"]).
+        Les marqueurs sans valeur sont laissés tels quels.
+        
+        Args:
+            valeurs (dict): Valeurs indexées par nom de marqueur en minuscules
+            
+        Returns:
+            str: La réponse complétée
+        """
+        if not self.variables or not valeurs:
+            return self.texte
+        morceaux = list(self.morceaux)
+        for i in range(1, len(morceaux), 2):
+            nom = morceaux[i].lower()
+            morceaux[i] = str(valeurs[nom]) if nom in valeurs else f"[{morceaux[i]}]"
+        return "".join(morceaux)
+    
+    def __str__(self):
+        return self.texte
+
+
+@lru_cache(maxsize=8)
+def obtenir_catalogue(nom_agent="Cindy"):
+    """
+    Compile une seule fois par nom d'agent le catalogue des réponses.
+    
+    Args:
+        nom_agent (str): Nom de l'agent à utiliser dans les réponses
+        
+    Returns:
+        MappingProxyType: Dictionnaire en lecture seule intention -> tuple de Gabarit
+    """
+    return MappingProxyType({
+        intention: tuple(Gabarit(texte) for texte in textes)
+        for intention, textes in obtenir_reponses(nom_agent).items()
+    })
+
+
+# Suggestions de questions par intention
+SUGGESTIONS = {
+    "salutation": [
+        "Quelle est la météo aujourd'hui ?",
+        "Quelle heure est-il ?",
+        "Raconte-moi une blague",
+        "Quel jour sommes-nous ?",
+        "Comment vas-tu ?",
+        "Qui t'a créé ?",
+        "Que sais-tu faire ?",
+        "C'est quoi Digital Factory ?",
+        "Parle-moi de Digital Factory",
+        "Comment fonctionnes-tu ?",
+        "Quelle est la météo à Nice ?",
+        "Dis-moi une blague drôle"
+    ],
+    "meteo": [
+        "Quelle heure est-il ?",
+        "Raconte-moi une blague",
+        "Comment vas-tu ?",
+        "Quelle est la météo à Paris ?",
+        "Quelle est la météo à Lyon ?",
+        "Quelle est la météo à Marseille ?",
+        "Quelle est la météo à Bordeaux ?",
+        "Qui es-tu ?",
+        "Parle-moi de Digital Factory"
+    ],
+    "heure": [
+        "Quelle est la météo aujourd'hui ?",
+        "Quel jour sommes-nous ?",
+        "Raconte-moi une blague",
+        "Qui t'a créé ?",
+        "Comment vas-tu ?",
+        "Quelle est la météo à Nice ?",
+        "Comment fonctionnes-tu ?",
+        "Parle-moi de Digital Factory"
+    ],
+    "date": [
+        "Quelle heure est-il ?",
+        "Quelle est la météo aujourd'hui ?",
+        "Raconte-moi une blague",
+        "Comment vas-tu ?",
+        "Qui t'a créé ?",
+        "Parle-moi de Digital Factory",
+        "Comment fonctionnes-tu ?",
+        "Que sais-tu faire ?"
+    ],
+    "identite": [
+        "Qui t'a créé ?",
+        "Comment fonctionnes-tu ?",
+        "Quel jour sommes-nous ?",
+        "Quelle heure est-il ?",
+        "Quelle est la météo aujourd'hui ?",
+        "Parle-moi de Digital Factory",
+        "Raconte-moi une blague",
+        "Que sais-tu faire ?"
+    ],
+    "createur": [
+        "Comment fonctionnes-tu ?",
+        "Quelle heure est-il ?",
+        "Raconte-moi une blague",
+        "Quelle est la météo aujourd'hui ?",
+        "Comment vas-tu ?",
+        "Parle-moi de Digital Factory",
+        "Que sais-tu faire ?"
+    ],
+    "capacites": [
+        "Raconte-moi une blague",
+        "Quelle est la météo aujourd'hui ?",
+        "Quelle heure est-il ?",
+        "Qui t'a créé ?",
+        "Comment fonctionnes-tu ?",
+        "Parle-moi de Digital Factory",
+        "Comment vas-tu ?"
+    ],
+    "fonctionnement": [
+        "Qui t'a créé ?",
+        "Quelle est la météo aujourd'hui ?",
+        "Quelle heure est-il ?",
+        "Raconte-moi une blague",
+        "Parle-moi de Digital Factory",
+        "Comment vas-tu ?",
+        "Que sais-tu faire ?"
+    ],
+    "blague": [
+        "Qui t'a créé ?",
+        "Comment fonctionnes-tu ?",
+        "Raconte-moi une autre blague",
+        "Quelle est la météo aujourd'hui ?",
+        "Quelle heure est-il ?",
+        "Comment vas-tu ?",
+        "Parle-moi de Digital Factory",
+        "Que sais-tu faire ?"
+    ],
+    "inconnu": [
+        "Quelle est la météo à Paris ?",
+        "Quelle heure est-il ?",
+        "Raconte-moi une blague",
+        "Comment vas-tu ?",
+        "Qui t'a créé ?",
+        "Comment fonctionnes-tu ?",
+        "C'est quoi Digital Factory ?",
+        "Parle-moi de Digital Factory",
+        "Que sais-tu faire ?"
+    ],
+    "digital_factory": [
+        "Qui t'a créé ?",
+        "Comment fonctionnes-tu ?",
+        "Quels services propose Digital Factory ?",
+        "Raconte-moi une blague",
+        "Quelle est la météo aujourd'hui ?",
+        "Quelle heure est-il ?",
+        "Comment vas-tu ?",
+        "Que sais-tu faire ?"
+    ]
+}
+
+# Version figée : tuples en lecture seule, construits une seule fois
+SUGGESTIONS = MappingProxyType({intention: tuple(questions) for intention, questions in SUGGESTIONS.items()})
+
+
 # Générer les suggestions en fonction de l'intention
 def obtenir_suggestions(intention="inconnu"):
     """
@@ -145,126 +333,11 @@ def obtenir_suggestions(intention="inconnu"):
     Returns:
         list: Liste de suggestions de questions
     """
-    suggestions = {
-        "salutation": [
-            "Quelle est la météo aujourd'hui ?",
-            "Quelle heure est-il ?",
-            "Raconte-moi une blague",
-            "Quel jour sommes-nous ?",
-            "Comment vas-tu ?",
-            "Qui t'a créé ?",
-            "Que sais-tu faire ?",
-            "C'est quoi Digital Factory ?",
-            "Parle-moi de Digital Factory",
-            "Comment fonctionnes-tu ?",
-            "Quelle est la météo à Nice ?",
-            "Dis-moi une blague drôle"
-        ],
-        "meteo": [
-            "Quelle heure est-il ?",
-            "Raconte-moi une blague",
-            "Comment vas-tu ?",
-            "Quelle est la météo à Paris ?",
-            "Quelle est la météo à Lyon ?",
-            "Quelle est la météo à Marseille ?",
-            "Quelle est la météo à Bordeaux ?",
-            "Qui es-tu ?",
-            "Parle-moi de Digital Factory"
-        ],
-        "heure": [
-            "Quelle est la météo aujourd'hui ?",
-            "Quel jour sommes-nous ?",
-            "Raconte-moi une blague",
-            "Qui t'a créé ?",
-            "Comment vas-tu ?",
-            "Quelle est la météo à Nice ?",
-            "Comment fonctionnes-tu ?",
-            "Parle-moi de Digital Factory"
-        ],
-        "date": [
-            "Quelle heure est-il ?",
-            "Quelle est la météo aujourd'hui ?",
-            "Raconte-moi une blague",
-            "Comment vas-tu ?",
-            "Qui t'a créé ?",
-            "Parle-moi de Digital Factory",
-            "Comment fonctionnes-tu ?",
-            "Que sais-tu faire ?"
-        ],
-        "identite": [
-            "Qui t'a créé ?",
-            "Comment fonctionnes-tu ?",
-            "Quel jour sommes-nous ?",
-            "Quelle heure est-il ?",
-            "Quelle est la météo aujourd'hui ?",
-            "Parle-moi de Digital Factory",
-            "Raconte-moi une blague",
-            "Que sais-tu faire ?"
-        ],
-        "createur": [
-            "Comment fonctionnes-tu ?",
-            "Quelle heure est-il ?",
-            "Raconte-moi une blague",
-            "Quelle est la météo aujourd'hui ?",
-            "Comment vas-tu ?",
-            "Parle-moi de Digital Factory",
-            "Que sais-tu faire ?"
-        ],
-        "capacites": [
-            "Raconte-moi une blague",
-            "Quelle est la météo aujourd'hui ?",
-            "Quelle heure est-il ?",
-            "Qui t'a créé ?",
-            "Comment fonctionnes-tu ?",
-            "Parle-moi de Digital Factory",
-            "Comment vas-tu ?"
-        ],
-        "fonctionnement": [
-            "Qui t'a créé ?",
-            "Quelle est la météo aujourd'hui ?",
-            "Quelle heure est-il ?",
-            "Raconte-moi une blague",
-            "Parle-moi de Digital Factory",
-            "Comment vas-tu ?",
-            "Que sais-tu faire ?"
-        ],
-        "blague": [
-            "Qui t'a créé ?",
-            "Comment fonctionnes-tu ?",
-            "Raconte-moi une autre blague",
-            "Quelle est la météo aujourd'hui ?",
-            "Quelle heure est-il ?",
-            "Comment vas-tu ?",
-            "Parle-moi de Digital Factory",
-            "Que sais-tu faire ?"
-        ],
-        "inconnu": [
-            "Quelle est la météo à Paris ?",
-            "Quelle heure est-il ?",
-            "Raconte-moi une blague",
-            "Comment vas-tu ?",
-            "Qui t'a créé ?",
-            "Comment fonctionnes-tu ?",
-            "C'est quoi Digital Factory ?",
-            "Parle-moi de Digital Factory",
-            "Que sais-tu faire ?"
-        ],
-        "digital_factory": [
-            "Qui t'a créé ?",
-            "Comment fonctionnes-tu ?",
-            "Quels services propose Digital Factory ?",
-            "Raconte-moi une blague",
-            "Quelle est la météo aujourd'hui ?",
-            "Quelle heure est-il ?",
-            "Comment vas-tu ?",
-            "Que sais-tu faire ?"
-        ]
-    }
+    suggestions = SUGGESTIONS
     
     # Si l'intention est connue, retourner un échantillon aléatoire de suggestions
     if intention in suggestions:
         # Prendre 3-4 suggestions aléatoires parmi celles disponibles
-        import random
         nombre_suggestions = random.randint(3, 4)
         return random.sample(suggestions[intention], min(nombre_suggestions, len(suggestions[intention])))
     
@@ -0,0 +1,330 @@
+"""
+Index des villes connues de l'agent Cindy.
+Ce module charge une seule fois par processus la liste des villes (data/villes.json) dans un
+index compact partagé par toutes les recherches ; un trie de mots permet de repérer une ville
+dans une question en un seul passage sur le texte.
+"""
+
+import os
+import re
+import sys
+import json
+import logging
+import threading
+from array import array
+
+from normalisation import QuestionNormalisee, decouper_mots
+
+# Configuration du logger
+logger = logging.getLogger('assistant_ia.villes')
+
+CHEMIN_VILLES = os.environ.get(
+    "CINDY_VILLES", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "villes.json")
+)
+
+# Clé réservée du trie qui porte le numéro de la ville terminant à ce nœud
+FIN = None
+
+# Mots qui introduisent un nom de lieu ("à Paris", "de Maizières-lès-Metz", "pour Lyon")
+PREPOSITIONS_LIEU = frozenset(["a", "au", "aux", "en", "de", "du", "d", "des", "pour", "sur", "dans", "vers", "chez"])
+
+# Expressions de temps et phénomènes météo qui ne font pas partie d'un nom de lieu
+# ("à Sarlat demain", "météo du jour Paris", "de la pluie demain") ; reconnues aussi sans
+# accents ni apostrophes, comme dans les mots d'une question normalisée
+EXPRESSIONS_HORS_LIEU = re.compile(
+    r"\b(?:apr[eè]s[-\s]demain|demain|aujourd['’\s]?hui|ce\s+soir|cette\s+nuit|ce\s+matin|cet\s+apr[eè]s[-\s]midi"
+    r"|ce\s+week[-\s]end|du\s+jour|de\s+la\s+journ[eé]e|cette\s+semaine|en\s+ce\s+moment|actuellement|maintenant"
+    r"|(?:de\s+la|du|de\s+l['’\s])\s*(?:pluie|neige|soleil|vent|orage|brouillard|gr[eê]le))\b",
+    re.IGNORECASE
+)
+
+# Distance d'édition maximale tolérée pour corriger une faute de frappe : au-delà, une vraie ville
+# absente de l'index serait prise pour une autre ("Cannes" -> Nantes)
+DISTANCE_MAX = 1
+# Longueur minimale d'un nom pour tenter une correction ("Bâle" n'est pas une faute pour Bali)
+LONGUEUR_MIN_CORRECTION = 5
+
+
+def suppressions(mot, distance):
+    """
+    Génère toutes les variantes d'un mot obtenues en supprimant jusqu'à `distance` caractères.
+
+    Returns:
+        set: Les variantes (le mot lui-même inclus)
+    """
+    variantes = {mot}
+    niveau = {mot}
+    for _ in range(distance):
+        suivant = set()
+        for variante in niveau:
+            for i in range(len(variante)):
+                suivant.add(variante[:i] + variante[i + 1:])
+        variantes |= suivant
+        niveau = suivant
+    return variantes
+
+
+def distance_edition(a, b, maximum):
+    """
+    Distance de Damerau-Levenshtein (transpositions adjacentes comprises) entre deux mots.
+    Le calcul s'arrête dès que la distance dépasse `maximum` (retourne alors maximum + 1).
+    """
+    if abs(len(a) - len(b)) > maximum:
+        return maximum + 1
+    precedente, courante = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        avant, precedente, courante = precedente, courante, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cout = 0 if a[i - 1] == b[j - 1] else 1
+            courante[j] = min(precedente[j] + 1, courante[j - 1] + 1, precedente[j - 1] + cout)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                courante[j] = min(courante[j], avant[j - 2] + 1)
+        if min(courante) > maximum:
+            return maximum + 1
+    return courante[-1]
+
+
+def distance_toleree(nom):
+    """Distance d'édition tolérée selon la longueur du nom (aucune correction pour les noms courts)."""
+    return 0 if len(nom) < LONGUEUR_MIN_CORRECTION else DISTANCE_MAX
+
+
+class IndexVilles:
+    """
+    Index immuable des villes : recherche exacte par nom, correction des fautes de frappe
+    et extraction dans un texte via un trie de mots.
+    Les villes sont rangées dans des tableaux compacts (noms, pays, coordonnées) et les tables
+    de recherche ne contiennent que leur numéro : l'index reste léger avec des milliers de villes.
+    """
+
+    def __init__(self, villes):
+        """
+        Construit l'index.
+
+        Args:
+            villes (list): Liste de dictionnaires {nom, pays, latitude, longitude, alias}
+        """
+        noms, pays = [], []
+        self.latitudes = array("d")
+        self.longitudes = array("d")
+        # Nom normalisé (ou alias) -> numéro de la ville
+        self.villes = {}
+        self.trie = {}
+        # Index des suppressions (à la SymSpell) pour la correction des fautes de frappe
+        variantes = {}
+        for numero, ville in enumerate(villes):
+            noms.append(ville["nom"])
+            pays.append(sys.intern(ville.get("pays", "")))
+            self.latitudes.append(ville["latitude"])
+            self.longitudes.append(ville["longitude"])
+            for nom in [ville["nom"]] + list(ville.get("alias", [])):
+                self._ajouter(nom, numero, variantes)
+        self.noms = tuple(noms)
+        self.pays = tuple(pays)
+        # Une variante ne mène presque toujours qu'à un seul nom : le nom seul, sinon un tuple
+        self.variantes = {
+            variante: cles.pop() if len(cles) == 1 else tuple(sorted(cles))
+            for variante, cles in variantes.items()
+        }
+
+    def _ajouter(self, nom, numero, variantes):
+        """Enregistre un nom (ou alias) de ville dans la table, l'index des suppressions et le trie."""
+        mots = decouper_mots(nom)
+        if not mots:
+            return
+        cle = sys.intern(" ".join(mots))
+        self.villes[cle] = numero
+        for variante in suppressions(cle, distance_toleree(cle)):
+            variantes.setdefault(variante, set()).add(cle)
+        noeud = self.trie
+        for mot in mots:
+            noeud = noeud.setdefault(mot, {})
+        noeud[FIN] = numero
+
+    def fiche(self, numero):
+        """
+        Informations sur une ville (un nouveau dictionnaire à chaque appel).
+
+        Args:
+            numero (int): Numéro de la ville dans l'index
+
+        Returns:
+            dict: Nom, pays, latitude et longitude de la ville
+        """
+        return {
+            "nom": self.noms[numero],
+            "pays": self.pays[numero],
+            "latitude": self.latitudes[numero],
+            "longitude": self.longitudes[numero]
+        }
+
+    @classmethod
+    def charger(cls, chemin=CHEMIN_VILLES):
+        """Charge l'index depuis un fichier JSON."""
+        with open(chemin, encoding="utf-8") as f:
+            donnees = json.load(f)
+        index = cls(donnees["villes"])
+        logger.info(f"Index des villes chargé: {len(index.noms)} villes, {len(index)} noms depuis {chemin}")
+        return index
+
+    def __len__(self):
+        return len(self.villes)
+
+    def __contains__(self, nom):
+        return self.trouver(nom) is not None
+
+    def trouver(self, nom):
+        """
+        Recherche une ville par son nom exact (casse, accents et tirets ignorés).
+
+        Args:
+            nom (str): Nom de la ville
+
+        Returns:
+            dict: Informations sur la ville (nom, pays, latitude, longitude) ou None
+        """
+        if not nom:
+            return None
+        numero = self.villes.get(" ".join(decouper_mots(nom)))
+        return None if numero is None else self.fiche(numero)
+
+    def corriger(self, nom):
+        """
+        Recherche une ville en tolérant une faute de frappe ("parius" -> Paris).
+        Les candidats sont obtenus par l'index des suppressions puis vérifiés par distance d'édition.
+        La correction est prudente : une seule faute, la même première lettre et un seul candidat ;
+        sinon rien n'est retourné et le nom peut être géocodé tel quel.
+
+        Args:
+            nom (str): Nom de ville éventuellement mal orthographié
+
+        Returns:
+            dict: Informations sur la ville la plus proche, ou None si aucune n'est assez proche
+        """
+        if not nom:
+            return None
+        cle = " ".join(decouper_mots(nom))
+        if cle in self.villes:
+            return self.fiche(self.villes[cle])
+        distance_max = distance_toleree(cle)
+        if not distance_max:
+            return None
+
+        candidats = set()
+        for variante in suppressions(cle, distance_max):
+            cles = self.variantes.get(variante)
+            if cles is None:
+                continue
+            if isinstance(cles, str):
+                candidats.add(cles)
+            else:
+                candidats.update(cles)
+
+        # Villes (numéros) à une faute près, de même initiale
+        proches = {
+            self.villes[candidat] for candidat in candidats
+            if candidat[0] == cle[0]
+            and distance_edition(cle, candidat, min(distance_max, distance_toleree(candidat))) <= distance_max
+        }
+        if len(proches) != 1:
+            return None
+        fiche = self.fiche(proches.pop())
+        logger.debug(f"Ville corrigée: '{nom}' -> '{fiche['nom']}'")
+        return fiche
+
+    @staticmethod
+    def _mots(texte):
+        return texte.mots if isinstance(texte, QuestionNormalisee) else decouper_mots(texte)
+
+    def _parcourir(self, mots):
+        """
+        Parcourt les mots une seule fois et produit les villes connues dans l'ordre d'apparition,
+        sous forme de tuples (numéro de la ville, position de son premier mot).
+        Pour chaque position, le nom le plus long est retenu ("new york" plutôt que "york").
+        """
+        i = 0
+        while i < len(mots):
+            noeud = self.trie
+            numero, fin = None, i
+            j = i
+            while j < len(mots) and mots[j] in noeud:
+                noeud = noeud[mots[j]]
+                j += 1
+                if FIN in noeud:
+                    numero, fin = noeud[FIN], j
+            if numero is not None:
+                yield numero, i
+                i = fin
+            else:
+                i += 1
+
+    def extraire_toutes(self, texte):
+        """
+        Repère toutes les villes connues mentionnées dans un texte.
+
+        Args:
+            texte (str ou QuestionNormalisee): Le texte à analyser
+
+        Returns:
+            list: Liste des informations de ville trouvées, dans l'ordre d'apparition
+        """
+        return [self.fiche(numero) for numero, _ in self._parcourir(self._mots(texte))]
+
+    def extraire(self, texte):
+        """
+        Repère la première ville connue mentionnée dans un texte.
+        La ville doit former tout le nom de lieu qui suit sa préposition : dans « météo de
+        Maizières les Metz », Metz n'est qu'une partie d'un nom inconnu et rien n'est retourné
+        (l'appelant se rabat alors sur l'extraction par motifs et le géocodage).
+
+        Args:
+            texte (str ou QuestionNormalisee): Le texte à analyser
+
+        Returns:
+            dict: Informations sur la ville ou None si aucune ville connue n'est mentionnée
+        """
+        mots = self._mots(texte)
+        for numero, debut in self._parcourir(mots):
+            if not self._termine_autre_lieu(mots, debut):
+                return self.fiche(numero)
+            return None
+        return None
+
+    @staticmethod
+    def _termine_autre_lieu(mots, debut):
+        """
+        Indique si la ville qui commence au mot `debut` n'est que la fin d'un nom de lieu inconnu :
+        des mots autres que des expressions de temps ou de météo la séparent de sa préposition.
+        """
+        fin = debut
+        for k in range(debut - 1, -1, -1):
+            if mots[k] not in PREPOSITIONS_LIEU:
+                continue
+            if not EXPRESSIONS_HORS_LIEU.sub("", " ".join(mots[k + 1:fin])).strip():
+                return False
+            # La préposition appartient elle-même à une expression de temps ("météo du jour Paris")
+            if not EXPRESSIONS_HORS_LIEU.sub("", " ".join(mots[k:fin])).strip():
+                fin = k
+                continue
+            return True
+        return False
+
+
+# Index partagé, chargé une seule fois par processus à la première utilisation
+_index_villes = None
+_verrou_index = threading.Lock()
+
+
+def obtenir_index_villes():
+    """
+    Retourne l'index partagé des villes, en le chargeant à la première utilisation.
+
+    Returns:
+        IndexVilles: L'index des villes connues
+    """
+    global _index_villes
+    if _index_villes is None:
+        with _verrou_index:
+            if _index_villes is None:
+                _index_villes = IndexVilles.charger()
+    return _index_villes